@@ -3,14 +3,71 @@
 ipTIME 포트포워드 REST API 서버
 Flask를 사용한 HTTP API 제공
 """
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
+from werkzeug.serving import WSGIRequestHandler, make_server
+from werkzeug.wsgi import LimitedStream
+from src import encoding
+from src.clients import client_error
+from src.fleet import RuleFilter, query_fleet
+from src.history import SnapshotStore, parse_time
 from src.iptime_api import IptimeAPI
-from src.port_forward import PortForwardManager
+from src import http_pool
+from src import profiling
+from src.jobs import JobManager
+from src.port_forward import DEFAULT_ALLOCATE_RANGE, NoFreePortError, VersionConflictError
+from src.ratelimit import QueueFullError
+from src.registry import RouterRegistry
+from src.replay import Recorder, Replayer, parse_latency
+from src.scheduler import Scheduler, check_action
+from src.validation import ValidationError, check_rule_fields
+import atexit
 import os
+import json
+import threading
+import time
+import uuid
 from functools import wraps
 
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    orjson이 설치되어 있으면 orjson으로 응답 직렬화
+    
+    orjson으로 json.dumps와 같은 결과를 낼 수 있는 인자(sort_keys, indent=2, 기본 구분자, default)만
+    orjson으로 처리하고, 그 밖의 인자가 있으면 표준 json으로 직렬화합니다.
+    """
+    
+    ensure_ascii = False
+    
+    @staticmethod
+    def _orjson_compatible(kwargs) -> bool:
+        indent = kwargs.get('indent')
+        separators = kwargs.get('separators')
+        if set(kwargs) - {'sort_keys', 'indent', 'separators', 'default', 'ensure_ascii'}:
+            return False
+        if indent not in (None, 2) or kwargs.get('ensure_ascii'):
+            return False
+        # json.dumps의 기본 구분자는 indent가 없으면 공백이 들어간 (', ', ': ')
+        if separators is None:
+            return indent is not None
+        return tuple(separators) == ((',', ': ') if indent else (',', ':'))
+    
+    def dumps(self, obj, **kwargs):
+        with profiling.phase(profiling.SERIALIZE):
+            if encoding.orjson is None or not self._orjson_compatible(kwargs):
+                return super().dumps(obj, **kwargs)
+            return encoding.dumps(
+                obj,
+                sort_keys=kwargs.get('sort_keys', self.sort_keys),
+                indent=kwargs.get('indent') is not None,
+                default=kwargs.get('default', self.default)
+            ).decode('utf-8')
+
+
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 CORS(app)  # CORS 활성화
 
 # 환경 변수에서 설정 읽기
@@ -18,15 +75,223 @@ ROUTER_IP = os.environ.get('IPTIME_ROUTER_IP', 'http://192.168.0.1')
 USERNAME = os.environ.get('IPTIME_USERNAME', 'admin')
 PASSWORD = os.environ.get('IPTIME_PASSWORD', 'admin')
 
+# 내부 IP 검증용 LAN 대역 (선택사항, 예: 192.168.0.0/24)
+LAN_NETWORK = os.environ.get('IPTIME_LAN_NETWORK') or None
+
+# 규칙 테이블 캐시 유효 시간(초) - 검증에 쓴 테이블을 추가/수정에도 사용
+RULE_CACHE_TTL = float(os.environ.get('RULE_CACHE_TTL', 5))
+
+# 규칙 스냅샷 기록 DB (선택사항, 지정 시 조회한 규칙 테이블을 기록)
+HISTORY_DB = os.environ.get('IPTIME_HISTORY_DB', '')
+history_store = SnapshotStore(HISTORY_DB) if HISTORY_DB else None
+
+# 공유기별 공유 연결 풀 (keep-alive 연결 수, 모두 사용 중일 때 대기 여부)
+http_pool.configure(
+    pool_maxsize=int(os.environ.get('HTTP_POOL_MAXSIZE', 4)),
+    pool_block=os.environ.get('HTTP_POOL_BLOCK', 'false').lower() in ('1', 'true', 'yes')
+)
+
+# 공유기 응답 기록/재생 (선택사항, 공유기 없이 성능 측정/문제 재현)
+# IPTIME_REPLAY가 있으면 기록된 응답을 재생하고, IPTIME_RECORD가 있으면 공유기 요청/응답을 기록
+if os.environ.get('IPTIME_REPLAY'):
+    IptimeAPI.transport = Replayer(
+        os.environ['IPTIME_REPLAY'], parse_latency(os.environ.get('IPTIME_REPLAY_LATENCY', 0))
+    ).adapter
+elif os.environ.get('IPTIME_RECORD'):
+    recorder = Recorder(os.environ['IPTIME_RECORD'])
+    IptimeAPI.transport = recorder.adapter
+    atexit.register(recorder.close)
+
+# 공유기 레지스트리
+# IPTIME_ROUTERS_CONFIG 설정 파일이 있으면 여러 공유기를, 없으면 위 환경 변수의 공유기 하나('default')를 사용
+# 공유기마다 로그인 세션 풀, 규칙 캐시, 요청 제한(공유기 CPU 보호)을 따로 가짐
+ROUTERS_CONFIG = os.environ.get('IPTIME_ROUTERS_CONFIG', '')
+if ROUTERS_CONFIG:
+    registry = RouterRegistry.from_file(
+        ROUTERS_CONFIG, history_store, os.environ.get('IPTIME_DEFAULT_ROUTER') or None
+    )
+else:
+    registry = RouterRegistry({
+        'default': {
+            'host': ROUTER_IP,
+            'username': USERNAME,
+            'password': PASSWORD,
+            'lan_network': LAN_NETWORK,
+            'cache_ttl': RULE_CACHE_TTL,
+            'pool_size': int(os.environ.get('ROUTER_POOL_SIZE', 2)),
+            'rate_limit': float(os.environ.get('ROUTER_RATE_LIMIT', 2)),
+            'burst': int(os.environ.get('ROUTER_BURST', 4)),
+            'max_concurrency': int(os.environ.get('ROUTER_MAX_CONCURRENCY', 2)),
+            'max_queue': int(os.environ.get('ROUTER_MAX_QUEUE', 16)),
+            'queue_timeout': float(os.environ.get('ROUTER_QUEUE_TIMEOUT', 30)),
+            'client_ttl': float(os.environ.get('CLIENT_TTL', 600))
+        }
+    }, history_store)
+
+# 비동기 작업 (공유기별 워커 수, 끝난 작업 보관 시간(초))
+job_manager = JobManager(
+    workers_per_router=int(os.environ.get('JOB_WORKERS', 1)),
+    retention=float(os.environ.get('JOB_RETENTION', 3600))
+)
+
+# 규칙 예약 실행 (선택사항, 예약 목록 SQLite 파일)
+# 같은 시각(SCHEDULE_COALESCE초 이내) 예약은 공유기별로 묶어 쓰기 세션 하나에서 적용
+SCHEDULE_DB = os.environ.get('IPTIME_SCHEDULE_DB', '')
+
+
+def run_scheduled_batch(router_id, operations):
+    """예약 묶음 실행 (요청 제한 대기열이 비기를 기다렸다가 쓰기 세션 하나로 적용)"""
+    ctx = registry.get(router_id)
+    while True:
+        try:
+            with ctx.limiter.slot(), ctx.session(write=True) as api:
+                return list(ctx.manager(api).apply_plan(operations))
+        except QueueFullError as e:
+            time.sleep(e.retry_after)
+
+
+scheduler = None
+if SCHEDULE_DB:
+    scheduler = Scheduler(
+        SCHEDULE_DB,
+        run_scheduled_batch,
+        coalesce=float(os.environ.get('SCHEDULE_COALESCE', 1)),
+        max_late=float(os.environ.get('SCHEDULE_MAX_LATE', 3600))
+    )
+
+# 시작 시 워밍업 (공유기별 세션 미리 로그인, 규칙 테이블/시스템 정보 미리 조회)
+# 끝날 때까지 /api/ready가 503을 반환하므로 로드 밸런서는 준비된 인스턴스로만 요청을 보냄
+WARMUP = os.environ.get('WARMUP', 'true').lower() in ('1', 'true', 'yes')
+WARMUP_SESSIONS = int(os.environ.get('WARMUP_SESSIONS', 0)) or None
+WARMUP_TIMEOUT = float(os.environ.get('WARMUP_TIMEOUT', 60))
+
+# LAN 클라이언트 색인 주기적 갱신 (초, 0이면 필요할 때만 갱신)
+# 호스트 이름/MAC 대상은 요청 중에 공유기에 묻지 않고 메모리 색인으로 변환
+CLIENT_REFRESH = float(os.environ.get('CLIENT_REFRESH', 300))
+
+
+def refresh_clients_periodically():
+    while True:
+        time.sleep(CLIENT_REFRESH)
+        for ctx in registry.contexts():
+            try:
+                ctx.refresh_clients()
+            except Exception as e:
+                app.logger.warning(f"LAN 클라이언트 색인 갱신 실패 ({ctx.router_id}): {e}")
+
+
+def start_background_tasks():
+    """
+    예약 실행, 워밍업, LAN 클라이언트 색인 갱신 시작
+
+    공유기에 로그인하는 작업이므로 실제로 요청을 처리하는 프로세스에서만 호출합니다.
+    (WSGI 서버가 불러올 때, 직접 실행하면 디버그 리로더의 감시 프로세스가 아닐 때)
+    """
+    if scheduler is not None:
+        # 워커가 여럿이면 파일 잠금을 얻은 워커 하나만 실행
+        scheduler.start()
+    if WARMUP:
+        threading.Thread(
+            target=registry.warm_up, args=(WARMUP_SESSIONS, WARMUP_TIMEOUT), name='iptime-warmup', daemon=True
+        ).start()
+    if CLIENT_REFRESH > 0:
+        threading.Thread(target=refresh_clients_periodically, name='iptime-clients', daemon=True).start()
+
+
+# 응답 압축 (이 크기(바이트) 이상인 JSON 응답과 스트리밍 응답을 gzip/br로 압축, 0이면 사용 안 함)
+COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/plain', 'text/csv')
+
+# 요청별 프로파일링 저장 디렉토리 (선택사항, 지정 시 pstats 파일과 요약 JSON 저장)
+PROFILE_DIR = os.environ.get('PROFILE_DIR', '')
+
 # API 인증 토큰 (선택사항)
 API_TOKEN = os.environ.get('API_TOKEN', '')
 
+# 로컬 Unix 소켓 (선택사항, 같은 호스트의 에이전트용, TCP 서버와 같은 경로)
+# 접근은 소켓 파일 권한(UNIX_SOCKET_MODE, 8진수, 기본값 소유자만)으로 제한하므로 이 소켓으로 온 API 요청은 토큰을 검사하지 않음
+# 단, 프로파일링처럼 토큰이 있어야 하는 기능은 소켓으로 와도 토큰을 검사함 (has_valid_token)
+UNIX_SOCKET = os.environ.get('IPTIME_UNIX_SOCKET', '')
+UNIX_SOCKET_MODE = int(os.environ.get('UNIX_SOCKET_MODE', '600'), 8)
+# 요청 없이 열려 있는 로컬 연결을 닫는 시간(초)
+UNIX_SOCKET_IDLE = float(os.environ.get('UNIX_SOCKET_IDLE', 300))
+LOCAL_SOCKET_KEY = 'iptime.local_socket'
+
+
+class KeepAliveRequestHandler(WSGIRequestHandler):
+    """
+    연결을 유지하는 요청 핸들러 (로컬 Unix 소켓용)
+    
+    werkzeug 개발 서버는 응답 후 소켓에 남은 데이터를 모두 읽어 버리고 항상 Connection: close를 보냅니다.
+    요청을 처리하는 동안 입력을 Content-Length만큼으로 제한하면 남은 본문만 버리고 다음 요청은 그대로 남으므로
+    연결을 유지할 수 있습니다.
+    """
+    
+    timeout = UNIX_SOCKET_IDLE
+    keep_alive = False
+    
+    def run_wsgi(self):
+        # chunked 본문은 끝을 미리 알 수 없으므로 기존처럼 연결을 닫음
+        self.keep_alive = 'chunked' not in self.headers.get('Transfer-Encoding', '').lower()
+        if not self.keep_alive:
+            return super().run_wsgi()
+        
+        rfile = self.rfile
+        self.rfile = LimitedStream(rfile, int(self.headers.get('Content-Length') or 0))
+        try:
+            super().run_wsgi()
+            self.rfile.exhaust()
+        finally:
+            self.rfile = rfile
+    
+    def send_header(self, keyword, value):
+        if keyword.lower() == 'connection' and value.lower() == 'close' and self.keep_alive:
+            return
+        super().send_header(keyword, value)
+
+
+def is_local_request():
+    """로컬 Unix 소켓으로 들어온 요청인지 여부"""
+    return bool(request.environ.get(LOCAL_SOCKET_KEY))
+
+
+def local_socket_app(environ, start_response):
+    environ[LOCAL_SOCKET_KEY] = True
+    return app(environ, start_response)
+
+
+def serve_unix_socket(path, mode=UNIX_SOCKET_MODE):
+    """
+    Unix 소켓 HTTP 서버를 백그라운드 스레드로 시작 (keep-alive 연결 재사용)
+    
+    Returns:
+        werkzeug 서버 (shutdown()으로 종료)
+    """
+    # 바인드 직후부터 권한이 적용되도록 umask로 생성 (이전 실행의 소켓 파일은 werkzeug가 지움)
+    old_umask = os.umask(0o777 & ~mode)
+    try:
+        server = make_server(
+            f'unix://{path}', 0, local_socket_app, threaded=True, request_handler=KeepAliveRequestHandler
+        )
+    finally:
+        os.umask(old_umask)
+    os.chmod(path, mode)
+    threading.Thread(target=server.serve_forever, name='iptime-unix-socket', daemon=True).start()
+    
+    @atexit.register
+    def remove_socket():
+        if os.path.exists(path):
+            os.unlink(path)
+    
+    return server
+
 
 def require_token(f):
-    """API 토큰 검증 데코레이터"""
+    """API 토큰 검증 데코레이터 (로컬 Unix 소켓 요청은 파일 권한으로 대신함)"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if API_TOKEN:
+        if API_TOKEN and not is_local_request():
             token = request.headers.get('Authorization')
             if not token or not token.startswith('Bearer '):
                 return jsonify({'error': 'Missing or invalid token'}), 401
@@ -38,28 +303,382 @@ def require_token(f):
     return decorated_function
 
 
-def get_api_client():
-    """API 클라이언트 생성 및 로그인"""
-    api = IptimeAPI(ROUTER_IP, USERNAME, PASSWORD)
-    if not api.login():
-        raise Exception("Failed to login to router")
-    return api
+def wants_ndjson():
+    """NDJSON 스트리밍 응답 여부 (?format=ndjson 또는 Accept: application/x-ndjson)"""
+    if request.args.get('format', '').lower() == 'ndjson':
+        return True
+    return 'application/x-ndjson' in request.headers.get('Accept', '')
+
+
+def ndjson_response(items, batch=1):
+    """
+    항목마다 한 줄씩 보내는 NDJSON 스트리밍 응답
+    
+    Args:
+        batch: 한 번에 보내는 줄 수 (결과가 도착하는 대로 보내야 하면 1)
+    """
+    return Response(
+        stream_with_context(encoding.iter_ndjson(items, batch)), mimetype='application/x-ndjson'
+    )
+
+
+def has_valid_token():
+    """
+    Authorization 헤더의 토큰이 API_TOKEN과 일치하는지 여부
+
+    프로파일링 등 민감한 기능용이므로 로컬 Unix 소켓 요청도 예외 없이 검사합니다.
+    """
+    token = request.headers.get('Authorization', '')
+    return bool(API_TOKEN) and token.startswith('Bearer ') and token[7:] == API_TOKEN
+
+
+@app.before_request
+def start_profiling():
+    """
+    요청별 프로파일링 (X-Profile 헤더 또는 ?profile=)
+    
+    API_TOKEN이 설정되어 있고 올바른 토큰을 보낸 요청만 프로파일링합니다.
+    """
+    mode = request.headers.get('X-Profile') or request.args.get('profile')
+    if mode and mode.lower() not in ('0', 'false', 'no') and has_valid_token():
+        g.profile_mode = mode.lower()
+        g.profiler = profiling.Profiler().start()
+
+
+@app.teardown_request
+def stop_profiling(error=None):
+    # 응답 전에 예외가 나도 프로파일러 정리
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.stop()
+
+
+@app.after_request
+def compress_response(response):
+    """Accept-Encoding에 따라 큰 응답과 스트리밍 응답 압축"""
+    if (
+        not COMPRESS_MIN_SIZE
+        or response.status_code < 200 or response.status_code in (204, 304)
+        or 'Content-Encoding' in response.headers
+        or response.mimetype not in COMPRESSIBLE_TYPES
+    ):
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    content_encoding = encoding.choose_encoding(request.headers.get('Accept-Encoding'))
+    if content_encoding is None:
+        return response
+    
+    if response.is_streamed:
+        chunks = (chunk.encode('utf-8') if isinstance(chunk, str) else chunk for chunk in response.response)
+        response.response = encoding.compress_stream(chunks, content_encoding, COMPRESS_LEVEL)
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        if len(body) < COMPRESS_MIN_SIZE:
+            return response
+        response.set_data(encoding.compress(body, content_encoding, COMPRESS_LEVEL))
+    response.headers['Content-Encoding'] = content_encoding
+    return response
+
+
+@app.after_request
+def finish_profiling(response):
+    """
+    프로파일 결과 반환 (압축보다 먼저 실행)
+    
+    구간별 시간은 Server-Timing 헤더로 보내고, PROFILE_DIR이 있으면 pstats 파일과 요약 JSON을 저장합니다.
+    profile=body이면 JSON 응답 본문의 'profile' 키에 요약을 넣습니다.
+    스트리밍 응답은 본문을 보내기 전까지만 측정됩니다.
+    """
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return response
+    profiler.stop()
+    response.headers['Server-Timing'] = profiler.server_timing()
+    
+    report = profiler.report()
+    if PROFILE_DIR:
+        path = os.path.join(
+            PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{request.endpoint}-{uuid.uuid4().hex[:8]}.prof"
+        )
+        if profiler.dump(path):
+            with open(f"{path}.json", 'w', encoding='utf-8') as fp:
+                json.dump(report, fp, indent=2, ensure_ascii=False)
+            response.headers['X-Profile-File'] = path
+    
+    if g.get('profile_mode') == 'body' and response.is_json and not response.is_streamed:
+        data = response.get_json()
+        if isinstance(data, dict):
+            data['profile'] = report
+            response.set_data(encoding.dumps(data))
+    return response
+
+
+def with_router(f):
+    """URL의 router_id로 공유기 컨텍스트를 찾아 첫 번째 인자로 전달하는 데코레이터"""
+    @wraps(f)
+    def decorated_function(*args, router_id=None, **kwargs):
+        try:
+            ctx = registry.get(router_id)
+        except KeyError:
+            return jsonify({'status': 'error', 'message': f'Unknown router: {router_id}'}), 404
+        return f(ctx, *args, **kwargs)
+    return decorated_function
+
+
+def rate_limited(f):
+    """공유기 요청 제한 데코레이터 (대기열이 가득 차면 429 + Retry-After)"""
+    @wraps(f)
+    def decorated_function(ctx, *args, **kwargs):
+        try:
+            with ctx.limiter.slot():
+                return f(ctx, *args, **kwargs)
+        except QueueFullError as e:
+            response = jsonify({'status': 'error', 'message': 'Router is busy, retry later'})
+            response.status_code = 429
+            response.headers['Retry-After'] = str(int(e.retry_after))
+            return response
+    return decorated_function
+
+
+def parse_rule_identifier(rule_identifier):
+    """URL의 규칙 식별자 파싱 (숫자면 ID, 아니면 이름)"""
+    try:
+        return int(rule_identifier)  # 숫자인 경우 ID로 처리
+    except ValueError:
+        return rule_identifier  # 문자열인 경우 이름으로 처리
+
+
+def get_if_match():
+    """If-Match 헤더에서 규칙 버전 토큰 추출 (없으면 None)"""
+    value = request.headers.get('If-Match')
+    if not value:
+        return None
+    value = value.split(',')[0].strip()
+    if value.startswith('W/'):
+        value = value[2:]
+    return value.strip('"')
+
+
+def version_conflict(error):
+    """버전 불일치 응답 (412 Precondition Failed)"""
+    body = {
+        'status': 'error',
+        'message': 'Rule version mismatch',
+        'expected_version': error.expected_version,
+        'rule': error.current
+    }
+    response = jsonify(body)
+    response.status_code = 412
+    if error.current:
+        response.headers['ETag'] = f'"{error.current["version"]}"'
+    return response
+
+
+def wants_verify(data=None):
+    """변경 결과 확인 여부 (?verify=true 또는 JSON 본문의 verify)"""
+    if request.args.get('verify', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return bool(data and data.get('verify'))
+
+
+def wants_async(data=None):
+    """비동기 실행 여부 (?async=true 또는 JSON 본문의 async)"""
+    if request.args.get('async', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return bool(data and data.get('async'))
+
+
+def submit_job(ctx, kind, total, operation):
+    """
+    작업을 공유기 워커에 등록하고 202 응답 반환
+    
+    워커는 요청 제한 대기열이 비기를 기다렸다가 쓰기 세션에서 operation(pf_manager)을 실행합니다.
+    """
+    def run():
+        while True:
+            try:
+                with ctx.limiter.slot(), ctx.session(write=True) as api:
+                    yield from operation(ctx.manager(api))
+                return
+            except QueueFullError as e:
+                time.sleep(e.retry_after)
+    
+    job = job_manager.submit(ctx.router_id, kind, total, run)
+    response = jsonify({'status': 'accepted', 'job': job.to_dict(include_results=False)})
+    response.status_code = 202
+    response.headers['Location'] = f'/api/jobs/{job.id}'
+    return response
+
+
+def rule_response(message, rule):
+    """확인된 규칙을 담은 성공 응답 (ETag 포함)"""
+    response = jsonify({'status': 'success', 'message': message, 'rule': rule})
+    response.headers['ETag'] = f'"{rule["version"]}"'
+    return response
+
+
+def resolve_target(ctx, data, field='internal_ip'):
+    """
+    data[field]에 준 LAN 클라이언트 호스트 이름/MAC을 IP로 바꿈 (필드 검증 전에 호출)
+    
+    Returns:
+        오류 메시지 목록 (찾지 못한 경우)
+    """
+    target = data.get(field)
+    if target in (None, ''):
+        return []
+    ip = ctx.resolve_host(str(target))
+    if ip is None:
+        return [client_error(target, field)]
+    data[field] = ip
+    return []
+
+
+def validation_error(errors):
+    """검증 실패 응답"""
+    return jsonify({
+        'status': 'error',
+        'message': 'Validation failed',
+        'errors': errors
+    }), 400
 
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """헬스 체크 엔드포인트"""
-    return jsonify({'status': 'healthy', 'router_ip': ROUTER_IP})
+    return jsonify({
+        'status': 'healthy',
+        'router_ip': registry.get().host,
+        'routers': registry.ids()
+    })
+
+
+@app.route('/api/ready', methods=['GET'])
+def readiness_check():
+    """
+    준비 상태 확인 (로드 밸런서용, 공유기 접속 없음)
+    
+    워밍업 중이거나 모든 공유기 점검에 실패했으면 503, 일부 공유기만 실패했으면 degraded(200)입니다.
+    WARMUP_TIMEOUT이 지나도 아직 점검 중인 공유기는 실패로 보지 않고, 나머지가 준비됐으면 partial(200)입니다.
+    WARMUP=false이면 워밍업 없이 cold(200)입니다.
+    """
+    routers = [ctx.readiness() for ctx in registry.contexts()]
+    ready = sum(1 for router in routers if router['ready'])
+    failed = sum(1 for router in routers if not router['ready'] and not router['warming'] and router['probe'])
+    if registry.warm_state == 'cold':
+        status = 'cold'
+    elif registry.warm_state == 'warming':
+        status = 'warming'
+    elif ready == len(routers):
+        status = 'ready'
+    elif ready:
+        status = 'degraded' if failed else 'partial'
+    elif failed == len(routers):
+        status = 'unavailable'
+    else:
+        status = 'warming'
+    return jsonify({
+        'status': status,
+        'routers': routers
+    }), 503 if status in ('warming', 'unavailable') else 200
+
+
+@app.route('/api/routers', methods=['GET'])
+@require_token
+def list_routers():
+    """등록된 공유기 목록"""
+    return jsonify({
+        'status': 'success',
+        'data': [ctx.describe() for ctx in registry.contexts()],
+        'default': registry.default_router
+    })
+
+
+@app.route('/api/fleet/portforward', methods=['GET'])
+@require_token
+def query_fleet_rules():
+    """
+    등록된 모든 공유기에서 조건에 맞는 규칙 조회 (NDJSON 스트리밍)
+    
+    Query:
+        port: 외부 포트
+        internal_ip: 내부 IP 또는 대역 (예: 192.168.0.0/24)
+        protocol: tcp/udp
+        name: 규칙 이름 패턴 (와일드카드)
+        routers: 조회할 공유기 (쉼표 구분, 기본값: 전체)
+        timeout: 공유기 응답 대기 시간(초, 기본값: 10)
+    
+    각 줄은 {"router", "rule"} 또는 공유기별 완료 상태 {"router", "status", ...}입니다.
+    """
+    try:
+        rule_filter = RuleFilter(
+            port=request.args.get('port'),
+            internal_ip=request.args.get('internal_ip'),
+            protocol=request.args.get('protocol'),
+            name=request.args.get('name')
+        )
+        timeout = float(request.args.get('timeout', 10))
+        router_ids = [r for r in request.args.get('routers', '').split(',') if r]
+        contexts = [registry.get(r) for r in router_ids] if router_ids else registry.contexts()
+    except KeyError as e:
+        return jsonify({'status': 'error', 'message': f'Unknown router: {e.args[0]}'}), 404
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': f'Invalid query: {e}'}), 400
+    
+    return ndjson_response(query_fleet(contexts, rule_filter, timeout))
+
+
+@app.route('/api/metrics', methods=['GET'])
+@require_token
+def get_metrics():
+    """공유기별 요청 대기열/대기 시간, 세션 풀, 캐시, HTTP 연결 풀, 예약 실행 지표"""
+    return jsonify({
+        'status': 'success',
+        'data': {ctx.router_id: ctx.stats() for ctx in registry.contexts()},
+        'http_pool': http_pool.pool_stats(),
+        'scheduler': scheduler.stats() if scheduler is not None else None
+    })
+
+
+@app.route('/api/clients', methods=['GET'])
+@app.route('/api/routers/<router_id>/clients', methods=['GET'])
+@require_token
+@with_router
+@rate_limited
+def list_lan_clients(ctx):
+    """
+    LAN 클라이언트 색인 (MAC, 호스트 이름, IP)
+    
+    규칙의 internal_ip에 IP 대신 여기의 호스트 이름이나 MAC을 줄 수 있습니다.
+    ?refresh=true이면 공유기에서 새로 읽음 (기본값: 색인이 오래됐을 때만)
+    """
+    try:
+        if request.args.get('refresh', 'false').lower() == 'true' or ctx.clients.needs_refresh():
+            with ctx.session() as api:
+                if api.get_lan_clients() is None:
+                    return jsonify({'status': 'error', 'message': 'Failed to get LAN clients'}), 500
+        
+        return jsonify({'status': 'success', 'age': ctx.clients.age(), 'data': ctx.clients.entries()})
+        
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
 
 
 @app.route('/api/system/info', methods=['GET'])
+@app.route('/api/routers/<router_id>/system/info', methods=['GET'])
 @require_token
-def get_system_info():
+@with_router
+@rate_limited
+def get_system_info(ctx):
     """시스템 정보 조회"""
     try:
-        api = get_api_client()
-        info = api.get_system_info()
-        api.logout()
+        info = ctx.cached_system_info()
+        if info is None:
+            with ctx.session() as api:
+                info = api.get_system_info()
+            ctx.set_system_info(info)
         
         if info:
             return jsonify({'status': 'success', 'data': info})
@@ -71,14 +690,18 @@ def get_system_info():
 
 
 @app.route('/api/portforward', methods=['GET'])
+@app.route('/api/routers/<router_id>/portforward', methods=['GET'])
 @require_token
-def list_port_forward_rules():
-    """포트포워드 규칙 목록 조회"""
+@with_router
+@rate_limited
+def list_port_forward_rules(ctx):
+    """포트포워드 규칙 목록 조회 (?format=ndjson이면 규칙마다 한 줄씩 스트리밍)"""
     try:
-        api = get_api_client()
-        pf_manager = PortForwardManager(api)
-        rules = pf_manager.get_port_forward_rules()
-        api.logout()
+        with ctx.session() as api:
+            rules = ctx.manager(api).get_port_forward_rules()
+        
+        if wants_ndjson():
+            return ndjson_response(rules, batch=256)
         
         return jsonify({
             'status': 'success',
@@ -91,8 +714,11 @@ def list_port_forward_rules():
 
 
 @app.route('/api/portforward', methods=['POST'])
+@app.route('/api/routers/<router_id>/portforward', methods=['POST'])
 @require_token
-def add_port_forward_rule():
+@with_router
+@rate_limited
+def add_port_forward_rule(ctx):
     """포트포워드 규칙 추가"""
     try:
         data = request.get_json()
@@ -106,20 +732,38 @@ def add_port_forward_rule():
                     'message': f'Missing required field: {field}'
                 }), 400
         
-        api = get_api_client()
-        pf_manager = PortForwardManager(api)
-        
-        success = pf_manager.add_port_forward_rule(
-            description=data['description'],
-            internal_ip=data['internal_ip'],
-            external_port=data['external_port'],
-            internal_port=data.get('internal_port'),
-            protocol=data.get('protocol', 'tcp')
+        # 공유기 접속 전 필드 검증 (호스트 이름/MAC 대상은 LAN 클라이언트 색인으로 변환)
+        errors = resolve_target(ctx, data) or check_rule_fields(
+            data['description'], data['internal_ip'], data['external_port'],
+            data.get('internal_port'), data.get('protocol', 'tcp'), ctx.lan_network
         )
+        if errors:
+            return validation_error(errors)
         
-        api.logout()
+        with ctx.session(write=True) as api:
+            pf_manager = ctx.manager(api)
+            
+            # 규칙 테이블 기준 검증 (포트/이름 중복)
+            errors = pf_manager.validate_new_rule(
+                data['description'], data['internal_ip'], data['external_port'],
+                data.get('internal_port'), data.get('protocol', 'tcp')
+            )
+            if errors:
+                return validation_error(errors)
+            
+            success = pf_manager.add_port_forward_rule(
+                description=data['description'],
+                internal_ip=data['internal_ip'],
+                external_port=data['external_port'],
+                internal_port=data.get('internal_port'),
+                protocol=data.get('protocol', 'tcp'),
+                verify=wants_verify(data),
+                disabled=bool(data.get('disabled'))
+            )
         
-        if success:
+        if isinstance(success, dict):
+            return rule_response('Rule added and verified', success)
+        elif success:
             return jsonify({'status': 'success', 'message': 'Rule added successfully'})
         else:
             return jsonify({'status': 'error', 'message': 'Failed to add rule'}), 500
@@ -128,26 +772,147 @@ def add_port_forward_rule():
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
 
-@app.route('/api/portforward/<rule_identifier>', methods=['GET'])
+def parse_port_range(value):
+    """
+    할당 포트 범위 파싱 ([low, high] 또는 "low-high")
+    
+    Returns:
+        (low, high), 올바르지 않으면 None
+    """
+    if value is None:
+        return DEFAULT_ALLOCATE_RANGE
+    try:
+        if isinstance(value, str):
+            low, _, high = value.partition('-')
+            low, high = int(low), int(high or low)
+        else:
+            low, high = (int(port) for port in value)
+    except (TypeError, ValueError):
+        return None
+    if not 1 <= low <= high <= 65535:
+        return None
+    return low, high
+
+
+@app.route('/api/portforward/allocate', methods=['POST'])
+@app.route('/api/routers/<router_id>/portforward/allocate', methods=['POST'])
 @require_token
-def get_port_forward_rule(rule_identifier):
-    """포트포워드 규칙 단건 조회 (ID 또는 이름)"""
+@with_router
+@rate_limited
+def allocate_port_forward_rule(ctx):
+    """
+    비어 있는 외부 포트를 할당해 규칙 추가
+    
+    Body:
+        description, internal_ip: 필수
+        internal_port: 내부 포트 (없으면 할당된 외부 포트와 동일)
+        protocol: tcp/udp/both (both이면 두 프로토콜 모두 비어 있는 포트)
+        port_range: 할당 범위 [low, high] 또는 "low-high" (기본값: 1024-65535)
+        verify: 응답 페이지로 추가 확인
+    """
     try:
-        # ID 또는 이름 파싱
-        try:
-            rule_id_or_name = int(rule_identifier)  # 숫자인 경우 ID로 처리
-        except ValueError:
-            rule_id_or_name = rule_identifier  # 문자열인 경우 이름으로 처리
+        data = request.get_json()
+        
+        for field in ('description', 'internal_ip'):
+            if field not in data:
+                return jsonify({
+                    'status': 'error',
+                    'message': f'Missing required field: {field}'
+                }), 400
+        
+        port_range = parse_port_range(data.get('port_range'))
+        if port_range is None:
+            return validation_error([f"port_range: 포트 범위가 올바르지 않습니다 ({data.get('port_range')!r})"])
+        
+        # 공유기 접속 전 필드 검증 (외부 포트는 범위 시작 포트로 대신 검사)
+        errors = resolve_target(ctx, data) or check_rule_fields(
+            data['description'], data['internal_ip'], port_range[0],
+            data.get('internal_port'), data.get('protocol', 'tcp'), ctx.lan_network
+        )
+        if errors:
+            return validation_error(errors)
+        
+        # 조회 -> 빈 포트 선택 -> 추가를 쓰기 잠금 안에서 한 번에 처리 (동시 할당 경쟁 없음)
+        with ctx.session(write=True) as api:
+            try:
+                rule = ctx.manager(api).allocate_port_forward_rule(
+                    description=data['description'],
+                    internal_ip=data['internal_ip'],
+                    internal_port=data.get('internal_port'),
+                    protocol=data.get('protocol', 'tcp'),
+                    port_range=port_range,
+                    verify=wants_verify(data)
+                )
+            except ValidationError as e:
+                return validation_error(e.errors)
+            except NoFreePortError as e:
+                return jsonify({'status': 'error', 'message': str(e)}), 409
+        
+        if rule is None:
+            return jsonify({'status': 'error', 'message': 'Failed to allocate rule'}), 500
+        return rule_response('Port allocated', rule)
+            
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
+@app.route('/api/portforward/history', methods=['GET'])
+@app.route('/api/routers/<router_id>/portforward/history', methods=['GET'])
+@require_token
+@with_router
+def get_port_forward_history(ctx):
+    """
+    규칙 변경 이력 조회 (공유기 접속 없이 기록된 스냅샷 사용)
+    
+    Query:
+        from, to: 시각 (epoch 초 또는 ISO 8601)
+        rule: 규칙 이름 - 지정 시 해당 규칙 이력, 없으면 from~to 사이 차이
+        snapshots: true이면 스냅샷 목록
+        format: ndjson이면 목록(스냅샷/규칙 이력)을 한 줄씩 스트리밍
+    """
+    if history_store is None:
+        return jsonify({'status': 'error', 'message': 'History store is not configured (IPTIME_HISTORY_DB)'}), 404
+    
+    try:
+        since = parse_time(request.args.get('from'))
+        until = parse_time(request.args.get('to'))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': f'Invalid time: {e}'}), 400
+    
+    try:
+        if request.args.get('snapshots', '').lower() in ('1', 'true', 'yes'):
+            data = history_store.snapshots(ctx.router_id, since, until)
+        elif request.args.get('rule'):
+            data = history_store.rule_history(ctx.router_id, request.args['rule'], since, until)
+        else:
+            data = history_store.diff(ctx.router_id, since, until)
         
-        api = get_api_client()
-        pf_manager = PortForwardManager(api)
+        if wants_ndjson() and isinstance(data, list):
+            return ndjson_response(data, batch=256)
         
-        rule = pf_manager.get_port_forward_rule(rule_id_or_name)
+        return jsonify({'status': 'success', 'data': data})
         
-        api.logout()
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
+@app.route('/api/portforward/<rule_identifier>', methods=['GET'])
+@app.route('/api/routers/<router_id>/portforward/<rule_identifier>', methods=['GET'])
+@require_token
+@with_router
+@rate_limited
+def get_port_forward_rule(ctx, rule_identifier):
+    """포트포워드 규칙 단건 조회 (ID 또는 이름)"""
+    try:
+        rule_id_or_name = parse_rule_identifier(rule_identifier)
+        
+        with ctx.session() as api:
+            rule = ctx.manager(api).get_port_forward_rule(rule_id_or_name)
         
         if rule:
-            return jsonify({'status': 'success', 'rule': rule})
+            response = jsonify({'status': 'success', 'rule': rule})
+            response.headers['ETag'] = f'"{rule["version"]}"'
+            return response
         else:
             return jsonify({'status': 'error', 'message': 'Rule not found'}), 404
             
@@ -156,33 +921,50 @@ def get_port_forward_rule(rule_identifier):
 
 
 @app.route('/api/portforward/<rule_identifier>', methods=['PUT'])
+@app.route('/api/routers/<router_id>/portforward/<rule_identifier>', methods=['PUT'])
 @require_token
-def update_port_forward_rule(rule_identifier):
+@with_router
+@rate_limited
+def update_port_forward_rule(ctx, rule_identifier):
     """포트포워드 규칙 수정 (ID 또는 이름)"""
     try:
         data = request.get_json()
+        rule_id_or_name = parse_rule_identifier(rule_identifier)
+        expected_version = get_if_match()
         
-        # ID 또는 이름 파싱
-        try:
-            rule_id_or_name = int(rule_identifier)  # 숫자인 경우 ID로 처리
-        except ValueError:
-            rule_id_or_name = rule_identifier  # 문자열인 경우 이름으로 처리
-        
-        api = get_api_client()
-        pf_manager = PortForwardManager(api)
-        
-        success = pf_manager.update_port_forward_rule(
-            rule_id_or_name=rule_id_or_name,
-            description=data.get('description'),
-            internal_ip=data.get('internal_ip'),
-            external_port=data.get('external_port'),
-            internal_port=data.get('internal_port'),
-            protocol=data.get('protocol')
-        )
-        
-        api.logout()
+        with ctx.session(write=True) as api:
+            pf_manager = ctx.manager(api)
+            
+            try:
+                errors = pf_manager.validate_rule_update(
+                    rule_id_or_name,
+                    description=data.get('description'),
+                    internal_ip=data.get('internal_ip'),
+                    external_port=data.get('external_port'),
+                    internal_port=data.get('internal_port'),
+                    protocol=data.get('protocol'),
+                    expected_version=expected_version
+                )
+                if errors:
+                    return validation_error(errors)
+                
+                success = pf_manager.update_port_forward_rule(
+                    rule_id_or_name=rule_id_or_name,
+                    description=data.get('description'),
+                    internal_ip=data.get('internal_ip'),
+                    external_port=data.get('external_port'),
+                    internal_port=data.get('internal_port'),
+                    protocol=data.get('protocol'),
+                    expected_version=expected_version,
+                    verify=wants_verify(data),
+                    disabled=data.get('disabled')
+                )
+            except VersionConflictError as e:
+                return version_conflict(e)
         
-        if success:
+        if isinstance(success, dict):
+            return rule_response('Rule updated and verified', success)
+        elif success:
             return jsonify({'status': 'success', 'message': 'Rule updated successfully'})
         else:
             return jsonify({'status': 'error', 'message': 'Failed to update rule'}), 500
@@ -192,22 +974,25 @@ def update_port_forward_rule(rule_identifier):
 
 
 @app.route('/api/portforward/<rule_identifier>', methods=['DELETE'])
+@app.route('/api/routers/<router_id>/portforward/<rule_identifier>', methods=['DELETE'])
 @require_token
-def delete_port_forward_rule(rule_identifier):
+@with_router
+@rate_limited
+def delete_port_forward_rule(ctx, rule_identifier):
     """포트포워드 규칙 삭제 (ID 또는 이름)"""
     try:
-        # ID 또는 이름 파싱
-        try:
-            rule_id_or_name = int(rule_identifier)  # 숫자인 경우 ID로 처리
-        except ValueError:
-            rule_id_or_name = rule_identifier  # 문자열인 경우 이름으로 처리
-        
-        api = get_api_client()
-        pf_manager = PortForwardManager(api)
-        
-        success = pf_manager.delete_port_forward_rule(rule_id_or_name)
+        rule_id_or_name = parse_rule_identifier(rule_identifier)
+        expected_version = get_if_match()
         
-        api.logout()
+        with ctx.session(write=True) as api:
+            try:
+                success = ctx.manager(api).delete_port_forward_rule(
+                    rule_id_or_name,
+                    expected_version=expected_version,
+                    verify=wants_verify()
+                )
+            except VersionConflictError as e:
+                return version_conflict(e)
         
         if success:
             return jsonify({'status': 'success', 'message': 'Rule deleted successfully'})
@@ -220,8 +1005,11 @@ def delete_port_forward_rule(rule_identifier):
 
 
 @app.route('/api/portforward/batch', methods=['POST'])
+@app.route('/api/routers/<router_id>/portforward/batch', methods=['POST'])
 @require_token
-def batch_add_rules():
+@with_router
+@rate_limited
+def batch_add_rules(ctx):
     """여러 포트포워드 규칙 일괄 추가"""
     try:
         data = request.get_json()
@@ -232,24 +1020,28 @@ def batch_add_rules():
                 'message': 'Invalid request: rules array required'
             }), 400
         
-        api = get_api_client()
-        pf_manager = PortForwardManager(api)
-        
-        results = []
+        # 공유기 접속 전 필드 검증 - 하나라도 잘못되면 배치 전체 거부
+        invalid = []
         for rule in data['rules']:
-            success = pf_manager.add_port_forward_rule(
-                description=rule.get('description', ''),
-                internal_ip=rule.get('internal_ip'),
-                external_port=rule.get('external_port'),
-                internal_port=rule.get('internal_port'),
-                protocol=rule.get('protocol', 'tcp')
+            errors = resolve_target(ctx, rule) or check_rule_fields(
+                rule.get('description', ''), rule.get('internal_ip'), rule.get('external_port'),
+                rule.get('internal_port'), rule.get('protocol', 'tcp'), ctx.lan_network
             )
-            results.append({
-                'description': rule.get('description'),
-                'success': success
-            })
+            if errors:
+                invalid.append({'description': rule.get('description'), 'errors': errors})
+        if invalid:
+            return jsonify({
+                'status': 'error',
+                'message': 'Validation failed',
+                'results': invalid
+            }), 400
         
-        api.logout()
+        if wants_async(data):
+            rules = data['rules']
+            return submit_job(ctx, 'batch', len(rules), lambda pf: pf.add_port_forward_rules(rules))
+        
+        with ctx.session(write=True) as api:
+            results = list(ctx.manager(api).add_port_forward_rules(data['rules']))
         
         return jsonify({
             'status': 'success',
@@ -260,6 +1052,297 @@ def batch_add_rules():
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
 
+@app.route('/api/portforward/plan', methods=['POST'])
+@app.route('/api/routers/<router_id>/portforward/plan', methods=['POST'])
+@require_token
+@with_router
+@rate_limited
+def apply_plan(ctx):
+    """
+    변경 작업 목록(add/update/delete/enable/disable)을 순서대로 적용
+    
+    Body:
+        operations: [{'op': 'add'|'update'|'delete'|'enable'|'disable', ...}]
+        async: true이면 작업 ID를 바로 반환하고 백그라운드에서 실행
+    """
+    try:
+        data = request.get_json()
+        
+        if 'operations' not in data or not isinstance(data['operations'], list):
+            return jsonify({
+                'status': 'error',
+                'message': 'Invalid request: operations array required'
+            }), 400
+        
+        operations = data['operations']
+        if wants_async(data):
+            return submit_job(ctx, 'plan', len(operations), lambda pf: pf.apply_plan(operations))
+        
+        with ctx.session(write=True) as api:
+            results = list(ctx.manager(api).apply_plan(operations))
+        
+        return jsonify({
+            'status': 'success',
+            'results': results
+        })
+        
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
+@app.route('/api/portforward/retarget', methods=['POST'])
+@app.route('/api/routers/<router_id>/portforward/retarget', methods=['POST'])
+@require_token
+@with_router
+@rate_limited
+def retarget_rules(ctx):
+    """
+    조건에 맞는 모든 규칙의 내부 IP를 한 번에 변경 (백엔드 호스트 장애 전환)
+    
+    Body:
+        to: 새 내부 IP (필수)
+        internal_ip, name, port, protocol: 대상 규칙 조건 (하나 이상 필수, 전체 공유기 조회와 같은 형식,
+            port는 목록 또는 쉼표 구분 문자열 가능)
+        verify: 변경 결과 확인 (기본값: true)
+        dry_run: true이면 변경하지 않고 대상 규칙만 반환
+    """
+    try:
+        data = request.get_json()
+        
+        if not data.get('to'):
+            return jsonify({
+                'status': 'error',
+                'message': 'Missing required field: to'
+            }), 400
+        
+        criteria = {field: data.get(field) for field in ('port', 'internal_ip', 'protocol', 'name')}
+        if not any(value not in (None, '', []) for value in criteria.values()):
+            return jsonify({
+                'status': 'error',
+                'message': 'At least one of internal_ip, name, port, protocol is required'
+            }), 400
+        try:
+            rule_filter = RuleFilter(**criteria)
+        except (TypeError, ValueError) as e:
+            return jsonify({'status': 'error', 'message': f'Invalid filter: {e}'}), 400
+        
+        with ctx.session(write=True) as api:
+            try:
+                results = list(ctx.manager(api).retarget_rules(
+                    rule_filter,
+                    data['to'],
+                    verify=data.get('verify', True) is not False,
+                    dry_run=bool(data.get('dry_run'))
+                ))
+            except ValidationError as e:
+                return validation_error(e.errors)
+        
+        return jsonify({
+            'status': 'success',
+            'matched': len(results),
+            'failed': sum(
+                1 for result in results if not result['success'] or result.get('verified') is False
+            ) if not data.get('dry_run') else 0,
+            'results': results
+        })
+        
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
+@app.route('/api/portforward/reorder', methods=['POST'])
+@app.route('/api/routers/<router_id>/portforward/reorder', methods=['POST'])
+@require_token
+@with_router
+@rate_limited
+def reorder_rules(ctx):
+    """
+    규칙 순서 변경 (현재 순서와 비교해 최소 이동만 전송)
+    
+    Body:
+        order: 원하는 순서의 규칙 ID 또는 이름 목록 (지정한 규칙이 맨 앞, 나머지는 현재 순서대로 뒤에)
+        verify: 최종 순서 확인 (기본값: true)
+        dry_run: true이면 변경하지 않고 이동 목록만 반환
+    """
+    try:
+        data = request.get_json()
+        
+        if not isinstance(data.get('order'), list) or not data['order']:
+            return jsonify({
+                'status': 'error',
+                'message': 'Invalid request: order array required'
+            }), 400
+        
+        with ctx.session(write=True) as api:
+            try:
+                results = list(ctx.manager(api).reorder_rules(
+                    data['order'],
+                    verify=data.get('verify', True) is not False,
+                    dry_run=bool(data.get('dry_run'))
+                ))
+            except ValidationError as e:
+                return validation_error(e.errors)
+        
+        return jsonify({
+            'status': 'success',
+            'moves': len(results),
+            'failed': sum(
+                1 for result in results if not result['success'] or result.get('verified') is False
+            ) if not data.get('dry_run') else 0,
+            'results': results
+        })
+        
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
+def scheduler_disabled():
+    return jsonify({'status': 'error', 'message': 'Scheduler is not configured (IPTIME_SCHEDULE_DB)'}), 404
+
+
+@app.route('/api/schedule', methods=['POST'])
+@app.route('/api/routers/<router_id>/schedule', methods=['POST'])
+@require_token
+@with_router
+@rate_limited
+def add_schedule(ctx):
+    """
+    규칙 작업 예약
+    
+    Body:
+        at: 실행 시각 (epoch 초 또는 ISO 8601)
+        action: add/remove/enable/disable
+        rule: 대상 규칙 ID 또는 이름 (remove/enable/disable), if_match: 버전 토큰 (선택)
+        description, internal_ip, external_port, internal_port, protocol: 추가할 규칙 (add)
+        또는 actions: 위 형식의 예약 목록
+    """
+    if scheduler is None:
+        return scheduler_disabled()
+    
+    try:
+        data = request.get_json()
+        items = data['actions'] if isinstance(data.get('actions'), list) else [data]
+        
+        errors = []
+        parsed = []
+        for index, item in enumerate(items):
+            try:
+                due = parse_time(item.get('at'))
+            except ValueError:
+                due = None
+            params = {key: value for key, value in item.items() if key not in ('at', 'action')}
+            item_errors = check_action(item.get('action'), params)
+            if due is None:
+                item_errors.insert(0, "at: 실행 시각이 필요합니다 (epoch 초 또는 ISO 8601)")
+            if item.get('action') == 'add' and not item_errors:
+                # 호스트 이름/MAC 대상은 그대로 저장하고 실행 시점의 IP로 변환 (검증은 지금의 IP로)
+                fields = dict(params)
+                item_errors = resolve_target(ctx, fields) or check_rule_fields(
+                    fields['description'], fields['internal_ip'], fields['external_port'],
+                    fields.get('internal_port'), fields.get('protocol', 'tcp'), ctx.lan_network
+                )
+            errors.extend(f"[{index}] {error}" for error in item_errors)
+            parsed.append((due, item.get('action'), params))
+        if errors:
+            return validation_error(errors)
+        
+        entries = [scheduler.schedule(ctx.router_id, due, action, params) for due, action, params in parsed]
+        return jsonify({'status': 'success', 'data': entries}), 201
+        
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
+@app.route('/api/schedule', methods=['GET'])
+@app.route('/api/routers/<router_id>/schedule', methods=['GET'])
+@require_token
+def list_schedule(router_id=None):
+    """예약 목록 (?status=pending|running|succeeded|failed|canceled|missed, ?limit=)"""
+    if scheduler is None:
+        return scheduler_disabled()
+    
+    return jsonify({
+        'status': 'success',
+        'data': scheduler.list(
+            router=router_id or request.args.get('router'),
+            status=request.args.get('status'),
+            limit=request.args.get('limit', 100, type=int)
+        )
+    })
+
+
+@app.route('/api/schedule/<entry_id>', methods=['GET'])
+@require_token
+def get_schedule(entry_id):
+    """예약 상태와 실행 결과 (lag: 예약 시각부터 실행 시작까지(초), 묶음 실행으로 일찍 시작했으면 음수)"""
+    if scheduler is None:
+        return scheduler_disabled()
+    
+    entry = scheduler.get(entry_id)
+    if entry is None:
+        return jsonify({'status': 'error', 'message': 'Schedule entry not found'}), 404
+    return jsonify({'status': 'success', 'data': entry})
+
+
+@app.route('/api/schedule/<entry_id>', methods=['DELETE'])
+@require_token
+def cancel_schedule(entry_id):
+    """실행 전 예약 취소"""
+    if scheduler is None:
+        return scheduler_disabled()
+    
+    if scheduler.cancel(entry_id):
+        return jsonify({'status': 'success', 'data': scheduler.get(entry_id)})
+    if scheduler.get(entry_id) is None:
+        return jsonify({'status': 'error', 'message': 'Schedule entry not found'}), 404
+    return jsonify({'status': 'error', 'message': 'Schedule entry already started or finished'}), 409
+
+
+@app.route('/api/jobs', methods=['GET'])
+@require_token
+def list_jobs():
+    """작업 목록 (결과 제외, ?router=로 공유기 지정)"""
+    jobs = job_manager.list(request.args.get('router'))
+    return jsonify({'status': 'success', 'data': [job.to_dict(include_results=False) for job in jobs]})
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+@require_token
+def get_job(job_id):
+    """작업 상태와 항목별 결과"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Job not found'}), 404
+    return jsonify({'status': 'success', 'job': job.to_dict()})
+
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+@require_token
+def stream_job(job_id):
+    """
+    작업 진행 상황 스트리밍 (NDJSON)
+    
+    항목별 결과를 끝나는 대로 {"result": ...} 한 줄씩 보내고, 마지막 줄에 {"job": 상태}를 보냅니다.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Job not found'}), 404
+    
+    def generate():
+        sent = 0
+        while True:
+            results, finished = job.wait(sent, timeout=15)
+            yield from encoding.iter_ndjson({'result': result} for result in results)
+            sent += len(results)
+            if finished:
+                break
+            if not results:
+                yield b'\n'  # 연결 유지
+        yield encoding.dumps({'job': job.to_dict(include_results=False)}) + b'\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({'status': 'error', 'message': 'Endpoint not found'}), 404
@@ -270,13 +1353,28 @@ def internal_error(error):
     return jsonify({'status': 'error', 'message': 'Internal server error'}), 500
 
 
+# WSGI 서버가 불러온 경우 여기서 시작
+# 직접 실행하면 디버그 리로더의 감시 프로세스를 피하도록 __main__에서 시작
+if __name__ != '__main__':
+    start_background_tasks()
+
+
 if __name__ == '__main__':
     # 개발 서버 실행
     port = int(os.environ.get('PORT', 6000))
     debug = os.environ.get('DEBUG', 'False').lower() == 'true'
     
     print(f"Starting ipTIME API Server on port {port}")
-    print(f"Router IP: {ROUTER_IP}")
+    for ctx in registry.contexts():
+        print(f"Router [{ctx.router_id}]: {ctx.host}")
     print(f"API Token Required: {'Yes' if API_TOKEN else 'No'}")
     
+    # 디버그 리로더는 감시 프로세스에서도 이 블록을 실행하므로 실제 서버 프로세스에서만 소켓 생성/백그라운드 작업 시작
+    serving = not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'
+    if UNIX_SOCKET and serving:
+        serve_unix_socket(UNIX_SOCKET)
+        print(f"Local socket: {UNIX_SOCKET} (mode {UNIX_SOCKET_MODE:o})")
+    if serving:
+        start_background_tasks()
+    
     app.run(host='0.0.0.0', port=port, debug=debug)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+응답 파서 벤치마크
+기존 인라인 re.search 방식과 src.parser 모듈의 파싱 시간을 비교합니다.
+
+사용법:
+    python benchmarks/bench_parser.py --pages ./captured -n 2000
+
+--pages 디렉토리에는 공유기에서 저장한 페이지를 다음 이름 규칙으로 넣습니다.
+    *login_session*.html, *expertinfo*.html, *portforward*.html
+디렉토리를 지정하지 않으면 실제 페이지 구조를 본뜬 내장 샘플을 사용합니다.
+"""
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src import parser  # noqa: E402
+
+PAGE_KINDS = ('login_session', 'expertinfo', 'portforward')
+
+
+def _sample_pages(rule_count: int = 32):
+    padding = '<script src="/js/common.js"></script>\n' * 200
+    session = padding + 'var captcha_on = "0";\nvar default_login = "1";\nvar session_id = "a1b2c3d4";\n'
+    expert = padding + ''.join(
+        f'<tr><td class="item_text">항목 {i}</td><td class="item_input">값 {i}</td></tr>\n' for i in range(60)
+    ) + (
+        '<tr><td class="item_text">모델명</td><td class="item_input">A3004NS-dual</td></tr>\n'
+        '<tr><td class="item_text">펌웨어 버전</td><td class="item_input">14.08.2</td></tr>\n'
+    )
+    rows = ''.join(
+        f"<tr onclick=\"onClickedPFRule('user','rule{i}','0','192.168.0.{i % 250 + 2}','tcp',"
+        f"'{20000 + i}','{20000 + i}','{8000 + i}','{8000 + i}','','','','',false,'{i + 1}','1', false)\">"
+        f"<td>rule{i}</td></tr>\n"
+        for i in range(rule_count)
+    )
+    portforward = padding + '<table>\n' + rows + '</table>\n'
+    return {'login_session': session, 'expertinfo': expert, 'portforward': portforward}
+
+
+def _load_pages(directory: str):
+    pages = {}
+    for kind in PAGE_KINDS:
+        files = sorted(glob.glob(os.path.join(directory, f'*{kind}*.htm*')))
+        if files:
+            with open(files[0], encoding='utf-8', errors='replace') as fp:
+                pages[kind] = fp.read()
+    return pages
+
+
+# 기존 구현 (비교 기준)
+def _legacy_session(content):
+    info = {}
+    m = re.search(r'captcha_on\s*=\s*"(\d+)"', content)
+    if m:
+        info['captcha_on'] = m.group(1)
+    m = re.search(r'default_login\s*=\s*"([^"]+)"', content)
+    if m:
+        info['default_login'] = m.group(1)
+    m = re.search(r'session_id\s*=\s*"([^"]+)"', content)
+    if m:
+        info['session_id'] = m.group(1)
+    return info
+
+
+def _legacy_system(content):
+    info = {}
+    m = re.search(r'펌웨어 버전.*?<td[^>]*>([^<]+)</td>', content, re.DOTALL)
+    if m:
+        info['firmware_version'] = m.group(1).strip()
+    m = re.search(r'모델명.*?<td[^>]*>([^<]+)</td>', content, re.DOTALL)
+    if m:
+        info['model'] = m.group(1).strip()
+    return info
+
+
+def _legacy_portforward(content):
+    pattern = re.compile(
+        r"onClickedPFRule\('user','([^']*?)','[^']*?','([^']*?)','([^']*?)','([^']*?)','([^']*?)','([^']*?)','([^']*?)'",
+        re.DOTALL
+    )
+    rules = []
+    for i, match in enumerate(pattern.findall(content)):
+        name, internal_ip, protocol, ext_sport, ext_eport, int_sport, int_eport = match
+        if internal_ip and ext_sport:
+            rules.append({
+                'id': i + 1,
+                'description': name,
+                'internal_ip': internal_ip,
+                'protocol': protocol,
+                'external_port': ext_sport,
+                'internal_port': int_sport
+            })
+    return rules
+
+
+# 기존 portforward 파서는 disabled, 버전 토큰을 만들지 않으므로 같은 일을 하는 비교가 아님
+CASES = {
+    'login_session': (_legacy_session, parser.parse_session_info),
+    'expertinfo': (_legacy_system, parser.parse_system_info),
+    'portforward': (_legacy_portforward, lambda page: list(parser.iter_port_forward_rules(page))),
+}
+
+
+def _bench(func, page, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(page)
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='ipTIME 응답 파서 벤치마크')
+    arg_parser.add_argument('--pages', help='저장한 공유기 페이지 디렉토리')
+    arg_parser.add_argument('-n', '--iterations', type=int, default=2000, help='반복 횟수')
+    args = arg_parser.parse_args()
+
+    pages = _sample_pages()
+    if args.pages:
+        pages.update(_load_pages(args.pages))
+
+    print(f"{'page':<15}{'size':>10}{'legacy(us)':>14}{'parser(us)':>14}{'speedup':>10}")
+    for kind, (legacy, current) in CASES.items():
+        page = pages[kind]
+        legacy_time = _bench(legacy, page, args.iterations)
+        current_time = _bench(current, page, args.iterations)
+        print(f"{kind:<15}{len(page):>10}{legacy_time * 1e6:>14.1f}{current_time * 1e6:>14.1f}"
+              f"{legacy_time / current_time:>9.2f}x")
+
+    print()
+    for name, stats in parser.get_parse_stats().items():
+        print(f"{name:<20} calls={stats['calls']:<8} avg={stats['avg_seconds'] * 1e6:.1f}us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+기록된 공유기 응답 재생 벤치마크
+--record로 기록한 아카이브를 재생하며 로그인 -> 규칙 목록 조회 -> 로그아웃 전체 경로를 반복 측정합니다.
+지연 없이 재생하면 클라이언트 쪽 처리 시간(요청 구성, 파싱)만, original이면 기록 당시 응답 시간까지 포함됩니다.
+
+사용법:
+    python iptime_cli.py --host 192.168.0.1 --password ... --record router.jsonl.gz list
+    python benchmarks/bench_replay.py router.jsonl.gz -n 200
+    python benchmarks/bench_replay.py router.jsonl.gz -n 5 --latency original
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src import profiling  # noqa: E402
+from src.iptime_api import IptimeAPI  # noqa: E402
+from src.port_forward import PortForwardManager  # noqa: E402
+from src.replay import Replayer, parse_latency  # noqa: E402
+
+
+def _run_once(replayer):
+    replayer.reset()
+    api = IptimeAPI('192.168.0.1', 'admin', '')
+    if not api.login():
+        raise SystemExit("재생 중 로그인 실패 (아카이브에 로그인 응답이 있는지 확인)")
+    rules = PortForwardManager(api).get_port_forward_rules()
+    api.logout()
+    return len(rules)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='기록된 공유기 응답 재생 벤치마크')
+    arg_parser.add_argument('archive', help='--record로 기록한 아카이브 파일')
+    arg_parser.add_argument('-n', '--iterations', type=int, default=100, help='반복 횟수')
+    arg_parser.add_argument('--latency', default='0', help='응답 지연: original 또는 초 (기본값: 0)')
+    args = arg_parser.parse_args()
+
+    replayer = Replayer(args.archive, parse_latency(args.latency))
+    IptimeAPI.transport = replayer.adapter
+
+    rule_count = _run_once(replayer)  # 워밍업
+    samples = []
+    phases = {}
+    for _ in range(args.iterations):
+        profiler = profiling.Profiler(cprofile=False)
+        start = time.perf_counter()
+        with profiler:
+            _run_once(replayer)
+        samples.append(time.perf_counter() - start)
+        for name, seconds in profiler.breakdown().items():
+            phases[name] = phases.get(name, 0.0) + seconds
+
+    print(f"rules={rule_count}  iterations={args.iterations}  latency={args.latency}  misses={replayer.misses}")
+    print(f"{'median(ms)':>12}{'p95(ms)':>12}{'min(ms)':>12}")
+    samples.sort()
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(f"{statistics.median(samples) * 1e3:>12.2f}{p95 * 1e3:>12.2f}{samples[0] * 1e3:>12.2f}")
+    print()
+    for name, seconds in phases.items():
+        print(f"{name:<12}{seconds / args.iterations * 1e3:>10.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
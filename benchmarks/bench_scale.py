@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+대규모 규칙 테이블 벤치마크
+합성 페이지/규칙 테이블로 파싱 시간, 규칙당 메모리, 조회 시간, 스냅샷 차이 계산 시간, 전체 공유기 필터 시간을 측정합니다.
+결과를 릴리스별로 저장해 두고 비교하면 알고리즘 수준의 성능 퇴행(예: O(n) -> O(n^2))을 잡을 수 있습니다.
+
+사용법:
+    python benchmarks/bench_scale.py                                # 1k, 10k, 100k 규칙
+    python benchmarks/bench_scale.py --save                         # benchmarks/results/<git describe>.json 저장
+    python benchmarks/bench_scale.py --compare benchmarks/results/v1.0.0.json
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+sys.path.insert(0, BENCH_DIR)
+
+import synthetic  # noqa: E402
+from src.fleet import RuleFilter  # noqa: E402
+from src.history import diff_rules, table_hash  # noqa: E402
+from src.parser import iter_port_forward_rules  # noqa: E402
+from src.port_forward import PortForwardManager  # noqa: E402
+from src.validation import RuleValidator  # noqa: E402
+
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+# 비교 시 퇴행으로 보는 증가율 (기본 50%)
+DEFAULT_THRESHOLD = 0.5
+
+
+def _timeit(func, repeat=3):
+    """가장 빠른 실행 시간(초)과 결과"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def bench_table(rule_count, lookups=1000, seed=0):
+    """규칙 rule_count개 테이블 측정"""
+    page = synthetic.make_page(rule_count, seed)
+    rng = random.Random(seed)
+    result = {'rules': rule_count, 'page_bytes': len(page)}
+
+    seconds, rules = _timeit(lambda: list(iter_port_forward_rules(page)))
+    result['parse_us_per_rule'] = seconds / rule_count * 1e6
+
+    tracemalloc.start()
+    parsed = list(iter_port_forward_rules(page))
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result['bytes_per_rule'] = current / len(parsed)
+    del parsed
+
+    seconds, validator = _timeit(lambda: RuleValidator(rules))
+    result['index_build_ms'] = seconds * 1e3
+
+    ports = [rng.randint(1, 65535) for _ in range(lookups)]
+    seconds, _ = _timeit(lambda: [validator.conflicts(port, 'tcp') for port in ports])
+    result['port_lookup_us'] = seconds / lookups * 1e6
+
+    names = [f'rule{rng.randrange(rule_count)}' for _ in range(min(lookups, 100))]
+    seconds, _ = _timeit(lambda: [PortForwardManager._find_rule(rules, name) for name in names])
+    result['name_lookup_us'] = seconds / len(names) * 1e6
+
+    changed = synthetic.mutate_rules(rules, 0.01, seed + 1)
+    seconds, _ = _timeit(lambda: diff_rules(rules, changed))
+    result['diff_ms'] = seconds * 1e3
+
+    seconds, _ = _timeit(lambda: table_hash(rules))
+    result['table_hash_ms'] = seconds * 1e3
+    return result
+
+
+def bench_fleet(router_count, rules_per_router, seed=0):
+    """가상 공유기 router_count개에 전체 공유기 필터 적용"""
+    fleet = synthetic.make_fleet(router_count, rules_per_router, seed)
+    total = router_count * rules_per_router
+    filters = {
+        'port': RuleFilter(port=22),
+        'network': RuleFilter(internal_ip='10.0.0.0/24'),
+        'name': RuleFilter(name='rule1*'),
+    }
+    result = {'routers': router_count, 'rules': total}
+    for name, rule_filter in filters.items():
+        seconds, _ = _timeit(
+            lambda: [rule for rules in fleet.values() for rule in rules if rule_filter(rule)]
+        )
+        result[f'filter_{name}_us_per_rule'] = seconds / total * 1e6
+    return result
+
+
+def _label():
+    try:
+        return subprocess.check_output(
+            ['git', 'describe', '--tags', '--always', '--dirty'], cwd=BENCH_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'dev'
+
+
+def compare(current, baseline, threshold):
+    """
+    기준 결과와 비교
+
+    Returns:
+        퇴행 목록 [(항목, 기준값, 현재값)]
+    """
+    regressions = []
+    sections = [('tables', 'rules'), ('fleet', 'routers')]
+    for section, key in sections:
+        base_by_size = {entry[key]: entry for entry in baseline.get(section, [])}
+        for entry in current.get(section, []):
+            base = base_by_size.get(entry[key])
+            if base is None:
+                continue
+            for metric, value in entry.items():
+                if metric in (key, 'rules', 'page_bytes') or metric not in base:
+                    continue
+                if base[metric] > 0 and value > base[metric] * (1 + threshold):
+                    regressions.append((f"{section}[{entry[key]}].{metric}", base[metric], value))
+    return regressions
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='대규모 규칙 테이블 벤치마크')
+    arg_parser.add_argument('--sizes', default='1000,10000,100000', help='규칙 수 목록 (쉼표 구분)')
+    arg_parser.add_argument('--routers', type=int, default=500, help='가상 공유기 수')
+    arg_parser.add_argument('--rules-per-router', type=int, default=200, help='가상 공유기당 규칙 수')
+    arg_parser.add_argument('--save', nargs='?', const='', metavar='FILE',
+                            help='결과 저장 (기본값: benchmarks/results/<git describe>.json)')
+    arg_parser.add_argument('--compare', metavar='FILE', help='기준 결과 파일과 비교 (퇴행 시 종료 코드 1)')
+    arg_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='퇴행 판정 증가율')
+    args = arg_parser.parse_args()
+
+    label = _label()
+    results = {
+        'label': label,
+        'python': sys.version.split()[0],
+        'tables': [bench_table(int(size)) for size in args.sizes.split(',')],
+        'fleet': [bench_fleet(args.routers, args.rules_per_router)],
+    }
+
+    print(f"label={label}  python={results['python']}")
+    columns = ['rules', 'parse_us_per_rule', 'bytes_per_rule', 'index_build_ms', 'port_lookup_us',
+               'name_lookup_us', 'diff_ms', 'table_hash_ms']
+    print(''.join(f"{column:>18}" for column in columns))
+    for entry in results['tables']:
+        print(''.join(
+            f"{entry[column]:>18}" if column == 'rules' else f"{entry[column]:>18.2f}" for column in columns
+        ))
+    for entry in results['fleet']:
+        print()
+        print(f"fleet: {entry['routers']} routers, {entry['rules']} rules")
+        for metric, value in entry.items():
+            if metric.startswith('filter_'):
+                print(f"  {metric:<32}{value:>10.3f}")
+
+    if args.save is not None:
+        path = args.save or os.path.join(RESULTS_DIR, f"{label}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as fp:
+            json.dump(results, fp, indent=2)
+        print(f"\n저장: {path}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as fp:
+            baseline = json.load(fp)
+        regressions = compare(results, baseline, args.threshold)
+        print(f"\n기준: {baseline.get('label')} ({args.compare})")
+        if regressions:
+            for metric, before, after in regressions:
+                print(f"  퇴행 {metric}: {before:.2f} -> {after:.2f} ({after / before:.1f}x)")
+            return 1
+        print("  퇴행 없음")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+응답 직렬화/압축 벤치마크
+규칙 1,000개당 JSON 직렬화(표준 json, orjson), NDJSON, 압축(gzip, br) 비용과 크기를 비교합니다.
+
+사용법:
+    python benchmarks/bench_serialization.py --rules 5000 -n 200
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src import encoding  # noqa: E402
+from src.parser import rule_version  # noqa: E402
+
+
+def _sample_rules(count: int):
+    rules = []
+    for i in range(count):
+        rule = {
+            'id': i + 1,
+            'description': f'규칙{i}',
+            'internal_ip': f'192.168.0.{i % 250 + 2}',
+            'protocol': ('tcp', 'udp', 'both')[i % 3],
+            'external_port': str(20000 + i),
+            'internal_port': str(8000 + i),
+        }
+        rule['version'] = rule_version(rule)
+        rules.append(rule)
+    return rules
+
+
+def _bench(func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        result = func()
+    return (time.perf_counter() - start) / iterations, result
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='API 응답 직렬화/압축 벤치마크')
+    arg_parser.add_argument('--rules', type=int, default=1000, help='규칙 수')
+    arg_parser.add_argument('-n', '--iterations', type=int, default=200, help='반복 횟수')
+    arg_parser.add_argument('--level', type=int, default=6, help='압축 레벨')
+    args = arg_parser.parse_args()
+
+    rules = _sample_rules(args.rules)
+    payload = {'status': 'success', 'data': rules, 'count': len(rules)}
+    per_1k = 1000 / args.rules
+
+    cases = [
+        # Flask 기본 jsonify와 같은 설정 (ensure_ascii, sort_keys)
+        ('json (flask default)', lambda: json.dumps(payload, sort_keys=True).encode('utf-8')),
+        ('json (utf-8)', lambda: json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')),
+    ]
+    if encoding.orjson is not None:
+        cases.append(('orjson', lambda: encoding.orjson.dumps(payload)))
+    cases.append(('ndjson (encoding)', lambda: b''.join(encoding.iter_ndjson(rules, 256))))
+
+    print(f"rules={args.rules}  orjson={'yes' if encoding.orjson else 'no'}  "
+          f"brotli={'yes' if encoding.brotli else 'no'}")
+    print(f"{'serializer':<24}{'us/1k rules':>14}{'bytes':>12}")
+    for name, func in cases:
+        seconds, result = _bench(func, args.iterations)
+        print(f"{name:<24}{seconds * 1e6 * per_1k:>14.1f}{len(result):>12}")
+
+    body = encoding.dumps(payload)
+    print()
+    print(f"{'compression':<24}{'us/1k rules':>14}{'bytes':>12}{'ratio':>8}")
+    for content_encoding in encoding.ENCODINGS:
+        seconds, result = _bench(
+            lambda: encoding.compress(body, content_encoding, args.level), max(1, args.iterations // 4)
+        )
+        print(f"{content_encoding:<24}{seconds * 1e6 * per_1k:>14.1f}{len(result):>12}"
+              f"{len(body) / len(result):>7.1f}x")
+    # 스트리밍 압축은 조각마다 flush하므로 조각 크기(batch)에 따라 비용/압축률이 달라짐
+    for batch in (1, 256):
+        seconds, result = _bench(
+            lambda: b''.join(encoding.compress_stream(encoding.iter_ndjson(rules, batch), 'gzip', args.level)),
+            max(1, args.iterations // 4)
+        )
+        name = f'gzip ndjson batch={batch}'
+        print(f"{name:<24}{seconds * 1e6 * per_1k:>14.1f}{len(result):>12}{len(body) / len(result):>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+합성 워크로드 생성기
+실제 포트포워드 페이지 구조를 본뜬 대형 페이지(onClickedPFRule 수만 개)와 가상 공유기 집합을 만듭니다.
+같은 seed면 항상 같은 결과를 만듭니다.
+"""
+import random
+from typing import Dict, List
+
+PROTOCOLS = ('tcp', 'udp', 'both')
+
+# 실제 페이지 앞뒤의 스크립트/스타일 부분 크기를 흉내 냄
+PAGE_PADDING = '<script src="/js/common.js"></script>\n' * 200
+
+
+def make_rule_row(index: int, rng: random.Random) -> str:
+    """onClickedPFRule 한 줄 (규칙 이름/포트는 index로 유일)"""
+    external_port = 1024 + index % 64000
+    internal_port = rng.randint(1, 65535)
+    protocol = PROTOCOLS[index % 3]
+    internal_ip = f"10.{index // 65536 % 256}.{index // 256 % 256}.{index % 254 + 1}"
+    return (
+        f"<tr onclick=\"onClickedPFRule('user','rule{index}','0','{internal_ip}','{protocol}',"
+        f"'{external_port}','{external_port}','{internal_port}','{internal_port}','','','','',false,"
+        f"'{index + 1}','1', false)\"><td>rule{index}</td><td>{internal_ip}</td></tr>\n"
+    )
+
+
+def make_page(rule_count: int, seed: int = 0) -> str:
+    """규칙 rule_count개가 들어 있는 포트포워드 페이지"""
+    rng = random.Random(seed)
+    rows = ''.join(make_rule_row(i, rng) for i in range(rule_count))
+    return PAGE_PADDING + '<table>\n' + rows + '</table>\n' + PAGE_PADDING
+
+
+def make_rules(rule_count: int, seed: int = 0) -> List[Dict]:
+    """파싱 결과와 같은 형태의 규칙 목록 (페이지를 만들지 않고 바로 생성)"""
+    from src.parser import rule_version
+
+    rng = random.Random(seed)
+    rules = []
+    for i in range(rule_count):
+        external_port = str(1024 + i % 64000)
+        rule = {
+            'id': i + 1,
+            'description': f'rule{i}',
+            'internal_ip': f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 254 + 1}",
+            'protocol': PROTOCOLS[i % 3],
+            'external_port': external_port,
+            'internal_port': str(rng.randint(1, 65535)),
+        }
+        rule['version'] = rule_version(rule)
+        rules.append(rule)
+    return rules
+
+
+def mutate_rules(rules: List[Dict], fraction: float = 0.01, seed: int = 0) -> List[Dict]:
+    """
+    규칙 일부를 추가/삭제/변경한 새 테이블 (스냅샷 차이 측정용)
+
+    Args:
+        fraction: 바꿀 규칙 비율 (추가, 삭제, 변경에 각각 같은 수)
+    """
+    from src.parser import rule_version
+
+    rng = random.Random(seed)
+    count = max(1, int(len(rules) * fraction))
+    result = [dict(rule) for rule in rules]
+    for index in sorted(rng.sample(range(len(result)), min(count, len(result))), reverse=True):
+        del result[index]
+    for index in rng.sample(range(len(result)), min(count, len(result))):
+        rule = result[index]
+        rule['internal_ip'] = '192.168.0.200'
+        rule['version'] = rule_version(rule)
+    for i in range(count):
+        rule = {
+            'description': f'new{seed}-{i}',
+            'internal_ip': '192.168.0.201',
+            'protocol': 'tcp',
+            'external_port': str(65535 - i % 500),
+            'internal_port': '80',
+        }
+        rule['version'] = rule_version(rule)
+        result.append(rule)
+    for i, rule in enumerate(result):
+        rule['id'] = i + 1
+    return result
+
+
+def make_fleet(router_count: int, rules_per_router: int, seed: int = 0) -> Dict[str, List[Dict]]:
+    """가상 공유기 집합 {공유기 식별자: 규칙 목록}"""
+    return {
+        f'router{i:04d}': make_rules(rules_per_router, seed + i)
+        for i in range(router_count)
+    }
@@ -2,31 +2,173 @@
 """
 ipTIME 포트포워드 관리 도구
 """
+import argparse
+import os
 import sys
 import json
 import logging
+import tempfile
+from contextlib import ExitStack
+from datetime import datetime
+from src.fleet import RuleFilter, query_fleet
+from src.history import SnapshotStore, parse_time
 from src.iptime_api import IptimeAPI
-from src.port_forward import PortForwardManager
+from src.port_forward import DEFAULT_ALLOCATE_RANGE, NoFreePortError, PortForwardManager, VersionConflictError
+from src import profiling
+from src.registry import RouterRegistry
+from src.replay import Recorder, Replayer, parse_latency
+from src.validation import ValidationError
 
 # 기본적으로 WARNING 레벨만 표시
 logging.basicConfig(level=logging.WARNING, format='%(message)s')
 
 
+def _to_json(obj, indent=2):
+    """출력용 JSON 직렬화 (--profile 사용 시 직렬화 구간으로 기록)"""
+    with profiling.phase(profiling.SERIALIZE):
+        return json.dumps(obj, indent=indent, ensure_ascii=False)
+
+
+def _export_to_file(pf_manager, path, fmt):
+    """
+    규칙을 파일로 내보내기
+    
+    같은 디렉터리의 임시 파일에 기록한 뒤 성공했을 때만 이름을 바꾸므로,
+    조회에 실패해도 기존 백업 파일이 비거나 일부만 남지 않습니다.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix='.export-', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as fp:
+            count = pf_manager.export_rules(fp, fmt)
+        # mkstemp는 0600으로 만들므로 open(path, 'w')와 같은 권한으로
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(temp_path, 0o666 & ~umask)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return count
+
+
+def _print_errors(errors):
+    """검증 오류 출력"""
+    for error in errors:
+        print(f"  - {error}")
+
+
+def _print_result(result):
+    """추가/수정 결과 출력 (--verify 사용 시 확인된 규칙 출력)"""
+    if isinstance(result, dict):
+        print(_to_json(result))
+    else:
+        print("성공" if result else "실패")
+
+
+def _port_range(value):
+    """--range 인자 파싱 (low-high 또는 포트 하나)"""
+    try:
+        low, _, high = value.partition('-')
+        low, high = int(low), int(high or low)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"포트 범위가 올바르지 않습니다: {value}")
+    if not 1 <= low <= high <= 65535:
+        raise argparse.ArgumentTypeError(f"포트 범위가 올바르지 않습니다: {value}")
+    return low, high
+
+
+def _print_version_conflict(error):
+    """버전 불일치 출력"""
+    print(f"규칙이 변경되었습니다 (버전 불일치): {error}")
+    if error.current:
+        print(_to_json(error.current))
+
+
+def _format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).isoformat(timespec='seconds')
+
+
+def _show_history(history, router, args):
+    """기록된 스냅샷으로 변경 이력/차이 출력 (공유기 접속 없음)"""
+    since = parse_time(args.since)
+    until = parse_time(args.until)
+    
+    if args.snapshots:
+        result = [
+            dict(snapshot, taken_at=_format_time(snapshot['taken_at']))
+            for snapshot in history.snapshots(router, since, until)
+        ]
+    elif args.rule:
+        result = [
+            dict(event, taken_at=_format_time(event['taken_at']))
+            for event in history.rule_history(router, args.rule, since, until)
+        ]
+    else:
+        result = history.diff(router, since, until)
+    
+    print(_to_json(result))
+    return 0
+
+
+def _query_fleet(args, history):
+    """설정 파일의 모든 공유기에서 조건에 맞는 규칙 조회 (찾는 대로 NDJSON 출력, 끝나면 스냅샷 저장소도 닫음)"""
+    with ExitStack() as stack:
+        if history is not None:
+            stack.callback(history.close)
+        registry = RouterRegistry.from_file(args.config, history)
+        stack.callback(registry.close)
+        rule_filter = RuleFilter(
+            port=args.port, internal_ip=args.internal_ip, protocol=args.protocol, name=args.name
+        )
+        try:
+            contexts = [registry.get(r) for r in args.routers.split(',')] if args.routers else registry.contexts()
+        except KeyError as e:
+            print(f"등록되지 않은 공유기입니다: {e.args[0]}")
+            return 1
+        
+        failed = 0
+        for item in query_fleet(contexts, rule_filter, args.timeout):
+            if 'rule' in item:
+                print(_to_json(item, indent=None), flush=True)
+            else:
+                # 공유기별 완료 상태는 표준 오류로 출력
+                if item['status'] != 'ok':
+                    failed += 1
+                print(_to_json(item, indent=None), file=sys.stderr)
+    return 1 if failed else 0
+
+
 def cli_interface():
     """간단한 CLI 인터페이스"""
-    import argparse
     
     parser = argparse.ArgumentParser(description='ipTIME 포트포워드 관리 도구')
-    parser.add_argument('--host', required=True, help='공유기 IP 주소')
+    parser.add_argument('--host', help='공유기 IP 주소 (fleet 명령에는 불필요)')
     parser.add_argument('--username', default='admin', help='관리자 계정')
-    parser.add_argument('--password', required=True, help='관리자 비밀번호')
+    parser.add_argument('--password', help='관리자 비밀번호 (history 명령에는 불필요)')
+    parser.add_argument('--history-db', default=os.environ.get('IPTIME_HISTORY_DB'),
+                        help='규칙 스냅샷 기록 DB (SQLite, 지정 시 조회한 규칙 테이블을 기록)')
+    parser.add_argument('--lan-network', help='내부 IP 검증에 사용할 LAN 대역 (예: 192.168.0.0/24)')
+    parser.add_argument('--no-validate', action='store_true', help='전송 전 로컬 검증 생략')
+    parser.add_argument('--verify', action='store_true', help='추가/수정/삭제 결과를 응답 페이지로 확인')
     parser.add_argument('--debug', action='store_true', help='디버그 모드 활성화')
+    parser.add_argument('--record', metavar='FILE', help='공유기 요청/응답을 아카이브 파일에 기록 (예: router.jsonl.gz)')
+    parser.add_argument('--replay', metavar='FILE', help='공유기 대신 기록된 아카이브의 응답 재생')
+    parser.add_argument('--replay-latency', default='0',
+                        help="재생 응답 지연: original(기록된 응답 시간) 또는 초 (기본값: 0)")
+    parser.add_argument('--profile', action='store_true',
+                        help='실행 프로파일링 (네트워크/파싱/직렬화 시간과 cProfile 상위 함수를 표준 오류에 출력)')
+    parser.add_argument('--profile-output', metavar='FILE',
+                        help='프로파일 저장 파일 (pstats 형식, 요약은 FILE.json, --profile 포함)')
     
     subparsers = parser.add_subparsers(dest='command', help='명령어')
     
     # list 명령어
     subparsers.add_parser('list', help='포트포워드 규칙 목록 조회')
     
+    # clients 명령어
+    subparsers.add_parser('clients', help='LAN 클라이언트 목록 조회 (규칙 대상으로 쓸 수 있는 호스트 이름/MAC)')
+    
     # get 명령어
     get_parser = subparsers.add_parser('get', help='포트포워드 규칙 단건 조회')
     get_parser.add_argument('rule', help='규칙 ID (숫자) 또는 이름 (문자열)')
@@ -34,46 +176,178 @@ def cli_interface():
     # add 명령어
     add_parser = subparsers.add_parser('add', help='포트포워드 규칙 추가')
     add_parser.add_argument('--description', required=True, help='규칙 설명')
-    add_parser.add_argument('--internal-ip', required=True, help='내부 IP 주소')
+    add_parser.add_argument('--internal-ip', required=True, help='내부 IP 주소, LAN 클라이언트 호스트 이름 또는 MAC')
     add_parser.add_argument('--external-port', type=int, required=True, help='외부 포트')
     add_parser.add_argument('--internal-port', type=int, help='내부 포트 (기본값: 외부 포트와 동일)')
     add_parser.add_argument('--protocol', choices=['tcp', 'udp', 'both'], default='tcp', help='프로토콜')
     
+    # allocate 명령어
+    allocate_parser = subparsers.add_parser('allocate', help='비어 있는 외부 포트를 할당해 규칙 추가')
+    allocate_parser.add_argument('--description', required=True, help='규칙 설명')
+    allocate_parser.add_argument('--internal-ip', required=True, help='내부 IP 주소, LAN 클라이언트 호스트 이름 또는 MAC')
+    allocate_parser.add_argument('--internal-port', type=int, help='내부 포트 (기본값: 할당된 외부 포트와 동일)')
+    allocate_parser.add_argument('--protocol', choices=['tcp', 'udp', 'both'], default='tcp', help='프로토콜')
+    allocate_parser.add_argument('--range', type=_port_range, default=DEFAULT_ALLOCATE_RANGE, dest='port_range',
+                                 help='할당할 외부 포트 범위 (예: 20000-29999, 기본값: 1024-65535)')
+    
     # update 명령어
     update_parser = subparsers.add_parser('update', help='포트포워드 규칙 수정')
     update_parser.add_argument('rule', help='규칙 ID (숫자) 또는 이름 (문자열)')
     update_parser.add_argument('--description', help='새 규칙 설명')
-    update_parser.add_argument('--internal-ip', help='새 내부 IP 주소')
+    update_parser.add_argument('--internal-ip', help='새 내부 IP 주소, LAN 클라이언트 호스트 이름 또는 MAC')
     update_parser.add_argument('--external-port', type=int, help='새 외부 포트')
     update_parser.add_argument('--internal-port', type=int, help='새 내부 포트')
     update_parser.add_argument('--protocol', choices=['tcp', 'udp', 'both'], help='새 프로토콜')
+    update_parser.add_argument('--if-match', help='규칙 버전 토큰 (현재 규칙과 다르면 수정하지 않음)')
     
     # delete 명령어
     delete_parser = subparsers.add_parser('delete', help='포트포워드 규칙 삭제')
     delete_parser.add_argument('rule', help='규칙 ID (숫자) 또는 이름 (문자열)')
+    delete_parser.add_argument('--if-match', help='규칙 버전 토큰 (현재 규칙과 다르면 삭제하지 않음)')
+    
+    # export 명령어
+    export_parser = subparsers.add_parser('export', help='포트포워드 규칙 내보내기')
+    export_parser.add_argument('--format', choices=['ndjson', 'csv'], default='ndjson', help='출력 형식')
+    export_parser.add_argument('--output', '-o', help='출력 파일 (기본값: 표준 출력)')
+    
+    # import 명령어
+    import_parser = subparsers.add_parser('import', help='포트포워드 규칙 가져오기')
+    import_parser.add_argument('--format', choices=['ndjson', 'csv'], default='ndjson', help='입력 형식')
+    import_parser.add_argument('--input', '-i', help='입력 파일 (기본값: 표준 입력)')
+    
+    # retarget 명령어 (조건에 맞는 규칙의 내부 IP 일괄 변경)
+    retarget_parser = subparsers.add_parser('retarget', help='조건에 맞는 모든 규칙의 내부 IP를 한 번에 변경')
+    retarget_parser.add_argument('--to', required=True, help='새 내부 IP, LAN 클라이언트 호스트 이름 또는 MAC')
+    retarget_parser.add_argument('--internal-ip', help='현재 내부 IP 또는 대역 (예: 192.168.0.10, 192.168.0.0/28)')
+    retarget_parser.add_argument('--name', help='규칙 이름 패턴 (와일드카드 *, ?)')
+    retarget_parser.add_argument('--port', help='외부 포트 (쉼표 구분, 예: 80,443)')
+    retarget_parser.add_argument('--protocol', choices=['tcp', 'udp'], help='프로토콜')
+    retarget_parser.add_argument('--dry-run', action='store_true', help='변경하지 않고 대상 규칙만 출력')
+    retarget_parser.add_argument('--no-verify', action='store_true', help='변경 결과 확인 생략')
+    
+    # reorder 명령어 (최소 이동으로 규칙 순서 변경)
+    reorder_parser = subparsers.add_parser('reorder', help='규칙 순서 변경 (지정한 규칙이 맨 앞, 나머지는 현재 순서대로)')
+    reorder_parser.add_argument('rules', nargs='+', help='원하는 순서의 규칙 ID (숫자) 또는 이름 (문자열)')
+    reorder_parser.add_argument('--dry-run', action='store_true', help='변경하지 않고 이동 목록만 출력')
+    reorder_parser.add_argument('--no-verify', action='store_true', help='최종 순서 확인 생략')
+    
+    # history 명령어 (공유기 접속 없이 기록된 스냅샷 조회)
+    history_parser = subparsers.add_parser('history', help='규칙 변경 이력 조회 (--history-db 필요)')
+    history_parser.add_argument('--from', dest='since', help='시작 시각 (epoch 초 또는 ISO 8601)')
+    history_parser.add_argument('--to', dest='until', help='끝 시각 (epoch 초 또는 ISO 8601, 기본값: 최신)')
+    history_parser.add_argument('--rule', help='규칙 이름 (지정 시 해당 규칙의 변경 이력)')
+    history_parser.add_argument('--snapshots', action='store_true', help='스냅샷 목록 출력')
+    
+    # fleet 명령어 (설정 파일의 모든 공유기 동시 조회)
+    fleet_parser = subparsers.add_parser('fleet', help='여러 공유기에서 조건에 맞는 규칙 조회')
+    fleet_parser.add_argument('--config', default=os.environ.get('IPTIME_ROUTERS_CONFIG'),
+                              help='공유기 설정 파일 (기본값: IPTIME_ROUTERS_CONFIG)')
+    fleet_parser.add_argument('--port', type=int, help='외부 포트')
+    fleet_parser.add_argument('--internal-ip', help='내부 IP 또는 대역 (예: 192.168.0.0/24)')
+    fleet_parser.add_argument('--protocol', choices=['tcp', 'udp'], help='프로토콜')
+    fleet_parser.add_argument('--name', help='규칙 이름 패턴 (와일드카드 *, ?)')
+    fleet_parser.add_argument('--routers', help='조회할 공유기 (쉼표 구분, 기본값: 전체)')
+    fleet_parser.add_argument('--timeout', type=float, default=10, help='공유기 응답 대기 시간(초)')
     
     args = parser.parse_args()
     
+    if args.record and args.replay:
+        parser.error("--record와 --replay는 함께 사용할 수 없습니다")
+    
+    recorder = None
+    if args.replay:
+        # 기록된 응답 재생 (공유기 접속 없음)
+        IptimeAPI.transport = Replayer(args.replay, parse_latency(args.replay_latency)).adapter
+    elif args.record:
+        recorder = Recorder(args.record)
+        IptimeAPI.transport = recorder.adapter
+    
+    try:
+        if not (args.profile or args.profile_output):
+            return _run_command(parser, args)
+        
+        profiler = profiling.Profiler()
+        with profiler:
+            code = _run_command(parser, args)
+        _write_profile(profiler, args.profile_output)
+        return code
+    finally:
+        if recorder is not None:
+            recorder.close()
+            print(f"{recorder.count}개 요청/응답 기록: {recorder.path}", file=sys.stderr)
+
+
+def _write_profile(profiler, output=None):
+    """프로파일 결과를 표준 오류에 출력 (output 지정 시 pstats 파일과 요약 JSON 저장)"""
+    report = profiler.report()
+    breakdown = report['breakdown']
+    print(
+        "[profile] " + ", ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in breakdown.items()),
+        file=sys.stderr
+    )
+    if output:
+        if profiler.dump(output):
+            report['pstats_file'] = output
+        with open(f"{output}.json", 'w', encoding='utf-8') as fp:
+            json.dump(report, fp, indent=2, ensure_ascii=False)
+        print(f"[profile] 저장: {output}, {output}.json", file=sys.stderr)
+    else:
+        for entry in report['top']:
+            print(f"[profile] {entry['cumulative_seconds'] * 1000:9.1f}ms {entry['calls']:>7} {entry['function']}",
+                  file=sys.stderr)
+
+
+def _run_command(parser, args):
+    """명령 실행"""
     # 디버그 모드 설정
     if args.debug:
         logging.getLogger().setLevel(logging.DEBUG)
         # 모든 모듈의 로거 레벨 설정
         logging.getLogger('src.iptime_api').setLevel(logging.DEBUG)
         logging.getLogger('src.port_forward').setLevel(logging.DEBUG)
+        logging.getLogger('src.fleet').setLevel(logging.DEBUG)
+    
+    history = SnapshotStore(args.history_db) if args.history_db else None
+    
+    if args.command == 'fleet':
+        if not args.config:
+            parser.error("fleet 명령에는 --config(또는 IPTIME_ROUTERS_CONFIG)가 필요합니다")
+        return _query_fleet(args, history)
+    
+    if not args.host:
+        parser.error("--host가 필요합니다")
     
     # API 초기화
     api = IptimeAPI(args.host, args.username, args.password)
     
+    if args.command == 'history':
+        if history is None:
+            parser.error("history 명령에는 --history-db가 필요합니다")
+        return _show_history(history, api.base_url, args)
+    
+    if not args.password:
+        parser.error("--password가 필요합니다")
+    
     if not api.login():
         print("로그인 실패!")
         return 1
     
-    pf_manager = PortForwardManager(api)
+    # 한 번의 실행 동안 규칙 테이블을 재사용 (검증과 추가/수정이 같은 조회 결과 사용)
+    pf_manager = PortForwardManager(api, cache_ttl=60, lan_network=args.lan_network, history=history)
+    validate = not args.no_validate
     
     # 명령어 처리
     if args.command == 'list':
         rules = pf_manager.get_port_forward_rules()
-        print(json.dumps(rules, indent=2, ensure_ascii=False))
+        print(_to_json(rules))
+        
+    elif args.command == 'clients':
+        clients = api.get_lan_clients()
+        if clients is None:
+            print("LAN 클라이언트 조회 실패")
+            api.logout()
+            return 1
+        print(_to_json(clients))
         
     elif args.command == 'get':
         # ID 또는 이름 파싱
@@ -84,19 +358,118 @@ def cli_interface():
         
         rule = pf_manager.get_port_forward_rule(rule_id_or_name)
         if rule:
-            print(json.dumps(rule, indent=2, ensure_ascii=False))
+            print(_to_json(rule))
         else:
             print(f"규칙을 찾을 수 없습니다: {args.rule}")
         
     elif args.command == 'add':
+        if validate:
+            errors = pf_manager.validate_new_rule(
+                args.description, args.internal_ip, args.external_port,
+                args.internal_port or args.external_port, args.protocol
+            )
+            if errors:
+                _print_errors(errors)
+                api.logout()
+                return 1
+        
         success = pf_manager.add_port_forward_rule(
             description=args.description,
             internal_ip=args.internal_ip,
             external_port=args.external_port,
             internal_port=args.internal_port or args.external_port,
-            protocol=args.protocol
+            protocol=args.protocol,
+            validate=validate,
+            verify=args.verify
         )
-        print("성공" if success else "실패")
+        _print_result(success)
+        
+    elif args.command == 'allocate':
+        try:
+            rule = pf_manager.allocate_port_forward_rule(
+                description=args.description,
+                internal_ip=args.internal_ip,
+                internal_port=args.internal_port,
+                protocol=args.protocol,
+                port_range=args.port_range,
+                verify=args.verify
+            )
+        except ValidationError as e:
+            _print_errors(e.errors)
+            api.logout()
+            return 1
+        except NoFreePortError as e:
+            print(e)
+            api.logout()
+            return 1
+        _print_result(rule)
+        
+    elif args.command == 'retarget':
+        if not any((args.internal_ip, args.name, args.port, args.protocol)):
+            print("대상 조건(--internal-ip, --name, --port, --protocol)을 하나 이상 지정해야 합니다")
+            api.logout()
+            return 1
+        rule_filter = RuleFilter(
+            port=args.port, internal_ip=args.internal_ip, protocol=args.protocol, name=args.name
+        )
+        failed = 0
+        try:
+            results = list(pf_manager.retarget_rules(
+                rule_filter, args.to, verify=not args.no_verify, dry_run=args.dry_run
+            ))
+        except ValidationError as e:
+            _print_errors(e.errors)
+            api.logout()
+            return 1
+        for result in results:
+            if args.dry_run:
+                status = "대상"
+            elif not result['success']:
+                status = "실패"
+            elif result.get('verified') is False:
+                status = "확인 실패"
+            else:
+                status = "완료"
+            if status in ("실패", "확인 실패"):
+                failed += 1
+            print(f"{status}: {result['rule']} (ID {result['id']}) {result['from']} -> {result['to']}")
+        print(f"전환 {'대상' if args.dry_run else '완료'}: {len(results)}개, 실패 {failed}")
+        if failed:
+            api.logout()
+            return 1
+        
+    elif args.command == 'reorder':
+        order = []
+        for rule in args.rules:
+            try:
+                order.append(int(rule))  # 숫자인 경우 ID로 처리
+            except ValueError:
+                order.append(rule)  # 문자열인 경우 이름으로 처리
+        try:
+            results = list(pf_manager.reorder_rules(order, verify=not args.no_verify, dry_run=args.dry_run))
+        except ValidationError as e:
+            _print_errors(e.errors)
+            api.logout()
+            return 1
+        failed = 0
+        for result in results:
+            if args.dry_run:
+                status = "이동 예정"
+            elif result.get('skipped'):
+                status = "건너뜀"
+            elif not result['success']:
+                status = "실패"
+            else:
+                status = "이동"
+            if not args.dry_run and (not result['success'] or result.get('verified') is False):
+                failed += 1
+            print(f"{status}: {result['rule']} {result['from']} -> {result['to']}")
+        if results and results[-1].get('verified') is False:
+            print("최종 순서 확인 실패")
+        print(f"이동 {len(results)}개, 실패 {failed}")
+        if failed:
+            api.logout()
+            return 1
         
     elif args.command == 'update':
         # ID 또는 이름 파싱
@@ -105,15 +478,38 @@ def cli_interface():
         except ValueError:
             rule_id_or_name = args.rule  # 문자열인 경우 이름으로 처리
         
-        success = pf_manager.update_port_forward_rule(
-            rule_id_or_name=rule_id_or_name,
-            description=args.description,
-            internal_ip=args.internal_ip,
-            external_port=args.external_port,
-            internal_port=args.internal_port,
-            protocol=args.protocol
-        )
-        print("성공" if success else "실패")
+        try:
+            if validate:
+                errors = pf_manager.validate_rule_update(
+                    rule_id_or_name,
+                    description=args.description,
+                    internal_ip=args.internal_ip,
+                    external_port=args.external_port,
+                    internal_port=args.internal_port,
+                    protocol=args.protocol,
+                    expected_version=args.if_match
+                )
+                if errors:
+                    _print_errors(errors)
+                    api.logout()
+                    return 1
+            
+            success = pf_manager.update_port_forward_rule(
+                rule_id_or_name=rule_id_or_name,
+                description=args.description,
+                internal_ip=args.internal_ip,
+                external_port=args.external_port,
+                internal_port=args.internal_port,
+                protocol=args.protocol,
+                validate=validate,
+                expected_version=args.if_match,
+                verify=args.verify
+            )
+        except VersionConflictError as e:
+            _print_version_conflict(e)
+            api.logout()
+            return 1
+        _print_result(success)
         
     elif args.command == 'delete':
         # ID 또는 이름 파싱
@@ -122,8 +518,45 @@ def cli_interface():
         except ValueError:
             rule_id_or_name = args.rule  # 문자열인 경우 이름으로 처리
             
-        success = pf_manager.delete_port_forward_rule(rule_id_or_name)
+        try:
+            success = pf_manager.delete_port_forward_rule(
+                rule_id_or_name,
+                expected_version=args.if_match,
+                verify=args.verify
+            )
+        except VersionConflictError as e:
+            _print_version_conflict(e)
+            api.logout()
+            return 1
         print("성공" if success else "실패")
+        
+    elif args.command == 'export':
+        try:
+            if args.output:
+                count = _export_to_file(pf_manager, args.output, args.format)
+                print(f"{count}개 규칙 내보내기 완료: {args.output}")
+            else:
+                pf_manager.export_rules(sys.stdout, args.format)
+        except Exception as e:
+            print(f"내보내기 실패: {e}", file=sys.stderr)
+            api.logout()
+            return 1
+        
+    elif args.command == 'import':
+        fp = open(args.input, encoding='utf-8', newline='') if args.input else sys.stdin
+        succeeded = failed = 0
+        try:
+            for result in pf_manager.import_rules(fp, args.format, validate=validate):
+                if result['success']:
+                    succeeded += 1
+                else:
+                    failed += 1
+                    print(f"실패: {result['description']}")
+                    _print_errors(result.get('errors', []))
+        finally:
+            if args.input:
+                fp.close()
+        print(f"가져오기 완료: 성공 {succeeded}, 실패 {failed}")
     
     api.logout()
     return 0
@@ -0,0 +1,107 @@
+"""
+LAN 클라이언트 색인 모듈
+공유기의 연결된 단말/DHCP 페이지에서 읽은 (MAC, 호스트 이름, IP)를 메모리에 두고
+규칙 대상(internal_ip)에 준 호스트 이름이나 MAC을 공유기 요청 없이 IP로 바꿉니다.
+"""
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+# 점으로 구분된 숫자는 IP로 보고 그대로 둠 (형식 오류는 규칙 검증에서 보고)
+ADDRESS_RE = re.compile(r'^[\d.]+$')
+MAC_RE = re.compile(r'^[0-9a-fA-F]{2}([:-]?)(?:[0-9a-fA-F]{2}\1){4}[0-9a-fA-F]{2}$')
+
+
+def is_address(target: str) -> bool:
+    """IP 주소 형식의 대상인지 확인 (호스트 이름/MAC이 아님)"""
+    return bool(ADDRESS_RE.match(target))
+
+
+def normalize_mac(value: str) -> Optional[str]:
+    """MAC 주소를 소문자 콜론 구분 형식으로 (MAC이 아니면 None)"""
+    if not MAC_RE.match(value):
+        return None
+    digits = re.sub(r'[:-]', '', value).lower()
+    return ':'.join(digits[i:i + 2] for i in range(0, 12, 2))
+
+
+def client_error(target: str, field: str = 'internal_ip') -> str:
+    """대상을 찾지 못했을 때의 검증 오류 메시지"""
+    return f"{field}: LAN 클라이언트를 찾을 수 없거나 같은 이름이 여러 개입니다 ({target})"
+
+
+class ClientIndex:
+    """
+    LAN 클라이언트 색인
+
+    같은 공유기의 여러 IptimeAPI 세션이 하나의 색인을 공유할 수 있습니다.
+    """
+
+    def __init__(self, ttl: float = 600, miss_refresh: float = 10):
+        """
+        초기화
+
+        Args:
+            ttl: 색인 유효 시간(초). 지나면 다음 조회 시 새로 읽음
+            miss_refresh: 색인에 없는 대상을 찾을 때 이 시간(초)보다 오래된 색인이면 한 번 새로 읽음
+        """
+        self.ttl = ttl
+        self.miss_refresh = miss_refresh
+        self._clients: List[Dict] = []
+        self._by_mac: Dict[str, str] = {}
+        self._by_host: Dict[str, Optional[str]] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def set(self, clients: Iterable[Dict]):
+        """색인 교체 (clients: {'mac', 'hostname', 'ip'})"""
+        clients = list(clients)
+        by_mac = {}
+        by_host: Dict[str, Optional[str]] = {}
+        for client in clients:
+            by_mac[client['mac']] = client['ip']
+            hostname = (client.get('hostname') or '').lower()
+            if hostname:
+                # 같은 이름의 단말이 여럿이면 어느 쪽인지 알 수 없으므로 이름으로는 찾지 않음
+                by_host[hostname] = client['ip'] if by_host.get(hostname, client['ip']) == client['ip'] else None
+        with self._lock:
+            self._clients = clients
+            self._by_mac = by_mac
+            self._by_host = by_host
+            self._loaded_at = time.monotonic()
+
+    def resolve(self, target: str) -> Optional[str]:
+        """
+        대상(IP, MAC, 호스트 이름)의 IP
+
+        Returns:
+            IP 주소, 색인에 없거나 이름이 여러 단말에 겹치면 None
+        """
+        if is_address(target):
+            return target
+        mac = normalize_mac(target)
+        with self._lock:
+            if mac:
+                return self._by_mac.get(mac)
+            return self._by_host.get(target.lower())
+
+    def needs_refresh(self, target: Optional[str] = None) -> bool:
+        """새로 읽어야 하는지 (색인이 없거나 오래됨, 또는 target이 없고 miss_refresh가 지남)"""
+        age = self.age()
+        if age is None or age >= self.ttl:
+            return True
+        if target is None or self.resolve(target) is not None:
+            return False
+        return age >= self.miss_refresh
+
+    def age(self) -> Optional[float]:
+        """마지막으로 읽은 후 경과 시간(초), 읽은 적이 없으면 None"""
+        with self._lock:
+            if self._loaded_at is None:
+                return None
+            return time.monotonic() - self._loaded_at
+
+    def entries(self) -> List[Dict]:
+        with self._lock:
+            return list(self._clients)
@@ -0,0 +1,120 @@
+"""
+응답 직렬화/압축 모듈
+orjson이 설치되어 있으면 빠른 JSON 인코더를, brotli가 설치되어 있으면 br 압축을 사용합니다 (둘 다 선택사항).
+"""
+import gzip
+import json
+import zlib
+from typing import Callable, Iterable, Iterator, Optional
+
+try:
+    import orjson
+except ImportError:  # 선택 의존성
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # 선택 의존성
+    brotli = None
+
+# 지원하는 압축 방식 (선호 순)
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def dumps(obj, sort_keys: bool = False, indent: bool = False, default: Optional[Callable] = None) -> bytes:
+    """
+    JSON 직렬화 (UTF-8 바이트, 한글 이스케이프 없음)
+
+    Args:
+        sort_keys: 키 정렬
+        indent: 2칸 들여쓰기 (json.dumps(indent=2)와 같은 형식, 아니면 공백 없는 압축 형식)
+        default: 직렬화할 수 없는 객체를 변환하는 함수
+    """
+    if orjson is not None:
+        option = (orjson.OPT_SORT_KEYS if sort_keys else 0) | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, default=default, option=option)
+    return json.dumps(
+        obj, ensure_ascii=False, sort_keys=sort_keys, default=default,
+        indent=2 if indent else None, separators=(',', ': ') if indent else (',', ':')
+    ).encode('utf-8')
+
+
+def loads(data: bytes):
+    """JSON 역직렬화 (orjson이 있으면 orjson 사용)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def iter_ndjson(items: Iterable, batch: int = 1) -> Iterator[bytes]:
+    """
+    항목마다 JSON 한 줄 (NDJSON)
+
+    Args:
+        batch: 한 조각에 담는 줄 수 (이미 메모리에 있는 목록은 크게 잡아 조각/압축 flush 수를 줄임)
+    """
+    lines = []
+    for item in items:
+        lines.append(dumps(item) + b'\n')
+        if len(lines) >= batch:
+            yield b''.join(lines)
+            lines = []
+    if lines:
+        yield b''.join(lines)
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Accept-Encoding 헤더에서 사용할 압축 방식 선택
+
+    Returns:
+        'br', 'gzip' 또는 None (q=0으로 거부한 방식은 제외)
+    """
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in ENCODINGS:
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str, level: int = 6) -> bytes:
+    """응답 본문 압축"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=min(level, 11))
+    return gzip.compress(body, compresslevel=level)
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: str, level: int = 6) -> Iterator[bytes]:
+    """
+    스트리밍 응답 압축
+
+    조각마다 flush하므로 클라이언트는 압축된 상태로도 줄 단위 결과를 바로 받습니다.
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=min(level, 11))
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip 헤더
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
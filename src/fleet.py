@@ -0,0 +1,138 @@
+"""
+여러 공유기 일괄 조회 모듈
+등록된 공유기 전체에 같은 조건으로 규칙을 동시에 조회하고, 찾은 규칙을 공유기 식별자와 함께 바로바로 내보냅니다.
+"""
+import fnmatch
+import ipaddress
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, FrozenSet, Iterable, Iterator, Optional
+
+from .ratelimit import QueueFullError
+from .registry import RouterContext
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+
+class RuleFilter:
+    """
+    규칙 조건
+
+    Args:
+        port: 외부 포트 또는 포트 집합 (목록 또는 쉼표 구분 문자열, 예: 22,80,443)
+        internal_ip: 내부 IP 주소 또는 대역 (예: 192.168.0.50, 192.168.0.0/28)
+        protocol: tcp/udp (both 규칙은 양쪽 모두에 해당)
+        name: 규칙 이름 패턴 (와일드카드 *, ? 사용 가능)
+    """
+
+    def __init__(
+        self,
+        port=None,
+        internal_ip: Optional[str] = None,
+        protocol: Optional[str] = None,
+        name: Optional[str] = None
+    ):
+        self.ports = self._parse_ports(port)
+        self.network = ipaddress.ip_network(internal_ip, strict=False) if internal_ip else None
+        self.protocol = protocol or None
+        self.name = name or None
+
+    @staticmethod
+    def _parse_ports(port) -> Optional[FrozenSet[str]]:
+        if port in (None, ''):
+            return None
+        if isinstance(port, str):
+            port = [value for value in port.split(',') if value.strip()]
+        elif isinstance(port, int):
+            port = [port]
+        return frozenset(str(int(value)) for value in port)
+
+    def __call__(self, rule: Dict) -> bool:
+        if self.ports is not None and str(rule.get('external_port')) not in self.ports:
+            return False
+        if self.protocol is not None and rule.get('protocol') not in (self.protocol, 'both'):
+            return False
+        if self.name is not None and not fnmatch.fnmatchcase(rule.get('description', ''), self.name):
+            return False
+        if self.network is not None:
+            try:
+                if ipaddress.ip_address(rule.get('internal_ip')) not in self.network:
+                    return False
+            except ValueError:
+                return False
+        return True
+
+    def describe(self) -> Dict:
+        return {
+            'port': ','.join(sorted(self.ports, key=int)) if self.ports else None,
+            'internal_ip': str(self.network) if self.network else None,
+            'protocol': self.protocol,
+            'name': self.name,
+        }
+
+
+def query_fleet(
+    contexts: Iterable[RouterContext],
+    rule_filter: RuleFilter,
+    timeout: float = 10
+) -> Iterator[Dict]:
+    """
+    여러 공유기에서 조건에 맞는 규칙 조회
+
+    공유기마다 스레드 하나로 동시에 조회하며(캐시가 유효하면 공유기 접속 없음),
+    먼저 끝난 공유기의 결과부터 내보냅니다. timeout 안에 끝나지 않은 공유기는 기다리지 않고
+    'timeout' 상태로 보고합니다 (조회는 백그라운드에서 마저 끝나 캐시를 채움).
+
+    Yields:
+        {'router': 식별자, 'rule': 규칙} - 조건에 맞는 규칙
+        {'router': 식별자, 'status': 'ok'|'busy'|'error'|'timeout', 'matched': 개수, ...} - 공유기별 완료 상태
+    """
+    contexts = list(contexts)
+    if not contexts:
+        return
+
+    def fetch(ctx: RouterContext):
+        start = time.monotonic()
+        rules = ctx.get_rules(session_timeout=timeout)
+        return rules, time.monotonic() - start
+
+    deadline = time.monotonic() + timeout
+    executor = ThreadPoolExecutor(max_workers=len(contexts), thread_name_prefix='fleet')
+    try:
+        pending = {executor.submit(fetch, ctx): ctx for ctx in contexts}
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                ctx = pending.pop(future)
+                try:
+                    rules, elapsed = future.result()
+                except QueueFullError as e:
+                    yield {'router': ctx.router_id, 'status': 'busy', 'retry_after': e.retry_after}
+                    continue
+                except Exception as e:
+                    logger.error(f"[{ctx.router_id}] 규칙 조회 실패: {e}")
+                    yield {'router': ctx.router_id, 'status': 'error', 'message': str(e)}
+                    continue
+
+                matched = 0
+                for rule in rules:
+                    if rule_filter(rule):
+                        matched += 1
+                        yield {'router': ctx.router_id, 'rule': rule}
+                yield {
+                    'router': ctx.router_id,
+                    'status': 'ok',
+                    'matched': matched,
+                    'elapsed': round(elapsed, 3)
+                }
+
+        for ctx in pending.values():
+            yield {'router': ctx.router_id, 'status': 'timeout'}
+    finally:
+        # 늦은 공유기를 기다리지 않음
+        executor.shutdown(wait=False)
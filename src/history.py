@@ -0,0 +1,250 @@
+"""
+포트포워드 규칙 테이블 스냅샷 기록 모듈
+규칙 목록을 조회할 때마다 SQLite에 추가 전용으로 기록하고, 변경 이력과 시점 간 차이를 조회합니다.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Union
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rule_tables (
+    hash TEXT PRIMARY KEY,
+    rule_count INTEGER NOT NULL,
+    rules TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    router TEXT NOT NULL,
+    taken_at REAL NOT NULL,
+    hash TEXT NOT NULL REFERENCES rule_tables(hash)
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_router_time ON snapshots(router, taken_at);
+CREATE TABLE IF NOT EXISTS rule_events (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots(id),
+    router TEXT NOT NULL,
+    name TEXT NOT NULL,
+    taken_at REAL NOT NULL,
+    event TEXT NOT NULL,
+    version TEXT,
+    rule TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_rule_events_router_name_time ON rule_events(router, name, taken_at);
+"""
+
+# 스냅샷에 저장하는 규칙 필드
+SNAPSHOT_FIELDS = (
+    'id', 'description', 'internal_ip', 'protocol', 'external_port', 'internal_port', 'disabled', 'version'
+)
+
+
+def parse_time(value: Union[str, float, int, None]) -> Optional[float]:
+    """
+    시각 파라미터를 epoch 초로 변환
+
+    Args:
+        value: epoch 초 (숫자/문자열) 또는 ISO 8601 문자열 (예: 2024-05-01T12:00:00)
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def table_hash(rules: List[Dict]) -> str:
+    """규칙 테이블 내용 해시 (순서 포함)"""
+    digest = hashlib.sha1()
+    for rule in rules:
+        digest.update(json.dumps([rule.get(field) for field in SNAPSHOT_FIELDS], ensure_ascii=False).encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def diff_rules(old: List[Dict], new: List[Dict]) -> Dict[str, List]:
+    """
+    두 규칙 테이블 비교 (규칙 이름 기준)
+
+    Returns:
+        {'added': [규칙], 'removed': [규칙], 'changed': [{'before': 규칙, 'after': 규칙}]}
+    """
+    old_by_name = {rule['description']: rule for rule in old}
+    new_by_name = {rule['description']: rule for rule in new}
+
+    added = [rule for name, rule in new_by_name.items() if name not in old_by_name]
+    removed = [rule for name, rule in old_by_name.items() if name not in new_by_name]
+    changed = [
+        {'before': old_by_name[name], 'after': rule}
+        for name, rule in new_by_name.items()
+        if name in old_by_name and old_by_name[name].get('version') != rule.get('version')
+    ]
+    return {'added': added, 'removed': removed, 'changed': changed}
+
+
+class SnapshotStore:
+    """
+    규칙 테이블 스냅샷 저장소
+
+    같은 내용의 테이블은 해시로 한 번만 저장하고, 직전 스냅샷과 내용이 같으면 아무것도 기록하지 않습니다.
+    스냅샷마다 직전 테이블과의 차이를 규칙 단위 이벤트로 남겨 두므로 규칙 이력 조회는 인덱스 조회 한 번입니다.
+    """
+
+    def __init__(self, path: str = "history.db"):
+        """
+        초기화
+
+        Args:
+            path: SQLite 데이터베이스 파일 경로
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(SCHEMA)
+        self._last_hash: Dict[str, Optional[str]] = {}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _latest(self, router: str, until: Optional[float] = None) -> Optional[sqlite3.Row]:
+        query = "SELECT id, taken_at, hash FROM snapshots WHERE router = ?"
+        params = [router]
+        if until is not None:
+            query += " AND taken_at <= ?"
+            params.append(until)
+        query += " ORDER BY taken_at DESC, id DESC LIMIT 1"
+        return self._conn.execute(query, params).fetchone()
+
+    def _load_table(self, digest: str) -> List[Dict]:
+        row = self._conn.execute("SELECT rules FROM rule_tables WHERE hash = ?", (digest,)).fetchone()
+        return json.loads(row['rules']) if row else []
+
+    def record(self, router: str, rules: List[Dict], taken_at: Optional[float] = None) -> bool:
+        """
+        규칙 테이블 기록
+
+        Args:
+            router: 공유기 식별자
+            rules: 조회한 규칙 목록
+            taken_at: 조회 시각 (기본값: 현재)
+
+        Returns:
+            새 스냅샷을 기록했으면 True, 직전과 같아서 건너뛰었으면 False
+        """
+        rules = [{field: rule.get(field) for field in SNAPSHOT_FIELDS} for rule in rules]
+        digest = table_hash(rules)
+        taken_at = time.time() if taken_at is None else taken_at
+
+        with self._lock:
+            if router not in self._last_hash:
+                latest = self._latest(router)
+                self._last_hash[router] = latest['hash'] if latest else None
+            previous_hash = self._last_hash[router]
+            if previous_hash == digest:
+                return False
+
+            previous = self._load_table(previous_hash) if previous_hash else []
+            changes = diff_rules(previous, rules)
+
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO rule_tables (hash, rule_count, rules) VALUES (?, ?, ?)",
+                    (digest, len(rules), json.dumps(rules, ensure_ascii=False))
+                )
+                snapshot_id = self._conn.execute(
+                    "INSERT INTO snapshots (router, taken_at, hash) VALUES (?, ?, ?)",
+                    (router, taken_at, digest)
+                ).lastrowid
+
+                events = []
+                for rule in changes['added']:
+                    events.append((rule['description'], 'added', rule))
+                for change in changes['changed']:
+                    events.append((change['after']['description'], 'changed', change['after']))
+                for rule in changes['removed']:
+                    events.append((rule['description'], 'removed', rule))
+                self._conn.executemany(
+                    "INSERT INTO rule_events (snapshot_id, router, name, taken_at, event, version, rule) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (snapshot_id, router, name, taken_at, event, rule.get('version'),
+                         json.dumps(rule, ensure_ascii=False))
+                        for name, event, rule in events
+                    ]
+                )
+
+            self._last_hash[router] = digest
+            return True
+
+    def snapshots(self, router: str, since: Optional[float] = None, until: Optional[float] = None) -> List[Dict]:
+        """스냅샷 목록 (규칙 내용 제외)"""
+        query = (
+            "SELECT s.id, s.taken_at, s.hash, t.rule_count FROM snapshots s "
+            "JOIN rule_tables t ON t.hash = s.hash WHERE s.router = ?"
+        )
+        params: List = [router]
+        if since is not None:
+            query += " AND s.taken_at >= ?"
+            params.append(since)
+        if until is not None:
+            query += " AND s.taken_at <= ?"
+            params.append(until)
+        query += " ORDER BY s.taken_at, s.id"
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(query, params)]
+
+    def rules_at(self, router: str, at: Optional[float] = None) -> Optional[List[Dict]]:
+        """
+        특정 시각의 규칙 테이블 (그 시각 이전 마지막 스냅샷)
+
+        Returns:
+            규칙 목록, 해당 시각 이전 스냅샷이 없으면 None
+        """
+        with self._lock:
+            latest = self._latest(router, at)
+            return self._load_table(latest['hash']) if latest else None
+
+    def diff(self, router: str, since: Optional[float], until: Optional[float] = None) -> Dict:
+        """
+        두 시각 사이의 규칙 변경 사항
+
+        Args:
+            since: 비교 시작 시각 (None이면 빈 테이블에서 시작)
+            until: 비교 끝 시각 (None이면 최신)
+        """
+        before = self.rules_at(router, since) if since is not None else None
+        after = self.rules_at(router, until)
+        result = diff_rules(before or [], after or [])
+        result.update({'router': router, 'from': since, 'to': until})
+        return result
+
+    def rule_history(self, router: str, name: str, since: Optional[float] = None,
+                     until: Optional[float] = None) -> List[Dict]:
+        """
+        규칙 하나의 변경 이력 (추가/변경/삭제 이벤트)
+
+        Args:
+            name: 규칙 이름(description)
+        """
+        query = "SELECT taken_at, event, version, rule FROM rule_events WHERE router = ? AND name = ?"
+        params: List = [router, name]
+        if since is not None:
+            query += " AND taken_at >= ?"
+            params.append(since)
+        if until is not None:
+            query += " AND taken_at <= ?"
+            params.append(until)
+        query += " ORDER BY taken_at"
+        with self._lock:
+            return [
+                {'taken_at': row['taken_at'], 'event': row['event'], 'version': row['version'],
+                 'rule': json.loads(row['rule'])}
+                for row in self._conn.execute(query, params)
+            ]
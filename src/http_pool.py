@@ -0,0 +1,111 @@
+"""
+공유기 HTTP 연결 풀 모듈
+프로세스 전체에서 공유기(base_url)별 연결 풀을 하나씩 두고 모든 IptimeAPI 세션이 함께 사용합니다.
+쿠키는 세션마다 따로 유지되고 TCP/TLS 연결만 공유됩니다.
+"""
+import threading
+from typing import Dict, Optional
+
+from requests.adapters import HTTPAdapter
+from urllib3.util.ssl_ import create_urllib3_context
+
+# 연결 풀 설정 (configure()로 변경)
+_settings = {
+    'pool_connections': 1,   # 공유기별 호스트 풀 수 (base_url 하나당 호스트 하나)
+    'pool_maxsize': 4,       # 호스트별 유지하는 keep-alive 연결 수
+    'pool_block': False,     # 연결이 모두 사용 중일 때 대기 여부 (False면 임시 연결 생성)
+}
+
+_adapters: Dict[str, HTTPAdapter] = {}
+_lock = threading.Lock()
+
+
+class SharedHTTPAdapter(HTTPAdapter):
+    """
+    여러 세션이 함께 쓰는 어댑터
+
+    https 공유기는 호스트별 SSLContext 하나를 모든 연결이 공유하므로
+    keep-alive 연결을 재사용하는 동안 TLS 핸드셰이크를 다시 하지 않습니다.
+    (공유기 인증서는 대부분 자체 서명이므로 인증서 검증은 하지 않음)
+    """
+
+    def __init__(self, base_url: str, **kwargs):
+        self.base_url = base_url
+        self.ssl_context = None
+        if base_url.startswith('https://'):
+            self.ssl_context = create_urllib3_context()
+            self.ssl_context.check_hostname = False
+            self.ssl_context.verify_mode = 0  # ssl.CERT_NONE
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self.ssl_context is not None:
+            kwargs['ssl_context'] = self.ssl_context
+        super().init_poolmanager(*args, **kwargs)
+
+    def close(self):
+        # 세션 하나가 닫혀도 다른 세션이 쓰는 연결은 유지 (close_all()로만 정리)
+        pass
+
+    def stats(self) -> Dict:
+        """호스트별 연결 수 (생성된 연결, 처리한 요청, 유휴 연결)"""
+        pools = self.poolmanager.pools
+        hosts = {}
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            hosts[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                'connections_created': pool.num_connections,
+                'requests': pool.num_requests,
+                'idle': pool.pool.qsize() if pool.pool is not None else 0,
+            }
+        return hosts
+
+
+def configure(pool_maxsize: Optional[int] = None, pool_block: Optional[bool] = None):
+    """
+    연결 풀 설정 (이후 새로 만드는 공유기 풀에 적용)
+
+    Args:
+        pool_maxsize: 공유기별 keep-alive 연결 수
+        pool_block: 연결이 모두 사용 중일 때 새 연결 대신 대기할지 여부
+    """
+    with _lock:
+        if pool_maxsize is not None:
+            _settings['pool_maxsize'] = pool_maxsize
+        if pool_block is not None:
+            _settings['pool_block'] = pool_block
+
+
+def get_adapter(base_url: str) -> SharedHTTPAdapter:
+    """공유기 base_url의 공유 어댑터 (없으면 생성)"""
+    key = base_url.rstrip('/')
+    with _lock:
+        adapter = _adapters.get(key)
+        if adapter is None:
+            adapter = SharedHTTPAdapter(key, **_settings)
+            _adapters[key] = adapter
+        return adapter
+
+
+def pool_stats() -> Dict:
+    """공유기별 연결 풀 지표"""
+    with _lock:
+        adapters = dict(_adapters)
+    return {
+        base_url: {
+            'pool_maxsize': adapter._pool_maxsize,
+            'hosts': adapter.stats(),
+        }
+        for base_url, adapter in adapters.items()
+    }
+
+
+def close_all():
+    """모든 공유 연결 종료"""
+    with _lock:
+        adapters = list(_adapters.values())
+        _adapters.clear()
+    for adapter in adapters:
+        adapter.poolmanager.clear()
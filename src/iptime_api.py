@@ -3,12 +3,16 @@ ipTIME Router API Client
 CGI 스크립트를 사용한 ipTIME 공유기 제어 라이브러리
 """
 import logging
-import re
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 import requests
 import urllib3
 
+from .clients import ClientIndex, is_address
+from .http_pool import get_adapter
+from .parser import is_login_page, parse_lan_clients, parse_login_cookie, parse_session_info, parse_system_info
+from .profiling import NETWORK, phase
+
 # SSL 경고 비활성화
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -16,11 +20,32 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.WARNING)
 
+# LAN 클라이언트 목록 페이지 (연결된 단말, DHCP 할당 목록)
+LAN_CLIENT_MENUS = ('lan_pcinfo', 'dhcp_iplist')
+
+
+class RouterSession(requests.Session):
+    """공유기 요청 시간을 프로파일링 네트워크 구간으로 기록하는 세션"""
+    
+    def request(self, *args, **kwargs):
+        with phase(NETWORK):
+            return super().request(*args, **kwargs)
+
 
 class IptimeAPI:
     """ipTIME 공유기 API 클라이언트"""
     
-    def __init__(self, host: str, username: str = "admin", password: str = ""):
+    # 공유기 전송 어댑터 팩토리 (base_url -> 어댑터), None이면 공유 연결 풀 사용
+    # 응답 기록/재생 시 src.replay의 Recorder.adapter / Replayer.adapter로 교체
+    transport = None
+    
+    def __init__(
+        self,
+        host: str,
+        username: str = "admin",
+        password: str = "",
+        client_index: Optional[ClientIndex] = None
+    ):
         """
         초기화
         
@@ -28,6 +53,7 @@ class IptimeAPI:
             host: 공유기 IP 주소 또는 URL (예: 192.168.0.1 또는 https://router.example.com)
             username: 관리자 계정 (기본값: admin)
             password: 관리자 비밀번호
+            client_index: 공유할 LAN 클라이언트 색인 (같은 공유기의 세션 풀 등)
         """
         # URL 형식 처리
         if host.startswith('http://') or host.startswith('https://'):
@@ -42,9 +68,23 @@ class IptimeAPI:
         
         self.username = username
         self.password = password
-        self.session = requests.Session()
+        self.session = self._new_session()
+        self.session_id = None
+        self.captcha = None
+        self.logged_in = False
+        self.clients = client_index if client_index is not None else ClientIndex()
+        
+    def _new_session(self) -> RouterSession:
+        """
+        새 HTTP 세션 생성
+        
+        쿠키는 세션마다 따로 유지하고, 연결은 공유기별 공유 연결 풀(keep-alive)을 사용합니다.
+        """
+        session = RouterSession()
+        factory = IptimeAPI.transport or get_adapter
+        session.mount(f"{self.base_url}/", factory(self.base_url))
         # 세션 유지를 위한 헤더 추가
-        self.session.headers.update({
+        session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
             'Accept-Language': 'ko-KR,ko;q=0.9,en;q=0.8',
@@ -53,9 +93,7 @@ class IptimeAPI:
             'Content-Type': 'application/x-www-form-urlencoded',
             'Cache-Control': 'no-cache'
         })
-        self.session_id = None
-        self.captcha = None
-        self.logged_in = False
+        return session
         
     def _get_session_info(self) -> Dict:
         """세션 정보 획득"""
@@ -68,22 +106,7 @@ class IptimeAPI:
             # 세션 정보 파싱
             content = response.text
             # logger.debug(f"응답 내용 (처음 500자): {content[:500]}")
-            session_info = {}
-            
-            # captcha 추출
-            captcha_match = re.search(r'captcha_on\s*=\s*"(\d+)"', content)
-            if captcha_match:
-                session_info['captcha_on'] = captcha_match.group(1)
-                
-            # default_login 추출  
-            default_login_match = re.search(r'default_login\s*=\s*"([^"]+)"', content)
-            if default_login_match:
-                session_info['default_login'] = default_login_match.group(1)
-                
-            # session_id 추출
-            session_id_match = re.search(r'session_id\s*=\s*"([^"]+)"', content)
-            if session_id_match:
-                session_info['session_id'] = session_id_match.group(1)
+            session_info = parse_session_info(content)
             
             # logger.info(f"세션 정보 추출: {session_info}")
             return session_info
@@ -141,9 +164,8 @@ class IptimeAPI:
             # JavaScript로 쿠키를 설정하는 경우 처리 (200 응답)
             if 'setCookie' in response.text:
                 # JavaScript에서 세션 ID 추출
-                session_match = re.search(r"setCookie\('([^']+)'\)", response.text)
-                if session_match:
-                    session_id = session_match.group(1)
+                session_id = parse_login_cookie(response.text)
+                if session_id:
                     # logger.info(f"세션 ID 추출 성공: {session_id}")
                     # 쿠키 설정
                     self.session.cookies.set('efm_session_id', session_id, domain=self.host.split(':')[0], path='/')
@@ -183,8 +205,27 @@ class IptimeAPI:
             logger.error(f"로그아웃 실패: {e}")
             return False
             
-    def _make_request(self, cgi_path: str, data: Dict = None, method: str = "GET") -> Optional[str]:
-        """CGI 요청 생성 및 전송"""
+    def _make_request(
+        self,
+        cgi_path: str,
+        data: Dict = None,
+        method: str = "GET",
+        relogin: bool = True,
+        repeatable: Optional[bool] = None
+    ) -> Optional[str]:
+        """
+        CGI 요청 생성 및 전송
+        
+        공유기가 세션을 먼저 만료시키면 요청한 페이지 대신 로그인 페이지를 200으로 반환합니다.
+        이 경우 다시 로그인하고, 다시 보내도 되는 요청이면 한 번만 재시도합니다.
+        재시도하지 않았거나 재시도해도 로그인 페이지면 실패(None)로 처리합니다.
+        
+        Args:
+            relogin: 로그인 페이지를 받았을 때 다시 로그인할지 여부
+            repeatable: 재로그인 후 같은 요청을 다시 보내도 되는지 (기본값: GET만).
+                변경 요청(POST)은 실제로는 반영됐을 수 있어 두 번 보내면 규칙이 중복될 수 있으므로
+                호출한 쪽이 안전하다고 지정한 경우에만 다시 보냄
+        """
         try:
             # URL 구성 - cgi_path가 /로 시작하면 그대로, 아니면 / 추가
             if cgi_path.startswith('/'):
@@ -207,11 +248,19 @@ class IptimeAPI:
                 response = self.session.post(url, data=data, headers=headers, verify=False, timeout=10)
             
             # 502 에러는 iptime에서 정상 응답으로 처리될 수 있음
-            if response.status_code in [200, 502]:
-                return response.text
-            else:
+            if response.status_code not in [200, 502]:
                 response.raise_for_status()
-                return response.text
+            
+            if is_login_page(response.text):
+                self.logged_in = False
+                if relogin and self.login():
+                    # logger.info("세션 만료 감지, 재로그인")
+                    self.logged_in = True
+                    if method == "GET" if repeatable is None else repeatable:
+                        return self._make_request(cgi_path, data, method, relogin=False)
+                logger.error(f"세션 만료로 요청 실패: {cgi_path}")
+                return None
+            return response.text
             
         except Exception as e:
             logger.error(f"요청 실패: {e}")
@@ -222,18 +271,8 @@ class IptimeAPI:
         try:
             response = self._make_request("timepro.cgi", {"tmenu": "iframe", "smenu": "expertinfo"})
             if response:
-                # 시스템 정보 파싱
-                info = {}
-                
-                # 펌웨어 버전
-                fw_match = re.search(r'펌웨어 버전.*?<td[^>]*>([^<]+)</td>', response, re.DOTALL)
-                if fw_match:
-                    info['firmware_version'] = fw_match.group(1).strip()
-                    
-                # 모델명
-                model_match = re.search(r'모델명.*?<td[^>]*>([^<]+)</td>', response, re.DOTALL)
-                if model_match:
-                    info['model'] = model_match.group(1).strip()
+                # 시스템 정보 파싱 (펌웨어 버전, 모델명)
+                info = parse_system_info(response)
                     
                 return info
                 
@@ -241,3 +280,45 @@ class IptimeAPI:
             logger.error(f"시스템 정보 조회 실패: {e}")
             
         return None
+
+    def get_lan_clients(self) -> Optional[List[Dict]]:
+        """
+        LAN 클라이언트 목록 조회 후 색인 갱신
+        
+        연결된 단말/DHCP 목록 페이지를 MAC 기준으로 합칩니다 (앞 페이지에 호스트 이름이 없으면 뒤 페이지 값 사용).
+        
+        Returns:
+            [{'mac', 'hostname', 'ip'}], 모든 페이지 조회에 실패하면 None
+        """
+        clients: Dict[str, Dict] = {}
+        fetched = False
+        for menu in LAN_CLIENT_MENUS:
+            response = self._make_request("sess-bin/timepro.cgi", {"tmenu": "iframe", "smenu": menu})
+            if response is None:
+                continue
+            fetched = True
+            for client in parse_lan_clients(response):
+                known = clients.setdefault(client['mac'], client)
+                if not known['hostname']:
+                    known['hostname'] = client['hostname']
+        
+        if not fetched:
+            return None
+        result = list(clients.values())
+        self.clients.set(result)
+        return result
+        
+    def resolve_host(self, target: str) -> Optional[str]:
+        """
+        규칙 대상(IP, 호스트 이름, MAC)을 IP로 변환
+        
+        색인이 없거나 오래됐을 때, 또는 색인에 없는 대상이면 (miss_refresh가 지난 경우) 한 번만 새로 조회합니다.
+        
+        Returns:
+            IP 주소, 찾지 못하면 None
+        """
+        if not target or is_address(target):
+            return target
+        if self.clients.needs_refresh(target):
+            self.get_lan_clients()
+        return self.clients.resolve(target)
@@ -0,0 +1,179 @@
+"""
+비동기 작업 모듈
+일괄 추가/변경 작업 목록처럼 오래 걸리는 작업을 공유기별 백그라운드 워커에서 실행하고 진행 상황을 보관합니다.
+"""
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+
+class Job:
+    """작업 하나의 상태와 항목별 결과"""
+
+    def __init__(self, router: str, kind: str, total: int):
+        self.id = uuid.uuid4().hex
+        self.router = router
+        self.kind = kind
+        self.total = total
+        self.status = QUEUED
+        self.error: Optional[str] = None
+        self.results: List[Dict] = []
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._changed = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def _expired(self, cutoff: float) -> bool:
+        """cutoff 이전에 끝난 작업인지 (status와 finished_at을 함께 바꾸는 _update 도중의 값을 읽지 않도록 잠금 안에서)"""
+        with self._changed:
+            return self.finished and self.finished_at is not None and self.finished_at < cutoff
+
+    def _update(self, **fields):
+        with self._changed:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self._changed.notify_all()
+
+    def _add_result(self, result: Dict):
+        with self._changed:
+            self.results.append(result)
+            self._changed.notify_all()
+
+    def wait(self, after: int, timeout: Optional[float] = None) -> Tuple[List[Dict], bool]:
+        """
+        진행 상황 대기
+
+        Args:
+            after: 이미 받은 결과 수
+            timeout: 최대 대기 시간(초)
+
+        Returns:
+            (새 결과 목록, 작업 종료 여부)
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: len(self.results) > after or self.finished, timeout)
+            return self.results[after:], self.finished
+
+    def to_dict(self, include_results: bool = True) -> Dict:
+        with self._changed:
+            data = {
+                'id': self.id,
+                'router': self.router,
+                'kind': self.kind,
+                'status': self.status,
+                'total': self.total,
+                'done': len(self.results),
+                'failed': sum(1 for result in self.results if not result.get('success')),
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+            }
+            if self.error:
+                data['error'] = self.error
+            if include_results:
+                data['results'] = list(self.results)
+            return data
+
+
+class JobManager:
+    """
+    비동기 작업 관리자
+
+    공유기마다 워커 풀을 따로 두어 한 공유기의 긴 작업이 다른 공유기 작업을 막지 않습니다.
+    끝난 작업은 retention초 동안 조회할 수 있고 이후 정리됩니다.
+    """
+
+    def __init__(self, workers_per_router: int = 1, retention: float = 3600):
+        """
+        초기화
+
+        Args:
+            workers_per_router: 공유기별 동시 실행 작업 수
+            retention: 끝난 작업 보관 시간(초)
+        """
+        self.workers_per_router = workers_per_router
+        self.retention = retention
+        self._jobs: Dict[str, Job] = {}
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+        self._lock = threading.Lock()
+
+    def _executor(self, router: str) -> ThreadPoolExecutor:
+        executor = self._executors.get(router)
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=self.workers_per_router, thread_name_prefix=f'jobs-{router}'
+            )
+            self._executors[router] = executor
+        return executor
+
+    def _purge(self):
+        cutoff = time.time() - self.retention
+        for job_id in [
+            job_id for job_id, job in self._jobs.items() if job._expired(cutoff)
+        ]:
+            del self._jobs[job_id]
+
+    def submit(self, router: str, kind: str, total: int, run: Callable[[], Iterable[Dict]]) -> Job:
+        """
+        작업 등록
+
+        Args:
+            router: 공유기 식별자
+            kind: 작업 종류 (batch, plan 등)
+            total: 전체 항목 수
+            run: 워커에서 호출할 함수 - 항목별 결과를 하나씩 반환하는 이터러블
+
+        Returns:
+            등록된 작업 (바로 반환되며 실행은 백그라운드에서 진행)
+        """
+        job = Job(router, kind, total)
+        with self._lock:
+            self._purge()
+            self._jobs[job.id] = job
+            self._executor(router).submit(self._run, job, run)
+        return job
+
+    @staticmethod
+    def _run(job: Job, run: Callable[[], Iterable[Dict]]):
+        job._update(status=RUNNING, started_at=time.time())
+        try:
+            for result in run():
+                job._add_result(result)
+        except Exception as e:
+            logger.error(f"작업 실패 ({job.kind} {job.id}): {e}")
+            job._update(status=FAILED, error=str(e), finished_at=time.time())
+            return
+        job._update(status=SUCCEEDED, finished_at=time.time())
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            self._purge()
+            return self._jobs.get(job_id)
+
+    def list(self, router: Optional[str] = None) -> List[Job]:
+        """작업 목록 (등록 순)"""
+        with self._lock:
+            self._purge()
+            return [job for job in self._jobs.values() if router is None or job.router == router]
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executors = list(self._executors.values())
+            self._executors.clear()
+        for executor in executors:
+            executor.shutdown(wait=wait)
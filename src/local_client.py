@@ -0,0 +1,183 @@
+"""
+API 서버 로컬 Unix 소켓 클라이언트
+같은 호스트의 에이전트가 IPTIME_UNIX_SOCKET으로 API 서버를 호출할 때 사용합니다.
+연결 하나를 keep-alive로 계속 재사용하므로 호출마다 연결/토큰 검사 비용이 없습니다.
+"""
+import http.client
+import socket
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+from urllib.parse import quote, urlencode
+
+from . import encoding
+
+# 재사용하던 연결을 서버가 먼저 닫았을 때 나는 오류 (요청이 처리되지 않았으므로 새 연결로 한 번 재시도)
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError)
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """Unix 도메인 소켓으로 연결하는 HTTP 연결"""
+
+    def __init__(self, socket_path: str, timeout: float = 30):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+
+
+class LocalAPIError(Exception):
+    """API 서버가 오류 응답을 반환함"""
+
+    def __init__(self, status: int, body: Any):
+        message = body.get('message') or body.get('error') if isinstance(body, dict) else body
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+        self.body = body
+
+
+class LocalClient:
+    """
+    API 서버 Unix 소켓 클라이언트
+
+    스레드 하나가 쓰는 것을 기준으로 하며, 여러 스레드가 공유하면 요청이 차례로 처리됩니다.
+
+    사용 예:
+        with LocalClient('/run/iptime/api.sock') as client:
+            rules = client.rules()
+            client.add_rule(description='web', internal_ip='nas', external_port=8080)
+    """
+
+    def __init__(self, socket_path: str, router_id: Optional[str] = None, timeout: float = 30):
+        """
+        초기화
+
+        Args:
+            socket_path: API 서버의 IPTIME_UNIX_SOCKET 경로
+            router_id: 공유기 식별자 (None이면 기본 공유기, /api/routers/<router_id>/... 경로 사용)
+            timeout: 연결/응답 대기 시간(초)
+        """
+        self.socket_path = socket_path
+        self.router_id = router_id
+        self.timeout = timeout
+        self._conn: Optional[UnixHTTPConnection] = None
+        self._reused = False
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _send(self, method: str, path: str, body: Optional[bytes], headers: Dict) -> Tuple[int, str, bytes]:
+        if self._conn is None:
+            self._conn = UnixHTTPConnection(self.socket_path, self.timeout)
+            self._reused = False
+        self._conn.request(method, path, body=body, headers=headers)
+        response = self._conn.getresponse()
+        data = response.read()
+        if response.will_close:
+            self._close()
+        else:
+            self._reused = True
+        return response.status, response.getheader('Content-Type', ''), data
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: Any = None,
+        params: Optional[Dict] = None,
+        headers: Optional[Dict] = None
+    ) -> Tuple[int, Any]:
+        """
+        요청 전송
+
+        Args:
+            method: HTTP 메서드
+            path: /api/... 경로
+            body: JSON으로 보낼 본문 (선택)
+            params: 쿼리 파라미터 (선택)
+            headers: 추가 헤더 (선택, 예: If-Match)
+
+        Returns:
+            (HTTP 상태 코드, 응답 본문 - JSON이면 파싱한 값, 아니면 bytes)
+        """
+        if params:
+            path = f"{path}?{urlencode(params)}"
+        headers = dict(headers or {})
+        payload = None
+        if body is not None:
+            payload = encoding.dumps(body)
+            headers['Content-Type'] = 'application/json'
+
+        with self._lock:
+            try:
+                status, content_type, data = self._send(method, path, payload, headers)
+            except STALE_CONNECTION_ERRORS:
+                if not self._reused:
+                    self._close()
+                    raise
+                self._close()
+                status, content_type, data = self._send(method, path, payload, headers)
+            except BaseException:
+                self._close()
+                raise
+
+        if content_type.startswith('application/json'):
+            return status, encoding.loads(data)
+        return status, data
+
+    def _call(self, method: str, path: str, body: Any = None, if_match: Optional[str] = None) -> Any:
+        """공유기별 경로로 요청하고, 오류 응답이면 LocalAPIError 발생"""
+        prefix = f"/api/routers/{quote(self.router_id, safe='')}" if self.router_id else '/api'
+        headers = {'If-Match': if_match} if if_match else None
+        status, data = self.request(method, prefix + path, body, headers=headers)
+        if status >= 400:
+            raise LocalAPIError(status, data)
+        return data
+
+    def rules(self) -> list:
+        """규칙 목록"""
+        return self._call('GET', '/portforward')['data']
+
+    def rule(self, rule_id_or_name) -> Dict:
+        """규칙 단건 (ID 또는 이름)"""
+        return self._call('GET', f"/portforward/{quote(str(rule_id_or_name), safe='')}")['rule']
+
+    def add_rule(self, **fields) -> Dict:
+        """규칙 추가 (description, internal_ip, external_port, internal_port, protocol, verify)"""
+        return self._call('POST', '/portforward', fields)
+
+    def update_rule(self, rule_id_or_name, if_match: Optional[str] = None, **changes) -> Dict:
+        """규칙 수정 (바꿀 필드만, if_match: 버전 토큰)"""
+        return self._call('PUT', f"/portforward/{quote(str(rule_id_or_name), safe='')}", changes, if_match)
+
+    def delete_rule(self, rule_id_or_name, if_match: Optional[str] = None) -> Dict:
+        """규칙 삭제 (if_match: 버전 토큰)"""
+        return self._call('DELETE', f"/portforward/{quote(str(rule_id_or_name), safe='')}", if_match=if_match)
+
+    def apply_plan(self, operations: Iterable[Dict]) -> list:
+        """변경 작업 목록 적용 (작업별 결과)"""
+        return self._call('POST', '/portforward/plan', {'operations': list(operations)})['results']
+
+    def clients(self) -> list:
+        """LAN 클라이언트 색인"""
+        return self._call('GET', '/clients')['data']
@@ -0,0 +1,70 @@
+"""
+규칙 순서 변경 계획 모듈
+현재 순서와 원하는 순서를 비교해 최소 이동 목록을 계산합니다.
+
+공유기의 규칙 수정(act=modify)은 old_priority 위치의 규칙을 빼서 priority 위치에 넣으므로
+한 번의 수정 요청이 곧 한 번의 이동입니다. 원하는 순서에서의 위치가 증가하는 가장 긴 부분열(LIS)에
+속한 규칙은 그대로 두고 나머지만 옮기면 이동 수(n - LIS 길이)가 최소가 됩니다.
+"""
+from bisect import bisect_left
+from typing import Hashable, List, Sequence, Set, Tuple
+
+
+def longest_increasing_subsequence(values: Sequence[int]) -> Set[int]:
+    """
+    순증가하는 가장 긴 부분열의 위치(values의 인덱스) 집합 (O(n log n))
+    """
+    tails: List[int] = []        # 길이 k+1인 증가 부분열의 마지막 값 중 최소
+    tail_index: List[int] = []   # 그 값의 위치
+    previous = [-1] * len(values)
+    for i, value in enumerate(values):
+        k = bisect_left(tails, value)
+        if k == len(tails):
+            tails.append(value)
+            tail_index.append(i)
+        else:
+            tails[k] = value
+            tail_index[k] = i
+        previous[i] = tail_index[k - 1] if k else -1
+
+    result = set()
+    i = tail_index[-1] if tail_index else -1
+    while i >= 0:
+        result.add(i)
+        i = previous[i]
+    return result
+
+
+def plan_moves(current: Sequence[Hashable], target: Sequence[Hashable]) -> List[Tuple[Hashable, int, int]]:
+    """
+    current를 target 순서로 바꾸는 최소 이동 목록
+
+    Args:
+        current: 현재 순서의 항목 (중복 없음)
+        target: 원하는 순서 (current와 같은 항목)
+
+    Returns:
+        [(항목, 이동 전 위치, 이동 후 위치)] - 위치는 1부터, 앞에서부터 순서대로 적용
+
+    Raises:
+        ValueError: current와 target의 항목이 다름
+    """
+    if len(current) != len(target) or set(current) != set(target):
+        raise ValueError("현재 순서와 원하는 순서의 항목이 다릅니다")
+
+    rank = {item: i for i, item in enumerate(target)}
+    keep = longest_increasing_subsequence([rank[item] for item in current])
+    stay = {current[i] for i in keep}
+
+    # 원하는 순서대로 옮길 항목을 바로 앞 항목(그대로 있거나 이미 옮긴 항목) 뒤에 넣음
+    working = list(current)
+    moves = []
+    for position, item in enumerate(target):
+        if item in stay:
+            continue
+        old = working.index(item)
+        del working[old]
+        new = working.index(target[position - 1]) + 1 if position else 0
+        working.insert(new, item)
+        moves.append((item, old + 1, new + 1))
+    return moves
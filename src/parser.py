@@ -0,0 +1,287 @@
+"""
+ipTIME 응답 페이지 파서
+정규식은 모듈 로드 시 한 번만 컴파일하고, 필드 위치를 찾은 뒤 그 자리에 고정된 패턴으로 값을 추출합니다.
+"""
+import hashlib
+import re
+import threading
+import time
+from functools import lru_cache, wraps
+from itertools import islice
+from typing import Dict, Iterator, List, Optional
+
+from .profiling import PARSE, add_time
+
+# login_session.cgi: var captcha_on = "0"; var default_login = "1"; var session_id = "..."
+# 변수 이름은 str.find로 찾고, 값은 이름 바로 뒤에 고정(match)된 패턴으로 추출
+# 변수마다 한 번씩 찾으므로 한 번에 훑는 방식은 아니지만, 이름을 묶은 정규식 하나(captcha_on|default_login|...)는
+# 고정 접두어가 없어 모든 위치에서 매칭을 시도하므로 측정해 보면 몇 배 느림 (system_info도 같음)
+SESSION_INFO_KEYS = ('captcha_on', 'default_login', 'session_id')
+SESSION_VALUE_RE = re.compile(r'\s*=\s*"([^"]+)"')
+
+# login_handler.cgi: setCookie('...')
+SET_COOKIE_RE = re.compile(r"setCookie\('([^']+)'\)")
+
+# timepro.cgi?smenu=expertinfo: <td>펌웨어 버전</td><td ...>14.0.2</td>
+# 라벨 위치에서부터 다음 값 셀을 찾음 (기존 '라벨.*?<td[^>]*>([^<]+)</td>' DOTALL 패턴과 동일한 결과)
+SYSTEM_INFO_LABELS = {
+    'firmware_version': '펌웨어 버전',
+    'model': '모델명',
+}
+TD_VALUE_RE = re.compile(r'<td[^>]*>([^<]+)</td>')
+
+# 연결된 단말/DHCP 목록 페이지: 행마다 호스트 이름, IP, MAC이 들어 있음
+# 펌웨어마다 표 구성이 달라 열 위치 대신 값의 형식으로 구분 (표 행 <tr>, 또는 스크립트 배열 한 줄)
+CLIENT_ROW_RE = re.compile(r'<tr[^>]*>(.*?)</tr>', re.S | re.I)
+CLIENT_CELL_RE = re.compile(r'<td[^>]*>(.*?)</td>', re.S | re.I)
+CLIENT_QUOTED_RE = re.compile(r"'([^'<>]*)'|\"([^\"<>]*)\"")
+TAG_RE = re.compile(r'<[^>]+>')
+IPV4_RE = re.compile(r'^(?:\d{1,3}\.){3}\d{1,3}$')
+CLIENT_MAC_RE = re.compile(r'^[0-9a-fA-F]{2}([:-])(?:[0-9a-fA-F]{2}\1){4}[0-9a-fA-F]{2}$')
+# 호스트 이름이 없을 때 표시되는 값
+EMPTY_HOSTNAMES = ('', '-', '*', 'unknown')
+
+# onClickedPFRule('user','nas','0','192.168.0.12','tcp','28080','28080','8080','8080','','','','',false,'1','1', false)
+# Parameters: mode, name, selserver, internal_ip, protocol, ext_sport, ext_eport, int_sport, int_eport,
+#            tsport, teport, tfprotocol, tfrange, disabled, priority, wan, fixed
+PF_RULE_RE = re.compile(
+    r"onClickedPFRule\('user','([^']*)','[^']*','([^']*)','([^']*)','([^']*)','([^']*)','([^']*)','([^']*)'"
+    r"(?:,'[^']*','[^']*','[^']*','[^']*',\s*(true|false))?"
+)
+
+# 규칙 버전 토큰 계산에 쓰는 필드 (목록 순서인 id는 제외)
+RULE_VERSION_FIELDS = ('description', 'internal_ip', 'protocol', 'external_port', 'internal_port')
+
+# 포트포워드 규칙을 한 번에 파싱하는 수 (파싱 시간 측정 단위, 내보내기는 이만큼씩 스트리밍)
+PF_CHUNK_SIZE = 256
+
+# 버전 토큰 캐시 크기 (필드 튜플 -> 토큰)
+# 규칙 테이블은 조회 사이에 거의 바뀌지 않으므로 파싱할 때마다 같은 규칙의 SHA-1을 다시 계산하지 않음
+VERSION_CACHE_SIZE = 65536
+
+# 파서별 누적 호출 횟수/소요 시간
+_stats_lock = threading.Lock()
+_parse_stats: Dict[str, Dict] = {}
+
+
+def _timed(name: str):
+    """파싱 소요 시간을 _parse_stats에 누적하는 데코레이터"""
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return f(*args, **kwargs)
+            finally:
+                _record(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def _record(name: str, elapsed: float):
+    add_time(PARSE, elapsed)
+    with _stats_lock:
+        stats = _parse_stats.setdefault(name, {'calls': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+        stats['calls'] += 1
+        stats['total_seconds'] += elapsed
+        stats['max_seconds'] = max(stats['max_seconds'], elapsed)
+
+
+def get_parse_stats() -> Dict[str, Dict]:
+    """
+    파서별 누적 통계 조회
+
+    Returns:
+        {파서 이름: {'calls', 'total_seconds', 'max_seconds', 'avg_seconds'}}
+    """
+    with _stats_lock:
+        result = {}
+        for name, stats in _parse_stats.items():
+            entry = dict(stats)
+            entry['avg_seconds'] = stats['total_seconds'] / stats['calls'] if stats['calls'] else 0.0
+            result[name] = entry
+        return result
+
+
+def reset_parse_stats():
+    """파서 통계 초기화"""
+    with _stats_lock:
+        _parse_stats.clear()
+
+
+def _find_anchored(content: str, key: str, value_re) -> Optional[str]:
+    """content에서 key가 처음 나오는 위치부터 value_re가 바로 이어지는 값을 반환"""
+    pos = content.find(key)
+    while pos != -1:
+        match = value_re.match(content, pos + len(key))
+        if match:
+            return match.group(1)
+        pos = content.find(key, pos + 1)
+    return None
+
+
+@_timed('session_info')
+def parse_session_info(content: str) -> Dict:
+    """login_session.cgi 응답에서 captcha_on, default_login, session_id 추출"""
+    session_info = {}
+    for key in SESSION_INFO_KEYS:
+        value = _find_anchored(content, key, SESSION_VALUE_RE)
+        if value is not None:
+            session_info[key] = value
+    return session_info
+
+
+@_timed('login_cookie')
+def parse_login_cookie(content: str) -> Optional[str]:
+    """login_handler.cgi 응답의 setCookie('...')에서 세션 ID 추출"""
+    match = SET_COOKIE_RE.search(content)
+    return match.group(1) if match else None
+
+
+@_timed('system_info')
+def parse_system_info(content: str) -> Dict:
+    """expertinfo 페이지에서 펌웨어 버전, 모델명 추출"""
+    info = {}
+    for field, label in SYSTEM_INFO_LABELS.items():
+        pos = content.find(label)
+        if pos == -1:
+            continue
+        match = TD_VALUE_RE.search(content, pos + len(label))
+        if match:
+            info[field] = match.group(1).strip()
+    return info
+
+
+def _client_from_values(values) -> Optional[Dict]:
+    """한 행의 값들에서 IP, MAC, 호스트 이름(IP/MAC이 아닌 첫 문자열 값)을 찾음"""
+    ip = mac = hostname = None
+    for value in values:
+        value = value.strip()
+        if ip is None and IPV4_RE.match(value):
+            ip = value
+        elif mac is None and CLIENT_MAC_RE.match(value):
+            mac = value.replace('-', ':').lower()
+        elif hostname is None and any(c.isalpha() for c in value):
+            hostname = value
+    if not ip or not mac:
+        return None
+    if hostname and hostname.lower() in EMPTY_HOSTNAMES:
+        hostname = None
+    return {'mac': mac, 'hostname': hostname, 'ip': ip}
+
+
+@_timed('lan_clients')
+def parse_lan_clients(page: str) -> List[Dict]:
+    """
+    연결된 단말/DHCP 목록 페이지에서 LAN 클라이언트 추출
+
+    Returns:
+        [{'mac': 'aa:bb:cc:dd:ee:ff', 'hostname': 이름 또는 None, 'ip'}]
+    """
+    clients = []
+    if '<tr' in page or '<TR' in page:
+        for row in CLIENT_ROW_RE.finditer(page):
+            client = _client_from_values(
+                TAG_RE.sub('', cell) for cell in CLIENT_CELL_RE.findall(row.group(1))
+            )
+            if client:
+                clients.append(client)
+    else:
+        for line in page.splitlines():
+            client = _client_from_values(a or b for a, b in CLIENT_QUOTED_RE.findall(line))
+            if client:
+                clients.append(client)
+    return clients
+
+
+def is_port_forward_page(page: str) -> bool:
+    """포트포워드 규칙 테이블이 들어 있는 페이지인지 확인 (변경 요청 응답 검증용)"""
+    return 'onClickedPFRule' in page
+
+
+def is_login_page(page: str) -> bool:
+    """
+    로그인/세션 만료 페이지인지 확인
+
+    세션이 만료되면 공유기는 요청한 페이지 대신 세션 만료 안내나 로그인 폼을 200으로 반환하므로,
+    규칙이 없는 포트포워드 페이지(빈 테이블)와 구분하는 데 사용합니다.
+    일반 페이지의 스크립트에도 login_session이 들어 있으므로 만료 표시(session_timeout)나
+    로그인 폼 필드가 함께 있을 때만 로그인 페이지로 봅니다.
+    """
+    if is_port_forward_page(page):
+        return False
+    if 'login_session' in page and 'session_timeout' in page:
+        return True
+    # login_handler.cgi로 아이디/비밀번호를 보내는 로그인 폼
+    return 'login_handler.cgi' in page and 'name="passwd"' in page
+
+
+@lru_cache(maxsize=VERSION_CACHE_SIZE)
+def _content_version(
+    description: str, internal_ip: str, protocol: str, external_port: str, internal_port: str, disabled: bool
+) -> str:
+    """필드 값(문자열)으로 만든 버전 토큰 (RULE_VERSION_FIELDS 순서)"""
+    content = f"{description}\x1f{internal_ip}\x1f{protocol}\x1f{external_port}\x1f{internal_port}"
+    # 비활성 규칙만 표시를 붙여 활성 규칙의 기존 토큰은 그대로 유지
+    if disabled:
+        content += '\x1fdisabled'
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()[:16]
+
+
+def rule_version(rule: Dict) -> str:
+    """
+    규칙 내용으로 만든 버전 토큰
+
+    목록 순서(id)와 무관하게 같은 내용이면 같은 값이므로, 다른 클라이언트가 규칙을
+    추가/삭제해 id가 밀려도 규칙을 식별하고 변경 여부를 확인하는 데 사용합니다.
+    """
+    return _content_version(
+        *(str(rule.get(field, '')) for field in RULE_VERSION_FIELDS), bool(rule.get('disabled'))
+    )
+
+
+def iter_port_forward_rules(page: str) -> Iterator[Dict]:
+    """
+    포트포워드 페이지 HTML에서 규칙을 하나씩 파싱
+
+    Args:
+        page: user_portforward 페이지 HTML
+
+    Yields:
+        포트포워드 규칙
+    """
+    # 소비자(내보내기 등)가 yield 사이에 쓰는 시간은 제외하고 파싱 시간만 누적
+    # 규칙마다 시각을 재면 그 비용이 파싱보다 커지므로 PF_CHUNK_SIZE개씩 파싱해 묶음 단위로 측정
+    clock = time.perf_counter
+    elapsed = 0.0
+    start = clock()
+    matches = enumerate(PF_RULE_RE.finditer(page), 1)
+    try:
+        while True:
+            chunk = list(islice(matches, PF_CHUNK_SIZE))
+            rules = []
+            for i, match in chunk:
+                name, internal_ip, protocol, ext_sport, ext_eport, int_sport, int_eport, disabled = match.groups()
+                if internal_ip and ext_sport:  # 빈 규칙은 제외
+                    disabled = disabled == 'true'
+                    rules.append({
+                        'id': i,  # Use index as ID since it's not in the params
+                        'description': name,
+                        'internal_ip': internal_ip,
+                        'protocol': protocol,
+                        'external_port': ext_sport,
+                        'internal_port': int_sport,
+                        'disabled': disabled,
+                        # rule_version과 같은 값 (필드가 이미 문자열이므로 캐시를 바로 조회)
+                        'version': _content_version(name, internal_ip, protocol, ext_sport, int_sport, disabled)
+                    })
+            elapsed += clock() - start
+            start = None
+            if not chunk:
+                return
+            yield from rules
+            start = clock()
+    finally:
+        if start is not None:
+            elapsed += clock() - start
+        _record('port_forward_rules', elapsed)
@@ -2,126 +2,379 @@
 ipTIME 포트포워드 관리 모듈
 """
 import logging
-import re
-from typing import Dict, List, Optional
-
-import requests
+import threading
+import time
+from typing import Callable, Dict, IO, Iterable, Iterator, List, Optional
 
+from .clients import client_error
+from .history import SnapshotStore
 from .iptime_api import IptimeAPI
+from .ordering import plan_moves
+from .parser import is_login_page, is_port_forward_page, iter_port_forward_rules, rule_version
+from .rule_io import read_rules, write_rules
+from .validation import RuleValidator, ValidationError, check_internal_ip, check_rule_fields
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.WARNING)
 
+# 외부 포트 자동 할당 기본 범위 (잘 알려진 포트 제외)
+DEFAULT_ALLOCATE_RANGE = (1024, 65535)
+
+
+class VersionConflictError(Exception):
+    """규칙 버전 토큰 불일치 (다른 클라이언트가 먼저 규칙을 변경함)"""
+    
+    def __init__(self, rule_id_or_name, expected_version: str, current: Optional[Dict] = None):
+        super().__init__(f"규칙 '{rule_id_or_name}' 버전 불일치 (expected {expected_version})")
+        self.expected_version = expected_version
+        self.current = current
+
+
+class NoFreePortError(Exception):
+    """할당 범위에 비어 있는 외부 포트가 없음"""
+    
+    def __init__(self, protocol: str, low: int, high: int):
+        super().__init__(f"{protocol} {low}-{high} 범위에 비어 있는 외부 포트가 없습니다")
+        self.protocol = protocol
+        self.low = low
+        self.high = high
+
+
+class RuleTableCache:
+    """
+    규칙 테이블 캐시
+    
+    같은 공유기를 다루는 여러 PortForwardManager(세션)가 하나의 캐시를 공유할 수 있습니다.
+    """
+    
+    def __init__(self, ttl: float = 0):
+        """
+        초기화
+        
+        Args:
+            ttl: 캐시 유효 시간(초)
+        """
+        self.ttl = ttl
+        self._rules: Optional[List[Dict]] = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+    
+    def get(self) -> Optional[List[Dict]]:
+        """유효한 캐시가 있으면 규칙 목록, 없으면 None"""
+        with self._lock:
+            if self._rules is not None and time.monotonic() - self._fetched_at < self.ttl:
+                return self._rules
+            return None
+    
+    def set(self, rules: List[Dict]):
+        with self._lock:
+            self._rules = rules
+            self._fetched_at = time.monotonic()
+    
+    def invalidate(self):
+        with self._lock:
+            self._rules = None
+    
+    def age(self) -> Optional[float]:
+        """마지막 조회 후 경과 시간(초), 조회한 적이 없으면 None"""
+        with self._lock:
+            if self._rules is None:
+                return None
+            return time.monotonic() - self._fetched_at
+
 
 class PortForwardManager:
     """포트포워드 관리 클래스"""
     
-    def __init__(self, api_client: IptimeAPI):
+    def __init__(
+        self,
+        api_client: IptimeAPI,
+        cache_ttl: float = 0,
+        lan_network: Optional[str] = None,
+        history: Optional[SnapshotStore] = None,
+        router_id: Optional[str] = None,
+        cache: Optional[RuleTableCache] = None
+    ):
         """
         초기화
         
         Args:
             api_client: IptimeAPI 인스턴스
+            cache_ttl: 규칙 테이블 캐시 유효 시간(초). 0이면 추가/수정/검증 시마다 다시 조회
+            lan_network: 내부 IP 검증에 사용할 LAN 대역 (예: 192.168.0.0/24)
+            history: 조회한 규칙 테이블을 기록할 스냅샷 저장소 (선택)
+            router_id: 스냅샷 기록에 쓰는 공유기 식별자 (기본값: 공유기 URL)
+            cache: 공유할 규칙 테이블 캐시 (지정 시 cache_ttl 대신 캐시의 ttl 사용)
         """
         self.api = api_client
+        self.cache = cache if cache is not None else RuleTableCache(cache_ttl)
+        self.lan_network = lan_network
+        self.history = history
+        self.router_id = router_id or api_client.base_url
+        
+    def _fetch_port_forward_page(self) -> Optional[str]:
+        """포트포워드 설정 페이지 HTML 조회 (세션 타임아웃 시 재로그인)"""
+        # 포트포워드 페이지 요청 (세션 만료 시 _make_request가 재로그인 후 재시도)
+        response = self.api._make_request(
+            "sess-bin/timepro.cgi",
+            {"tmenu": "iframe", "smenu": "user_portforward", "mode": "user"}
+        )
+        
+        if not response:
+            return None
+        
+        # 디버그: 응답 내용 일부 출력
+        # logger.debug(f"포트포워드 페이지 응답 (처음 1000자): {response[:1000]}")
+        return response
+    
+    def _require_port_forward_page(self) -> str:
+        """
+        포트포워드 설정 페이지 HTML 조회 (실패 시 예외 발생)
+        
+        빈 응답이나 로그인/세션 만료 페이지를 규칙이 없는 테이블로 읽지 않도록 구분합니다.
+        
+        Raises:
+            Exception: 페이지를 가져오지 못했거나 포트포워드 페이지가 아님
+        """
+        page = self._fetch_port_forward_page()
+        if not page:
+            raise Exception("포트포워드 페이지를 가져오지 못했습니다")
+        if is_login_page(page):
+            raise Exception("포트포워드 페이지 대신 로그인 페이지를 받았습니다 (세션 만료)")
+        return page
+    
+    def iter_port_forward_rules(self) -> Iterator[Dict]:
+        """
+        포트포워드 규칙을 파싱되는 순서대로 하나씩 반환
+        
+        전체 목록을 만들지 않으므로 내보내기(export) 등 스트리밍 처리에 사용합니다.
+        
+        Yields:
+            포트포워드 규칙
+            
+        Raises:
+            Exception: 포트포워드 페이지 조회 실패 (첫 규칙을 반환하기 전에 발생)
+        """
+        yield from iter_port_forward_rules(self._require_port_forward_page())
+        
+    def fetch_port_forward_rules(self) -> List[Dict]:
+        """
+        현재 설정된 포트포워드 규칙 조회 (실패 시 예외 발생)
+        
+        조회에 실패한 결과는 캐시/스냅샷에 남기지 않습니다.
+        
+        Raises:
+            Exception: 포트포워드 페이지 조회 실패
+        """
+        rules = list(iter_port_forward_rules(self._require_port_forward_page()))
+        # logger.info(f"포트포워드 규칙 {len(rules)}개 조회 완료")
+        self._set_cache(rules)
+        return rules
         
     def get_port_forward_rules(self) -> List[Dict]:
         """현재 설정된 포트포워드 규칙 조회"""
         try:
-            # 포트포워드 페이지 요청
-            response = self.api._make_request(
-                "sess-bin/timepro.cgi",
-                {"tmenu": "iframe", "smenu": "user_portforward", "mode": "user"}
-            )
-            
-            if not response:
-                return []
-            
-            # 세션 타임아웃 체크
-            if 'login_session' in response and 'session_timeout' in response:
-                # logger.info("세션 타임아웃 감지, 재로그인 시도...")
-                pass
-                # 새로운 세션으로 재시도
-                self.api.session = requests.Session()
-                self.api.session.headers.update({
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                    'Accept-Language': 'ko-KR,ko;q=0.9,en;q=0.8',
-                    'Connection': 'keep-alive',
-                    'Cache-Control': 'no-cache'
-                })
-                
-                # 로그인 후 즉시 요청
-                login_data = {
-                    'init_status': '1',
-                    'captcha_on': '0',
-                    'captcha_file': '',
-                    'username': self.api.username,
-                    'passwd': self.api.password,
-                    'default_passwd': '초기암호:admin(변경필요)',
-                    'captcha_code': ''
-                }
-                
-                # 단일 세션에서 로그인과 데이터 요청을 연속으로 수행
-                login_resp = self.api.session.post(
-                    f"{self.api.base_url}/sess-bin/login_handler.cgi",
-                    data=login_data,
-                    verify=False,
-                    timeout=10
-                )
-                
-                # 로그인 직후 바로 데이터 요청 (세션 유지)
-                response = self.api.session.get(
-                    f"{self.api.base_url}/sess-bin/timepro.cgi",
-                    params={"tmenu": "iframe", "smenu": "user_portforward", "mode": "user"},
-                    verify=False,
-                    timeout=10
-                )
-                
-                if response.status_code == 200:
-                    response = response.text
-                else:
-                    logger.error(f"포트포워드 페이지 접근 실패: {response.status_code}")
-                    return []
-            
-            # 디버그: 응답 내용 일부 출력
-            # logger.debug(f"포트포워드 페이지 응답 (처음 1000자): {response[:1000]}")
-                
-            rules = []
-            
-            # HTML에서 포트포워드 규칙 파싱
-            # JavaScript onclick 이벤트에서 파라미터 추출
-            # onClickedPFRule('user','nas','0','192.168.0.12','tcp','28080','28080','8080','8080','','','','',false,'1','1', false)
-            # Parameters: mode, name, selserver, internal_ip, protocol, ext_sport, ext_eport, int_sport, int_eport,
-            #            tsport, teport, tfprotocol, tfrange, disabled, priority, wan, fixed
-            rule_pattern = re.compile(
-                r"onClickedPFRule\('user','([^']*?)','[^']*?','([^']*?)','([^']*?)','([^']*?)','([^']*?)','([^']*?)','([^']*?)'",
-                re.DOTALL
-            )
-            
-            matches = rule_pattern.findall(response)
-            
-            for i, match in enumerate(matches):
-                # match = (name, internal_ip, protocol, ext_sport, ext_eport, int_sport, int_eport)
-                name, internal_ip, protocol, ext_sport, ext_eport, int_sport, int_eport = match
-                
-                if internal_ip and ext_sport:  # 빈 규칙은 제외
-                    rules.append({
-                        'id': i + 1,  # Use index as ID since it's not in the params
-                        'description': name,
-                        'internal_ip': internal_ip,
-                        'protocol': protocol,
-                        'external_port': ext_sport,
-                        'internal_port': int_sport
-                    })
-                    
-            # logger.info(f"포트포워드 규칙 {len(rules)}개 조회 완료")
-            return rules
+            return self.fetch_port_forward_rules()
             
         except Exception as e:
             logger.error(f"포트포워드 규칙 조회 실패: {e}")
             return []
     
+    def get_cached_rules(self) -> List[Dict]:
+        """
+        캐시된 규칙 테이블 조회
+        
+        cache_ttl 이내에 조회한 테이블이 있으면 공유기에 요청하지 않고 그대로 반환합니다.
+        
+        Returns:
+            포트포워드 규칙 목록
+        """
+        rules = self.cache.get()
+        if rules is not None:
+            return rules
+        return self.get_port_forward_rules()
+    
+    def _set_cache(self, rules: List[Dict]):
+        self.cache.set(rules)
+        
+        if self.history is not None:
+            try:
+                self.history.record(self.router_id, rules)
+            except Exception as e:
+                logger.error(f"규칙 스냅샷 기록 실패: {e}")
+    
+    def invalidate_cache(self):
+        """규칙 테이블 캐시 무효화 (규칙 변경 후 호출)"""
+        self.cache.invalidate()
+    
+    def _resolve_rule(self, rule_id_or_name, expected_version: Optional[str] = None):
+        """
+        수정/삭제 대상 규칙 찾기
+        
+        expected_version이 있으면 id 대신 버전 토큰으로 규칙을 찾으므로 다른 클라이언트의
+        추가/삭제로 id가 밀려도 같은 규칙을 가리킵니다. 캐시에서 찾지 못한 경우에만
+        한 번 다시 조회하고, 그래도 없으면 VersionConflictError를 발생시킵니다.
+        
+        Returns:
+            (현재 규칙 목록, 대상 규칙 또는 None)
+        """
+        from_cache = self.cache.get() is not None
+        rules = self.get_cached_rules()
+        
+        if expected_version is None or expected_version == '*':
+            return rules, self._find_rule(rules, rule_id_or_name)
+        
+        target_rule = self._find_version(rules, rule_id_or_name, expected_version)
+        if not target_rule and from_cache:
+            # 캐시가 오래됐을 수 있으므로 한 번만 다시 조회
+            rules = self.get_port_forward_rules()
+            target_rule = self._find_version(rules, rule_id_or_name, expected_version)
+        
+        if not target_rule:
+            raise VersionConflictError(rule_id_or_name, expected_version, self._find_rule(rules, rule_id_or_name))
+        return rules, target_rule
+    
+    def _confirmed_rules(self, response: Optional[str], confirmed) -> Optional[List[Dict]]:
+        """
+        변경 요청 결과 확인
+        
+        POST 응답 페이지에 갱신된 규칙 테이블이 들어 있으면 그것으로 확인하고,
+        응답으로 확인할 수 없을 때만 한 번 다시 조회합니다.
+        
+        Args:
+            response: 변경 요청(POST) 응답 HTML
+            confirmed: 규칙 목록을 받아 변경이 반영됐는지 판단하는 함수
+            
+        Returns:
+            변경이 확인된 규칙 목록 또는 None (다시 조회하지 못한 경우도 None)
+        """
+        if response and is_port_forward_page(response):
+            rules = list(iter_port_forward_rules(response))
+            if confirmed(rules):
+                self._set_cache(rules)
+                return rules
+        
+        # logger.debug("응답 페이지로 확인 불가, 규칙 목록 재조회")
+        try:
+            # 조회 실패를 빈 테이블로 보면 삭제가 항상 확인되므로 get_port_forward_rules 대신 예외로 구분
+            rules = self.fetch_port_forward_rules()
+        except Exception as e:
+            logger.warning(f"변경 확인용 규칙 재조회 실패: {e}")
+            return None
+        return rules if confirmed(rules) else None
+    
+    def _confirm_rule(self, response: Optional[str], expected: Dict) -> Optional[Dict]:
+        """expected와 내용이 같은 규칙이 테이블에 있는지 확인하고 그 규칙을 반환"""
+        version = rule_version(expected)
+        rules = self._confirmed_rules(
+            response, lambda rules: any(rule['version'] == version for rule in rules)
+        )
+        if rules is None:
+            logger.warning(f"포트포워드 규칙 변경 확인 실패: {expected.get('description')}")
+            return None
+        return next(rule for rule in rules if rule['version'] == version)
+    
+    @staticmethod
+    def _find_version(rules: List[Dict], rule_id_or_name, version: str) -> Optional[Dict]:
+        """버전 토큰이 일치하는 규칙 찾기 (이름으로 지정한 경우 이름도 일치해야 함)"""
+        for rule in rules:
+            if rule.get('version') == version:
+                if isinstance(rule_id_or_name, str) and rule['description'] != rule_id_or_name:
+                    continue
+                return rule
+        return None
+    
+    @staticmethod
+    def _find_rule(rules: List[Dict], rule_id_or_name) -> Optional[Dict]:
+        """규칙 목록에서 ID (int) 또는 이름 (str)으로 규칙 찾기"""
+        key = 'description' if isinstance(rule_id_or_name, str) else 'id'
+        for rule in rules:
+            if rule[key] == rule_id_or_name:
+                return rule
+        return None
+    
+    def resolve_internal_ip(self, internal_ip):
+        """
+        내부 IP 대상(IP, LAN 클라이언트 호스트 이름 또는 MAC)을 IP로 변환
+        
+        공유기 세션의 LAN 클라이언트 색인을 사용하므로 색인이 유효하면 공유기에 요청하지 않습니다.
+        
+        Raises:
+            ValidationError: 색인에서 찾지 못함
+        """
+        if internal_ip is None or internal_ip == '':
+            return internal_ip
+        ip = self.api.resolve_host(str(internal_ip))
+        if ip is None:
+            raise ValidationError([client_error(internal_ip)])
+        return ip
+    
+    def validate_new_rule(
+        self,
+        description: str,
+        internal_ip: str,
+        external_port,
+        internal_port=None,
+        protocol: str = "tcp"
+    ) -> List[str]:
+        """
+        추가할 규칙을 캐시된 규칙 테이블 기준으로 검증
+        
+        Returns:
+            오류 메시지 목록 (비어 있으면 정상)
+        """
+        try:
+            internal_ip = self.resolve_internal_ip(internal_ip)
+        except ValidationError as e:
+            return e.errors
+        errors = check_rule_fields(
+            description, internal_ip, external_port, internal_port, protocol, self.lan_network
+        )
+        if errors:
+            return errors
+        
+        validator = RuleValidator(self.get_cached_rules(), self.lan_network)
+        return validator.check(description, internal_ip, external_port, internal_port, protocol)
+    
+    def validate_rule_update(
+        self,
+        rule_id_or_name,
+        description: str = None,
+        internal_ip: str = None,
+        external_port=None,
+        internal_port=None,
+        protocol: str = None,
+        expected_version: str = None
+    ) -> List[str]:
+        """
+        수정 후 규칙을 캐시된 규칙 테이블 기준으로 검증
+        
+        expected_version이 현재 규칙과 다르면 VersionConflictError가 발생합니다.
+        
+        Returns:
+            오류 메시지 목록 (비어 있으면 정상)
+        """
+        try:
+            internal_ip = self.resolve_internal_ip(internal_ip)
+        except ValidationError as e:
+            return e.errors
+        rules, target_rule = self._resolve_rule(rule_id_or_name, expected_version)
+        if not target_rule:
+            return [f"규칙을 찾을 수 없습니다: {rule_id_or_name}"]
+        
+        return self._check_update(rules, target_rule, description, internal_ip, external_port, internal_port, protocol)
+    
+    def _check_update(self, rules, target_rule, description, internal_ip, external_port, internal_port, protocol):
+        validator = RuleValidator(rules, self.lan_network)
+        return validator.check(
+            target_rule['description'] if description is None else description,
+            target_rule['internal_ip'] if internal_ip is None else internal_ip,
+            target_rule['external_port'] if external_port is None else external_port,
+            target_rule['internal_port'] if internal_port is None else internal_port,
+            target_rule['protocol'] if protocol is None else protocol,
+            exclude=target_rule
+        )
+    
     def get_port_forward_rule(self, rule_id_or_name) -> Optional[Dict]:
         """
         포트포워드 규칙 단건 조회
@@ -132,20 +385,7 @@ class PortForwardManager:
         Returns:
             찾은 규칙 또는 None
         """
-        rules = self.get_port_forward_rules()
-        
-        if isinstance(rule_id_or_name, str):
-            # 이름으로 찾기
-            for rule in rules:
-                if rule['description'] == rule_id_or_name:
-                    return rule
-        else:
-            # ID로 찾기
-            for rule in rules:
-                if rule['id'] == rule_id_or_name:
-                    return rule
-        
-        return None
+        return self._find_rule(self.get_port_forward_rules(), rule_id_or_name)
     
     def find_rule_by_name(self, name: str) -> Optional[Dict]:
         """
@@ -172,58 +412,123 @@ class PortForwardManager:
         rule = self.find_rule_by_name(name)
         return rule['id'] if rule else None
             
+    @staticmethod
+    def _build_add_data(
+        description: str,
+        internal_ip: str,
+        external_port: int,
+        internal_port: int,
+        protocol: str,
+        priority: int,
+        disabled: bool = False
+    ) -> Dict:
+        """규칙 추가(act=add) 요청 데이터 생성"""
+        # Similar to modify but with act=add
+        return {
+            'tmenu': 'iframe',
+            'smenu': 'user_portforward',
+            'act': 'add',
+            'view_mode': 'user',
+            'mode': 'user',
+            'name': description,
+            'int_sport': str(internal_port),
+            'int_eport': str(internal_port),
+            'ext_sport': str(external_port),
+            'ext_eport': str(external_port),
+            'trigger_protocol': '',
+            'trigger_sport': '',
+            'trigger_eport': '',
+            'forward_ports': '',
+            'forward_protocol': '',
+            'internal_ip': internal_ip,
+            'protocol': protocol,
+            'disabled': '1' if disabled else '0',
+            'priority': str(priority)
+        }
+            
+    @staticmethod
+    def _build_modify_data(rule: Dict, priority: int, old_priority: int = None) -> Dict:
+        """규칙 수정(act=modify) 요청 데이터 생성 (old_priority가 없으면 순서 유지, 활성/비활성 상태 유지)"""
+        # Based on actual payload: tmenu=iframe&smenu=user_portforward&act=modify&view_mode=user&mode=user
+        return {
+            'tmenu': 'iframe',
+            'smenu': 'user_portforward',
+            'act': 'modify',
+            'view_mode': 'user',
+            'mode': 'user',
+            'name': rule['description'],
+            'int_sport': str(rule['internal_port']),
+            'int_eport': str(rule['internal_port']),
+            'ext_sport': str(rule['external_port']),
+            'ext_eport': str(rule['external_port']),
+            'trigger_protocol': '',
+            'trigger_sport': '',
+            'trigger_eport': '',
+            'forward_ports': '',
+            'forward_protocol': '',
+            'internal_ip': rule['internal_ip'],
+            'protocol': rule['protocol'],
+            'disabled': '1' if rule.get('disabled') else '0',
+            'priority': str(priority),
+            'old_priority': str(priority if old_priority is None else old_priority)
+        }
+            
     def add_port_forward_rule(
         self,
         description: str,
         internal_ip: str,
         external_port: int,
         internal_port: int = None,
-        protocol: str = "tcp"
-    ) -> bool:
+        protocol: str = "tcp",
+        validate: bool = True,
+        verify: bool = False,
+        disabled: bool = False
+    ):
         """
         포트포워드 규칙 추가
         
         Args:
             description: 규칙 설명
-            internal_ip: 내부 IP 주소
+            internal_ip: 내부 IP 주소, LAN 클라이언트 호스트 이름 또는 MAC
             external_port: 외부 포트
             internal_port: 내부 포트 (없으면 external_port와 동일)
             protocol: 프로토콜 (tcp/udp/both)
+            validate: 전송 전 로컬 검증 (IP, 포트 중복, 이름 중복) 수행 여부
+            verify: 응답 페이지(필요 시 한 번의 재조회)로 규칙이 실제 추가됐는지 확인
+            disabled: 비활성 상태로 추가
             
         Returns:
-            성공 여부
+            성공 여부. verify=True이면 확인된 규칙 (확인 실패 시 None)
         """
         try:
             if internal_port is None:
                 internal_port = external_port
+            internal_ip = self.resolve_internal_ip(internal_ip)
+            
+            if validate:
+                errors = check_rule_fields(
+                    description, internal_ip, external_port, internal_port, protocol, self.lan_network
+                )
+                if errors:
+                    logger.warning(f"포트포워드 규칙 검증 실패: {'; '.join(errors)}")
+                    return False
                 
             # 현재 규칙 조회하여 새 priority 결정
-            current_rules = self.get_port_forward_rules()
+            current_rules = self.get_cached_rules()
             new_priority = len(current_rules) + 1
+            
+            if validate:
+                errors = RuleValidator(current_rules, self.lan_network).check(
+                    description, internal_ip, external_port, internal_port, protocol
+                )
+                if errors:
+                    logger.warning(f"포트포워드 규칙 검증 실패: {'; '.join(errors)}")
+                    return False
                     
             # 포트포워드 추가 데이터 준비
-            # Similar to modify but with act=add
-            data = {
-                'tmenu': 'iframe',
-                'smenu': 'user_portforward',
-                'act': 'add',
-                'view_mode': 'user',
-                'mode': 'user',
-                'name': description,
-                'int_sport': str(internal_port),
-                'int_eport': str(internal_port),
-                'ext_sport': str(external_port),
-                'ext_eport': str(external_port),
-                'trigger_protocol': '',
-                'trigger_sport': '',
-                'trigger_eport': '',
-                'forward_ports': '',
-                'forward_protocol': '',
-                'internal_ip': internal_ip,
-                'protocol': protocol,
-                'disabled': '0',
-                'priority': str(new_priority)
-            }
+            data = self._build_add_data(
+                description, internal_ip, external_port, internal_port, protocol, new_priority, bool(disabled)
+            )
                 
             # 설정 저장
             response = self.api._make_request(
@@ -234,51 +539,449 @@ class PortForwardManager:
             
             if response:
                 # logger.info(f"포트포워드 규칙 추가 성공: {description}")
+                self.invalidate_cache()
+                if verify:
+                    return self._confirm_rule(response, {
+                        'description': description,
+                        'internal_ip': internal_ip,
+                        'protocol': protocol,
+                        'external_port': str(external_port),
+                        'internal_port': str(internal_port),
+                        'disabled': bool(disabled)
+                    })
                 return True
                 
             return False
             
+        except ValidationError as e:
+            logger.warning(f"포트포워드 규칙 검증 실패: {'; '.join(e.errors)}")
+            return False
         except Exception as e:
             logger.error(f"포트포워드 규칙 추가 실패: {e}")
             return False
+    
+    def add_port_forward_rules(self, rules: Iterable[Dict], validate: bool = True) -> Iterator[Dict]:
+        """
+        여러 포트포워드 규칙 일괄 추가
+        
+        현재 규칙 목록은 한 번만 조회하고, 이후 규칙마다 priority를 이어서 부여하며
+        입력을 하나씩 소비하면서 바로 전송합니다. 입력과 결과 모두 스트리밍되므로
+        규칙 수와 관계없이 메모리 사용량이 일정합니다.
+        
+        Args:
+            rules: description, internal_ip, external_port, internal_port, protocol, disabled(선택) 키를 가진 규칙들
+            validate: 전송 전 로컬 검증 여부 (배치 안의 규칙끼리의 중복도 검사)
+            
+        Yields:
+            규칙별 결과 {'description': ..., 'success': bool}, 검증 실패 시 'errors' 포함
+        """
+        current_rules = self.get_cached_rules()
+        next_priority = len(current_rules) + 1
+        validator = RuleValidator(current_rules, self.lan_network) if validate else None
+        
+        for rule in rules:
+            description = rule.get('description', '')
+            success = False
+            try:
+                external_port = rule.get('external_port')
+                internal_port = rule.get('internal_port') or external_port
+                protocol = rule.get('protocol') or 'tcp'
+                try:
+                    internal_ip = self.resolve_internal_ip(rule.get('internal_ip'))
+                except ValidationError as e:
+                    yield {'description': description, 'success': False, 'errors': e.errors}
+                    continue
+                if validator:
+                    errors = validator.check(description, internal_ip, external_port, internal_port, protocol)
+                    if errors:
+                        yield {'description': description, 'success': False, 'errors': errors}
+                        continue
+                data = self._build_add_data(
+                    description,
+                    internal_ip,
+                    external_port,
+                    internal_port,
+                    protocol,
+                    next_priority,
+                    bool(rule.get('disabled'))
+                )
+                response = self.api._make_request(
+                    "sess-bin/timepro.cgi",
+                    data,
+                    method="POST"
+                )
+                success = bool(response)
+            except Exception as e:
+                logger.error(f"포트포워드 규칙 추가 실패 ({description}): {e}")
+            
+            if success:
+                next_priority += 1
+                self.invalidate_cache()
+                if validator:
+                    validator.add({
+                        'id': next_priority - 1,
+                        'description': description,
+                        'internal_ip': internal_ip,
+                        'protocol': protocol,
+                        'external_port': str(external_port),
+                        'internal_port': str(internal_port)
+                    })
+            yield {'description': description, 'success': success}
+    
+    def allocate_port_forward_rule(
+        self,
+        description: str,
+        internal_ip: str,
+        internal_port: int = None,
+        protocol: str = "tcp",
+        port_range=DEFAULT_ALLOCATE_RANGE,
+        verify: bool = False
+    ) -> Optional[Dict]:
+        """
+        비어 있는 외부 포트를 골라 규칙 추가
+        
+        규칙 테이블을 한 번 조회해 포트 구간 인덱스로 port_range에서 가장 작은 빈 포트를 찾고 바로 추가합니다.
+        다른 클라이언트와 경쟁하지 않으려면 공유기별 쓰기 잠금 안에서 호출해야 합니다 (API 서버는 write 세션 사용).
+        
+        Args:
+            internal_port: 내부 포트 (없으면 할당된 외부 포트와 동일)
+            port_range: 할당할 외부 포트 범위 (low, high)
+            verify: 응답 페이지(필요 시 한 번의 재조회)로 규칙이 실제 추가됐는지 확인
+            
+        Returns:
+            추가된 규칙 (external_port에 할당된 포트), 전송 실패 시 None.
+            빈 포트가 없으면 NoFreePortError, 검증 실패 시 ValidationError 발생
+        """
+        low, high = (int(port) for port in port_range)
+        try:
+            internal_ip = self.resolve_internal_ip(internal_ip)
+            # 조회 실패를 빈 테이블로 취급하면 사용 중인 포트를 할당하므로 실패 시 중단
+            current_rules = self.cache.get()
+            if current_rules is None:
+                current_rules = self.fetch_port_forward_rules()
+            
+            validator = RuleValidator(current_rules, self.lan_network)
+            external_port = validator.first_free(protocol, low, high)
+            if external_port is None:
+                raise NoFreePortError(protocol, low, high)
+            if internal_port is None:
+                internal_port = external_port
+            validator.validate(description, internal_ip, external_port, internal_port, protocol)
+            
+            rule = {
+                'description': description,
+                'internal_ip': internal_ip,
+                'protocol': protocol,
+                'external_port': str(external_port),
+                'internal_port': str(internal_port)
+            }
+            data = self._build_add_data(
+                description, internal_ip, external_port, internal_port, protocol, len(current_rules) + 1
+            )
+            response = self.api._make_request(
+                "sess-bin/timepro.cgi",
+                data,
+                method="POST"
+            )
+            if not response:
+                return None
+            
+            self.invalidate_cache()
+            if verify:
+                return self._confirm_rule(response, rule)
+            rule['version'] = rule_version(rule)
+            return rule
+            
+        except (NoFreePortError, ValidationError):
+            raise
+        except Exception as e:
+            logger.error(f"포트포워드 규칙 할당 실패 ({description}): {e}")
+            return None
+    
+    def retarget_rules(
+        self,
+        match: Callable[[Dict], bool],
+        internal_ip: str,
+        verify: bool = True,
+        dry_run: bool = False
+    ) -> Iterator[Dict]:
+        """
+        조건에 맞는 모든 규칙의 내부 IP를 한 번에 변경 (백엔드 호스트 장애 시 전환)
+        
+        규칙 테이블은 한 번만 조회하고 대상 규칙마다 수정 요청만 보냅니다.
+        수정은 순서(priority)를 바꾸지 않으므로 중간에 ID가 밀리지 않습니다.
+        verify이면 마지막 응답 페이지(필요 시 한 번의 재조회)로 전체 결과를 한 번에 확인합니다.
+        
+        Args:
+            match: 규칙을 받아 대상 여부를 반환하는 함수 (예: fleet.RuleFilter)
+            internal_ip: 새 내부 IP, LAN 클라이언트 호스트 이름 또는 MAC
+            verify: 변경 결과 확인 여부
+            dry_run: 요청을 보내지 않고 대상 규칙만 반환
+            
+        Yields:
+            규칙별 결과 {'rule', 'id', 'from', 'to', 'success'}, verify이면 'verified' 포함.
+            새 내부 IP가 올바르지 않으면 ValidationError 발생
+        """
+        internal_ip = self.resolve_internal_ip(internal_ip)
+        errors = check_internal_ip(internal_ip, self.lan_network)
+        if errors:
+            raise ValidationError(errors)
+        
+        # 조회 실패를 빈 테이블로 취급하면 아무것도 바꾸지 않고 성공으로 보이므로 예외 그대로 전달
+        rules = self.fetch_port_forward_rules()
+        plan = [rule for rule in rules if match(rule) and rule['internal_ip'] != internal_ip]
+        results = []
+        expected = {}
+        response = None
+        
+        for rule in plan:
+            changed = dict(rule, internal_ip=internal_ip)
+            result = {
+                'rule': rule['description'], 'id': rule['id'],
+                'from': rule['internal_ip'], 'to': internal_ip, 'success': False
+            }
+            results.append(result)
+            if dry_run:
+                continue
+            try:
+                page = self.api._make_request(
+                    "sess-bin/timepro.cgi",
+                    self._build_modify_data(changed, rule['id']),
+                    method="POST"
+                )
+            except Exception as e:
+                logger.error(f"포트포워드 규칙 전환 실패 ({rule['description']}): {e}")
+                page = None
+            if page:
+                result['success'] = True
+                response = page
+                expected[rule['description']] = rule_version(changed)
+        
+        if not dry_run and results:
+            self.invalidate_cache()
+            if verify and expected:
+                # 수정은 순서대로 반영되므로 마지막 응답 페이지의 테이블로 전체를 한 번에 확인
+                if response and is_port_forward_page(response):
+                    current = list(iter_port_forward_rules(response))
+                    self._set_cache(current)
+                else:
+                    current = self.get_port_forward_rules()
+                versions = {rule['description']: rule['version'] for rule in current}
+                for result in results:
+                    if result['success']:
+                        result['verified'] = versions.get(result['rule']) == expected[result['rule']]
+        
+        yield from results
+    
+    def reorder_rules(self, order: List, verify: bool = True, dry_run: bool = False) -> Iterator[Dict]:
+        """
+        규칙 순서 변경 (최소 이동)
+        
+        order에 지정한 규칙이 그 순서대로 맨 앞에 오고, 나머지 규칙은 현재 순서대로 그 뒤에 옵니다.
+        현재 순서와 비교해 위치가 증가하는 가장 긴 부분열(LIS)은 그대로 두고 나머지만 수정 요청
+        (priority/old_priority)으로 옮기므로 필요한 쓰기 수가 최소입니다.
+        
+        Args:
+            order: 원하는 순서의 규칙 ID 또는 이름 목록 (ID는 현재 테이블 기준)
+            verify: 마지막 응답 페이지(필요 시 한 번의 재조회)로 최종 순서 확인
+            dry_run: 요청을 보내지 않고 이동 목록만 반환
+            
+        Yields:
+            이동별 결과 {'rule', 'from', 'to', 'success'} (앞 이동이 실패하면 뒤 이동은 'skipped'),
+            verify이면 최종 순서 확인 결과 'verified' 포함.
+            없는 규칙이나 중복이 있으면 ValidationError 발생
+        """
+        rules = self.fetch_port_forward_rules()
+        
+        errors = []
+        listed = []
+        for rule_id_or_name in order:
+            rule = self._find_rule(rules, rule_id_or_name)
+            if rule is None:
+                errors.append(f"order: 규칙을 찾을 수 없습니다 ({rule_id_or_name})")
+            elif rule['id'] in listed:
+                errors.append(f"order: 같은 규칙이 두 번 있습니다 ({rule_id_or_name})")
+            else:
+                listed.append(rule['id'])
+        if errors:
+            raise ValidationError(errors)
+        
+        current = [rule['id'] for rule in rules]
+        listed_ids = set(listed)
+        target = listed + [rule_id for rule_id in current if rule_id not in listed_ids]
+        by_id = {rule['id']: rule for rule in rules}
+        
+        results = []
+        response = None
+        failed = False
+        for rule_id, old_priority, new_priority in plan_moves(current, target):
+            rule = by_id[rule_id]
+            result = {'rule': rule['description'], 'from': old_priority, 'to': new_priority, 'success': False}
+            results.append(result)
+            if dry_run:
+                continue
+            if failed:
+                # 앞 이동이 실패하면 이후 위치 계산이 맞지 않으므로 중단
+                result['skipped'] = True
+                continue
+            try:
+                page = self.api._make_request(
+                    "sess-bin/timepro.cgi",
+                    self._build_modify_data(rule, new_priority, old_priority),
+                    method="POST"
+                )
+            except Exception as e:
+                logger.error(f"포트포워드 규칙 이동 실패 ({rule['description']}): {e}")
+                page = None
+            if page:
+                result['success'] = True
+                response = page
+            else:
+                failed = True
+        
+        if not dry_run and results:
+            self.invalidate_cache()
+            if verify and not failed:
+                # 이동은 순서대로 반영되므로 마지막 응답 페이지의 테이블로 최종 순서를 한 번에 확인
+                expected = [by_id[rule_id]['version'] for rule_id in target]
+                verified = self._confirmed_rules(
+                    response, lambda rules: [rule['version'] for rule in rules] == expected
+                ) is not None
+                for result in results:
+                    result['verified'] = verified
+        
+        yield from results
+    
+    def apply_plan(self, operations: Iterable[Dict], validate: bool = True) -> Iterator[Dict]:
+        """
+        변경 작업 목록을 순서대로 적용
+        
+        Args:
+            operations: 작업 목록. 각 작업은 'op' 키로 종류를 지정
+                - {'op': 'add', 'description', 'internal_ip', 'external_port', 'internal_port', 'protocol', 'disabled'}
+                - {'op': 'update', 'rule': ID 또는 이름, 바꿀 필드..., 'if_match': 버전 토큰(선택)}
+                - {'op': 'delete', 'rule': ID 또는 이름, 'if_match': 버전 토큰(선택)}
+                - {'op': 'enable' 또는 'disable', 'rule': ID 또는 이름, 'if_match': 버전 토큰(선택)}
+            validate: 전송 전 로컬 검증 여부
+            
+        Yields:
+            작업별 결과 {'op', 'rule', 'success'}, 검증 실패 시 'errors', 버전 불일치 시 'conflict' 포함
+        """
+        for operation in operations:
+            op = operation.get('op')
+            target = operation.get('rule', operation.get('description'))
+            result = {'op': op, 'rule': target, 'success': False}
+            try:
+                if op == 'add':
+                    fields = (
+                        operation.get('description', ''), operation.get('internal_ip'),
+                        operation.get('external_port'),
+                        operation.get('internal_port') or operation.get('external_port'),
+                        operation.get('protocol') or 'tcp'
+                    )
+                    errors = self.validate_new_rule(*fields) if validate else []
+                    if errors:
+                        result['errors'] = errors
+                    else:
+                        result['success'] = bool(self.add_port_forward_rule(
+                            *fields, validate=False, disabled=bool(operation.get('disabled'))
+                        ))
+                        
+                elif op == 'update':
+                    changes = {
+                        field: operation.get(field)
+                        for field in ('description', 'internal_ip', 'external_port', 'internal_port', 'protocol')
+                    }
+                    errors = self.validate_rule_update(
+                        target, expected_version=operation.get('if_match'), **changes
+                    ) if validate else []
+                    if errors:
+                        result['errors'] = errors
+                    else:
+                        result['success'] = bool(self.update_port_forward_rule(
+                            target, validate=False, expected_version=operation.get('if_match'),
+                            disabled=operation.get('disabled'), **changes
+                        ))
+                        
+                elif op in ('enable', 'disable'):
+                    result['success'] = bool(self.update_port_forward_rule(
+                        target, validate=False, expected_version=operation.get('if_match'),
+                        disabled=op == 'disable'
+                    ))
+                        
+                elif op == 'delete':
+                    result['success'] = bool(self.delete_port_forward_rule(
+                        target, expected_version=operation.get('if_match')
+                    ))
+                    
+                else:
+                    result['errors'] = [f"op: add/update/delete/enable/disable 중 하나여야 합니다 ({op!r})"]
+                    
+            except VersionConflictError as e:
+                result['conflict'] = {'expected_version': e.expected_version, 'current': e.current}
+            except Exception as e:
+                logger.error(f"작업 적용 실패 ({op} {target}): {e}")
+                result['errors'] = [str(e)]
+            
+            yield result
+    
+    def export_rules(self, fp: IO[str], fmt: str = "ndjson") -> int:
+        """
+        포트포워드 규칙 내보내기
+        
+        규칙은 페이지에서 파싱되는 즉시 한 줄씩 기록됩니다.
+        
+        Args:
+            fp: 출력 텍스트 스트림
+            fmt: 출력 형식 (ndjson/csv)
+            
+        Returns:
+            기록한 규칙 수
+            
+        Raises:
+            Exception: 포트포워드 페이지 조회 실패 (fp에는 아무것도 기록하지 않음)
+        """
+        return write_rules(self.iter_port_forward_rules(), fp, fmt)
+    
+    def import_rules(self, fp: IO[str], fmt: str = "ndjson", validate: bool = True) -> Iterator[Dict]:
+        """
+        포트포워드 규칙 가져오기
+        
+        입력 스트림을 한 줄씩 읽어 일괄 추가 경로(add_port_forward_rules)로 전달합니다.
+        
+        Args:
+            fp: 입력 텍스트 스트림 (export_rules 출력 형식)
+            fmt: 입력 형식 (ndjson/csv)
+            validate: 전송 전 로컬 검증 여부
+            
+        Yields:
+            규칙별 결과 {'description': ..., 'success': bool}
+        """
+        return self.add_port_forward_rules(read_rules(fp, fmt), validate=validate)
             
-    def delete_port_forward_rule(self, rule_id_or_name) -> bool:
+    def delete_port_forward_rule(
+        self,
+        rule_id_or_name,
+        expected_version: str = None,
+        verify: bool = False
+    ) -> bool:
         """
         포트포워드 규칙 삭제
         
         Args:
             rule_id_or_name: 삭제할 규칙 ID (int) 또는 이름 (str)
+            expected_version: 클라이언트가 알고 있는 규칙 버전 토큰 (다르면 VersionConflictError)
+            verify: 응답 페이지(필요 시 한 번의 재조회)로 규칙이 실제 삭제됐는지 확인
             
         Returns:
             성공 여부
         """
         try:
-            # 현재 규칙 조회
-            current_rules = self.get_port_forward_rules()
-            
-            # ID 또는 이름으로 규칙 찾기
-            if isinstance(rule_id_or_name, str):
-                # 이름으로 찾기
-                target_rule = None
-                for rule in current_rules:
-                    if rule['description'] == rule_id_or_name:
-                        target_rule = rule
-                        rule_id = rule['id']
-                        break
-                if not target_rule:
-                    logger.warning(f"규칙 이름 '{rule_id_or_name}'을 찾을 수 없습니다")
-                    return False
-            else:
-                # ID로 찾기
-                rule_id = rule_id_or_name
-                target_rule = None
-                for rule in current_rules:
-                    if rule['id'] == rule_id:
-                        target_rule = rule
-                        break
-                if not target_rule:
-                    logger.warning(f"규칙 ID {rule_id}가 존재하지 않습니다")
-                    return False
+            # ID 또는 이름(또는 버전 토큰)으로 규칙 찾기
+            current_rules, target_rule = self._resolve_rule(rule_id_or_name, expected_version)
+            if not target_rule:
+                logger.warning(f"규칙 '{rule_id_or_name}'을 찾을 수 없습니다")
+                return False
                 
             # 포트포워드 삭제 데이터 준비
             # Based on actual payload: act=del with delcheck parameter containing the rule name
@@ -306,19 +1009,31 @@ class PortForwardManager:
                 'delcheck': target_rule['description']  # The rule name to delete
             }
                     
-            # 설정 저장
+            # 설정 저장 (이름으로 삭제하므로 세션 만료 후 다시 보내도 같은 결과)
             response = self.api._make_request(
                 "sess-bin/timepro.cgi",
                 data,
-                method="POST"
+                method="POST",
+                repeatable=True
             )
             
             if response:
-                # logger.info(f"포트포워드 규칙 ID {rule_id} 삭제 성공")
+                # logger.info(f"포트포워드 규칙 '{rule_id_or_name}' 삭제 성공")
+                self.invalidate_cache()
+                if verify:
+                    name = target_rule['description']
+                    rules = self._confirmed_rules(
+                        response, lambda rules: all(rule['description'] != name for rule in rules)
+                    )
+                    if rules is None:
+                        logger.warning(f"포트포워드 규칙 삭제 확인 실패: {name}")
+                        return False
                 return True
                 
             return False
             
+        except VersionConflictError:
+            raise
         except Exception as e:
             logger.error(f"포트포워드 규칙 삭제 실패: {e}")
             return False
@@ -330,49 +1045,49 @@ class PortForwardManager:
         internal_ip: str = None,
         external_port: int = None,
         internal_port: int = None,
-        protocol: str = None
-    ) -> bool:
+        protocol: str = None,
+        validate: bool = True,
+        expected_version: str = None,
+        verify: bool = False,
+        disabled: bool = None
+    ):
         """
         포트포워드 규칙 수정
         
         Args:
             rule_id_or_name: 수정할 규칙 ID (int) 또는 이름 (str)
             description: 새 설명 (옵션)
-            internal_ip: 새 내부 IP (옵션)
+            internal_ip: 새 내부 IP, LAN 클라이언트 호스트 이름 또는 MAC (옵션)
             external_port: 새 외부 포트 (옵션)
             internal_port: 새 내부 포트 (옵션)
             protocol: 새 프로토콜 (옵션)
+            validate: 전송 전 로컬 검증 (IP, 포트 중복, 이름 중복) 수행 여부
+            expected_version: 클라이언트가 알고 있는 규칙 버전 토큰 (다르면 VersionConflictError)
+            verify: 응답 페이지(필요 시 한 번의 재조회)로 변경이 실제 반영됐는지 확인
+            disabled: True이면 비활성화, False이면 활성화 (옵션, 없으면 현재 상태 유지)
             
         Returns:
-            성공 여부
+            성공 여부. verify=True이면 확인된 규칙 (확인 실패 시 None)
         """
         try:
-            # 현재 규칙 조회
-            current_rules = self.get_port_forward_rules()
-            
-            # ID 또는 이름으로 규칙 찾기
-            if isinstance(rule_id_or_name, str):
-                # 이름으로 찾기
-                target_rule = None
-                for rule in current_rules:
-                    if rule['description'] == rule_id_or_name:
-                        target_rule = rule
-                        rule_id = rule['id']
-                        break
-                if not target_rule:
-                    logger.warning(f"규칙 이름 '{rule_id_or_name}'을 찾을 수 없습니다")
-                    return False
-            else:
-                # ID로 찾기
-                rule_id = rule_id_or_name
-                target_rule = None
-                for rule in current_rules:
-                    if rule['id'] == rule_id:
-                        target_rule = rule
-                        break
-                if not target_rule:
-                    logger.warning(f"규칙 ID {rule_id}가 존재하지 않습니다")
+            internal_ip = self.resolve_internal_ip(internal_ip)
+            # ID 또는 이름(또는 버전 토큰)으로 규칙 찾기
+            current_rules, target_rule = self._resolve_rule(rule_id_or_name, expected_version)
+            if not target_rule:
+                logger.warning(f"규칙 '{rule_id_or_name}'을 찾을 수 없습니다")
+                return False
+            rule_id = target_rule['id']
+            
+            if validate:
+                errors = self._check_update(
+                    current_rules, target_rule, description, internal_ip, external_port, internal_port, protocol
+                )
+                if errors:
+                    logger.warning(f"포트포워드 규칙 검증 실패: {'; '.join(errors)}")
                     return False
+            
+            # 캐시된 규칙을 직접 바꾸지 않도록 복사
+            target_rule = dict(target_rule)
                 
             # 업데이트할 값 설정
             if description is not None:
@@ -385,31 +1100,11 @@ class PortForwardManager:
                 target_rule['internal_port'] = str(internal_port)
             if protocol is not None:
                 target_rule['protocol'] = protocol
+            if disabled is not None:
+                target_rule['disabled'] = bool(disabled)
                 
             # 포트포워드 수정 데이터 준비
-            # Based on actual payload: tmenu=iframe&smenu=user_portforward&act=modify&view_mode=user&mode=user
-            data = {
-                'tmenu': 'iframe',
-                'smenu': 'user_portforward',
-                'act': 'modify',
-                'view_mode': 'user',
-                'mode': 'user',
-                'name': target_rule['description'],
-                'int_sport': target_rule['internal_port'],
-                'int_eport': target_rule['internal_port'],
-                'ext_sport': target_rule['external_port'],
-                'ext_eport': target_rule['external_port'],
-                'trigger_protocol': '',
-                'trigger_sport': '',
-                'trigger_eport': '',
-                'forward_ports': '',
-                'forward_protocol': '',
-                'internal_ip': target_rule['internal_ip'],
-                'protocol': target_rule['protocol'],
-                'disabled': '0',
-                'priority': str(rule_id),
-                'old_priority': str(rule_id)
-            }
+            data = self._build_modify_data(target_rule, rule_id)
                 
             # 설정 저장
             response = self.api._make_request(
@@ -420,10 +1115,18 @@ class PortForwardManager:
             
             if response:
                 # logger.info(f"포트포워드 규칙 ID {rule_id} 수정 성공")
+                self.invalidate_cache()
+                if verify:
+                    return self._confirm_rule(response, target_rule)
                 return True
                 
             return False
             
+        except VersionConflictError:
+            raise
+        except ValidationError as e:
+            logger.warning(f"포트포워드 규칙 검증 실패: {'; '.join(e.errors)}")
+            return False
         except Exception as e:
             logger.error(f"포트포워드 규칙 수정 실패: {e}")
             return False
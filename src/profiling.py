@@ -0,0 +1,142 @@
+"""
+프로파일링 모듈
+한 번의 CLI 실행이나 API 요청 동안 cProfile 데이터와 구간별(네트워크/파싱/직렬화) 경과 시간을 수집합니다.
+"""
+import cProfile
+import io
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+# 구간 이름
+NETWORK = 'network'
+PARSE = 'parse'
+SERIALIZE = 'serialize'
+PHASES = (NETWORK, PARSE, SERIALIZE)
+
+# 현재 실행 흐름에서 수집 중인 프로파일러 (스레드/컨텍스트마다 따로)
+_active: ContextVar[Optional['Profiler']] = ContextVar('iptime_profiler', default=None)
+
+# cProfile은 프로세스에서 동시에 하나만 켤 수 있음 (Python 3.12+)
+_cprofile_lock = threading.Lock()
+
+
+def add_time(phase: str, seconds: float):
+    """수집 중인 프로파일러가 있으면 구간 시간 누적"""
+    profiler = _active.get()
+    if profiler is not None:
+        profiler.phases[phase] = profiler.phases.get(phase, 0.0) + seconds
+        profiler.counts[phase] = profiler.counts.get(phase, 0) + 1
+
+
+@contextmanager
+def phase(name: str):
+    """구간 시간 측정 (수집 중이 아니면 시간 측정도 하지 않음)"""
+    if _active.get() is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_time(name, time.perf_counter() - start)
+
+
+class Profiler:
+    """
+    프로파일러
+
+    with 블록 동안 현재 스레드의 cProfile 데이터와 구간별 시간을 수집합니다.
+    다른 스레드(전체 공유기 조회, 비동기 작업 워커)에서 실행된 부분은 포함되지 않습니다.
+    """
+
+    def __init__(self, cprofile: bool = True):
+        """
+        초기화
+
+        Args:
+            cprofile: cProfile 함수별 통계 수집 여부 (False면 구간 시간만)
+        """
+        self.phases: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self.wall_seconds = 0.0
+        self._want_cprofile = cprofile
+        self._profile: Optional[cProfile.Profile] = None
+        self._token = None
+        self._start = 0.0
+
+    def start(self):
+        if self._want_cprofile and _cprofile_lock.acquire(blocking=False):
+            self._profile = cProfile.Profile()
+            try:
+                self._profile.enable()
+            except ValueError:  # 다른 프로파일러가 이미 동작 중
+                self._profile = None
+                _cprofile_lock.release()
+        self._token = _active.set(self)
+        self._start = time.perf_counter()
+        return self
+
+    def stop(self):
+        self.wall_seconds = time.perf_counter() - self._start
+        if self._token is not None:
+            _active.reset(self._token)
+            self._token = None
+        if self._profile is not None:
+            self._profile.disable()
+            _cprofile_lock.release()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def breakdown(self) -> Dict[str, float]:
+        """구간별 경과 시간(초), 나머지는 'other'"""
+        result = {name: round(self.phases.get(name, 0.0), 6) for name in PHASES}
+        result['other'] = round(max(0.0, self.wall_seconds - sum(self.phases.values())), 6)
+        result['wall'] = round(self.wall_seconds, 6)
+        return result
+
+    def server_timing(self) -> str:
+        """Server-Timing 헤더 값 (밀리초)"""
+        return ', '.join(
+            f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.breakdown().items()
+        )
+
+    def top_functions(self, limit: int = 20, sort: str = 'cumulative') -> List[Dict]:
+        """cProfile 상위 함수 (cProfile을 수집하지 못했으면 빈 목록)"""
+        if self._profile is None:
+            return []
+        stats = pstats.Stats(self._profile, stream=io.StringIO())
+        stats.sort_stats(sort)
+        result = []
+        for func in stats.fcn_list[:limit]:
+            calls, primitive_calls, total_time, cumulative_time, _ = stats.stats[func]
+            filename, line, name = func
+            result.append({
+                'function': f"{filename}:{line}({name})",
+                'calls': calls,
+                'total_seconds': round(total_time, 6),
+                'cumulative_seconds': round(cumulative_time, 6),
+            })
+        return result
+
+    def report(self, limit: int = 20) -> Dict:
+        """구간별 시간, 구간별 호출 수, cProfile 상위 함수"""
+        return {
+            'breakdown': self.breakdown(),
+            'counts': dict(self.counts),
+            'top': self.top_functions(limit),
+        }
+
+    def dump(self, path: str) -> bool:
+        """cProfile 데이터를 pstats 파일로 저장 (snakeviz, pstats로 분석)"""
+        if self._profile is None:
+            return False
+        self._profile.dump_stats(path)
+        return True
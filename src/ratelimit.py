@@ -0,0 +1,163 @@
+"""
+공유기 요청 속도 제한 및 수용 제어 모듈
+공유기별 토큰 버킷과 동시 실행 수 제한, 대기열 크기 제한을 제공합니다.
+"""
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+
+class QueueFullError(Exception):
+    """대기열이 가득 차서 요청을 받을 수 없음"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"공유기 요청 대기열이 가득 찼습니다 (retry after {retry_after:.0f}s)")
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """토큰 버킷 (초당 rate개 보충, 최대 burst개 저장)"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout: float = None) -> bool:
+        """
+        토큰 하나 획득 (없으면 보충될 때까지 대기)
+
+        Returns:
+            timeout 안에 획득했으면 True
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+class RouterLimiter:
+    """
+    공유기 하나에 대한 수용 제어
+
+    동시에 공유기를 사용하는 요청은 max_concurrency개, 시작 속도는 토큰 버킷으로 제한하고
+    기다리는 요청이 max_queue개를 넘으면 바로 QueueFullError로 거절합니다.
+    """
+
+    def __init__(
+        self,
+        rate: float = 2.0,
+        burst: int = 4,
+        max_concurrency: int = 2,
+        max_queue: int = 16,
+        queue_timeout: float = 30.0
+    ):
+        """
+        초기화
+
+        Args:
+            rate: 초당 허용 요청 수
+            burst: 순간 허용 요청 수
+            max_concurrency: 동시에 공유기를 사용하는 요청 수
+            max_queue: 대기열 크기 (초과 시 거절)
+            queue_timeout: 대기열에서 기다리는 최대 시간(초)
+        """
+        self.bucket = TokenBucket(rate, burst)
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._in_flight = 0
+        self._stats = {
+            'admitted': 0,
+            'rejected': 0,
+            'timed_out': 0,
+            'wait_seconds_total': 0.0,
+            'wait_seconds_max': 0.0,
+        }
+
+    def _retry_after(self) -> float:
+        # 대기 중인 요청이 모두 처리될 때까지의 예상 시간
+        return max(1, math.ceil((self._queued + 1) / self.bucket.rate))
+
+    @contextmanager
+    def slot(self):
+        """
+        공유기 사용 구간
+
+        Raises:
+            QueueFullError: 대기열이 가득 찼거나 queue_timeout 안에 차례가 오지 않음
+        """
+        with self._lock:
+            if self._queued >= self.max_queue:
+                self._stats['rejected'] += 1
+                raise QueueFullError(self._retry_after())
+            self._queued += 1
+
+        start = time.monotonic()
+        acquired = self._semaphore.acquire(timeout=self.queue_timeout)
+        if acquired:
+            remaining = self.queue_timeout - (time.monotonic() - start)
+            if remaining <= 0 or not self.bucket.acquire(timeout=remaining):
+                self._semaphore.release()
+                acquired = False
+        waited = time.monotonic() - start
+
+        with self._lock:
+            self._queued -= 1
+            if not acquired:
+                self._stats['timed_out'] += 1
+                retry_after = self._retry_after()
+            else:
+                self._in_flight += 1
+                self._stats['admitted'] += 1
+                self._stats['wait_seconds_total'] += waited
+                self._stats['wait_seconds_max'] = max(self._stats['wait_seconds_max'], waited)
+        if not acquired:
+            raise QueueFullError(retry_after)
+
+        try:
+            yield waited
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict:
+        """대기열/대기 시간 지표"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['queued'] = self._queued
+            stats['in_flight'] = self._in_flight
+            stats['wait_seconds_avg'] = (
+                stats['wait_seconds_total'] / stats['admitted'] if stats['admitted'] else 0.0
+            )
+            stats['limits'] = {
+                'rate': self.bucket.rate,
+                'burst': self.bucket.burst,
+                'max_concurrency': self.max_concurrency,
+                'max_queue': self.max_queue,
+                'queue_timeout': self.queue_timeout,
+            }
+            return stats
@@ -0,0 +1,420 @@
+"""
+공유기 레지스트리
+여러 공유기를 설정 파일로 등록하고, 공유기마다 로그인 세션 풀, 규칙 캐시, 요청 제한을 관리합니다.
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import ExitStack, contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from .clients import ClientIndex, is_address
+from .history import SnapshotStore
+from .iptime_api import IptimeAPI
+from .port_forward import PortForwardManager, RuleTableCache
+from .ratelimit import RouterLimiter
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+
+class SessionPool:
+    """
+    로그인된 IptimeAPI 세션 풀
+
+    요청마다 로그인/로그아웃하지 않고 로그인된 세션을 재사용합니다.
+    session_ttl보다 오래 쉬고 있던 세션은 공유기에서 만료됐을 수 있으므로 다시 로그인합니다.
+    """
+
+    def __init__(self, host: str, username: str, password: str, size: int = 2, session_ttl: float = 300,
+                 clients: Optional[ClientIndex] = None):
+        """
+        초기화
+
+        Args:
+            host: 공유기 IP 주소 또는 URL
+            username: 관리자 계정
+            password: 관리자 비밀번호
+            size: 최대 세션 수
+            session_ttl: 재로그인 없이 재사용할 유휴 시간(초)
+            clients: 풀의 모든 세션이 공유할 LAN 클라이언트 색인
+        """
+        self.host = host
+        self.username = username
+        self.password = password
+        self.size = size
+        self.session_ttl = session_ttl
+        self.clients = clients if clients is not None else ClientIndex()
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _acquire(self, timeout: float):
+        """(세션, 마지막 사용 시각) - 새로 만든 세션은 마지막 사용 시각이 None"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                return IptimeAPI(self.host, self.username, self.password, self.clients), None
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise Exception("No router session available") from None
+
+    def _discard(self, api: Optional[IptimeAPI] = None):
+        with self._lock:
+            self._created -= 1
+        if api is not None and api.logged_in:
+            api.logout()
+
+    @contextmanager
+    def session(self, timeout: float = 30) -> Iterator[IptimeAPI]:
+        """
+        로그인된 세션 사용
+
+        Raises:
+            Exception: 로그인 실패
+        """
+        api, last_used = self._acquire(timeout)
+        try:
+            if last_used is None or time.monotonic() - last_used > self.session_ttl:
+                if not api.login():
+                    raise Exception("Failed to login to router")
+                api.logged_in = True
+        except BaseException:
+            self._discard()
+            raise
+
+        try:
+            yield api
+        except BaseException:
+            # 오류가 난 세션은 상태를 알 수 없으므로 로그아웃 후 버림
+            self._discard(api)
+            raise
+        self._idle.put((api, time.monotonic()))
+
+    def warm(self, count: Optional[int] = None) -> int:
+        """
+        세션을 미리 로그인해 유휴 상태로 둠 (첫 요청이 로그인을 기다리지 않도록)
+
+        Args:
+            count: 미리 로그인할 세션 수 (기본값/최대: 풀 크기)
+
+        Returns:
+            로그인된 유휴 세션 수
+
+        Raises:
+            Exception: 로그인 실패
+        """
+        count = self.size if count is None else min(count, self.size)
+        # 세션을 동시에 잡고 있어야 같은 세션을 다시 받지 않고 서로 다른 세션이 로그인됨
+        with ExitStack() as stack:
+            for _ in range(count):
+                stack.enter_context(self.session())
+        return self._idle.qsize()
+
+    def close(self):
+        """유휴 세션 로그아웃"""
+        while True:
+            try:
+                api, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(api)
+
+    def stats(self) -> Dict:
+        return {'size': self.size, 'created': self._created, 'idle': self._idle.qsize()}
+
+
+class RouterContext:
+    """공유기 하나의 설정과 세션 풀, 규칙 캐시, 요청 제한, 쓰기 잠금"""
+
+    def __init__(self, router_id: str, config: Dict, history: Optional[SnapshotStore] = None):
+        """
+        초기화
+
+        Args:
+            router_id: 공유기 식별자 (URL 경로에 사용)
+            config: 공유기 설정 (host, username, password, lan_network, cache_ttl, pool_size,
+                    rate_limit, burst, max_concurrency, max_queue, queue_timeout, client_ttl)
+            history: 규칙 스냅샷 저장소 (선택)
+        """
+        self.router_id = router_id
+        self.host = config['host']
+        self.username = config.get('username', 'admin')
+        self.lan_network = config.get('lan_network')
+        self.history = history
+        # LAN 클라이언트 색인 (호스트 이름/MAC 대상 변환, 풀의 모든 세션이 공유)
+        self.clients = ClientIndex(float(config.get('client_ttl', 600)))
+        self.pool = SessionPool(
+            self.host,
+            self.username,
+            config.get('password', ''),
+            size=int(config.get('pool_size', 2)),
+            session_ttl=float(config.get('session_ttl', 300)),
+            clients=self.clients
+        )
+        self.cache = RuleTableCache(float(config.get('cache_ttl', 5)))
+        self.limiter = RouterLimiter(
+            rate=float(config.get('rate_limit', 2)),
+            burst=int(config.get('burst', 4)),
+            max_concurrency=int(config.get('max_concurrency', 2)),
+            max_queue=int(config.get('max_queue', 16)),
+            queue_timeout=float(config.get('queue_timeout', 30))
+        )
+        # 규칙 추가/수정/삭제는 priority 계산이 겹치지 않도록 공유기별로 직렬화
+        self.write_lock = threading.RLock()
+        # 시스템 정보는 거의 바뀌지 않으므로 따로 오래 캐시
+        self.system_info_ttl = float(config.get('system_info_ttl', 300))
+        self._system_info: Optional[Dict] = None
+        self._system_info_at = 0.0
+        # 마지막 점검(워밍업) 결과, 점검 진행 중 여부
+        self.probe: Optional[Dict] = None
+        self.warming = False
+
+    def manager(self, api: IptimeAPI) -> PortForwardManager:
+        """세션에 연결된 포트포워드 매니저 (캐시/기록은 공유기 단위로 공유)"""
+        return PortForwardManager(
+            api,
+            lan_network=self.lan_network,
+            history=self.history,
+            router_id=self.router_id,
+            cache=self.cache
+        )
+
+    @contextmanager
+    def session(self, write: bool = False) -> Iterator[IptimeAPI]:
+        """
+        풀에서 로그인된 세션 사용
+
+        Args:
+            write: 규칙 변경 작업 여부 (공유기별 쓰기 잠금 획득)
+        """
+        if write:
+            with self.write_lock, self.pool.session() as api:
+                # 다른 클라이언트가 바꿨을 수 있으므로 변경 작업은 새로 조회한 테이블 기준
+                # (같은 요청 안의 검증과 변경은 그 조회 결과를 함께 사용)
+                self.cache.invalidate()
+                yield api
+        else:
+            with self.pool.session() as api:
+                yield api
+
+    def get_rules(self, session_timeout: float = 30) -> List[Dict]:
+        """
+        규칙 테이블 조회 (캐시가 유효하면 공유기에 접속하지 않음)
+
+        Raises:
+            QueueFullError: 공유기 요청 대기열이 가득 참
+            Exception: 로그인 또는 규칙 조회 실패
+        """
+        rules = self.cache.get()
+        if rules is not None:
+            return rules
+        with self.limiter.slot(), self.pool.session(session_timeout) as api:
+            return self.manager(api).fetch_port_forward_rules()
+
+    def cached_system_info(self) -> Optional[Dict]:
+        """유효한 캐시가 있으면 시스템 정보, 없으면 None"""
+        if self._system_info is not None and time.monotonic() - self._system_info_at < self.system_info_ttl:
+            return self._system_info
+        return None
+
+    def set_system_info(self, info: Optional[Dict]):
+        if info:
+            self._system_info = info
+            self._system_info_at = time.monotonic()
+
+    def resolve_host(self, target: str) -> Optional[str]:
+        """
+        내부 IP 대상(IP, 호스트 이름, MAC)을 IP로 변환
+
+        색인이 유효하면 공유기에 접속하지 않고, 새로 읽어야 할 때만 풀의 세션으로 한 번 조회합니다.
+        (요청 제한 슬롯은 호출하는 쪽에서 이미 잡고 있음)
+
+        Returns:
+            IP 주소, 찾지 못하면 None
+        """
+        if is_address(target) or not self.clients.needs_refresh(target):
+            return self.clients.resolve(target)
+        with self.pool.session() as api:
+            return api.resolve_host(target)
+
+    def refresh_clients(self) -> Optional[List[Dict]]:
+        """
+        LAN 클라이언트 색인 갱신 (주기적 갱신용, 요청 제한 적용)
+
+        Raises:
+            QueueFullError: 공유기 요청 대기열이 가득 참
+        """
+        with self.limiter.slot(), self.pool.session() as api:
+            return api.get_lan_clients()
+
+    def warm_up(self, sessions: Optional[int] = None) -> Dict:
+        """
+        세션 미리 로그인, 규칙 테이블과 시스템 정보, LAN 클라이언트 색인 미리 조회
+
+        실패해도 예외를 내지 않고 결과를 self.probe에 기록합니다.
+
+        Args:
+            sessions: 미리 로그인할 세션 수 (기본값: 풀 크기)
+
+        Returns:
+            점검 결과 {'ok', 'latency': 규칙 테이블 조회 시간(초), 'seconds': 전체 시간(초), 'at', 'sessions'}
+        """
+        start = time.monotonic()
+        probe = {'ok': False, 'latency': None, 'at': None, 'sessions': 0}
+        self.warming = True
+        try:
+            # 세션 로그인도 공유기 요청이므로 요청 제한 슬롯 안에서 (워밍업 중 들어온 요청과 동시 실행 수 공유)
+            with self.limiter.slot():
+                probe['sessions'] = self.pool.warm(sessions)
+                with self.pool.session() as api:
+                    fetch_start = time.monotonic()
+                    self.manager(api).fetch_port_forward_rules()
+                    probe['latency'] = round(time.monotonic() - fetch_start, 6)
+                    self.set_system_info(api.get_system_info())
+                    api.get_lan_clients()
+            probe['ok'] = True
+        except Exception as e:
+            logger.warning(f"공유기 워밍업 실패 ({self.router_id}): {e}")
+            probe['error'] = str(e)
+        probe['seconds'] = round(time.monotonic() - start, 6)
+        probe['at'] = time.time()
+        self.probe = probe
+        self.warming = False
+        return probe
+
+    def readiness(self) -> Dict:
+        """준비 상태 (마지막 점검 결과, 세션 풀, 캐시 경과 시간)"""
+        return {
+            'id': self.router_id,
+            'ready': bool(self.probe and self.probe['ok']),
+            'warming': self.warming,
+            'probe': self.probe,
+            'pool': self.pool.stats(),
+            'cache_age': self.cache.age(),
+            'system_info_age': (
+                time.monotonic() - self._system_info_at if self._system_info is not None else None
+            ),
+            'clients_age': self.clients.age(),
+        }
+
+    def describe(self) -> Dict:
+        """공유기 정보 (비밀번호 제외)"""
+        return {'id': self.router_id, 'host': self.host, 'username': self.username}
+
+    def stats(self) -> Dict:
+        return {
+            'limiter': self.limiter.stats(),
+            'pool': self.pool.stats(),
+            'cache_age': self.cache.age(),
+        }
+
+
+class RouterRegistry:
+    """
+    공유기 레지스트리
+
+    설정 파일 형식 (JSON):
+        {
+            "defaults": {"username": "admin", "cache_ttl": 5, "rate_limit": 2},
+            "routers": {
+                "home": {"host": "http://192.168.0.1", "password_env": "HOME_ROUTER_PASSWORD"},
+                "office": {"host": "https://office.example.com:8443", "password": "..."}
+            }
+        }
+    password_env를 주면 비밀번호를 해당 환경 변수에서 읽습니다.
+    """
+
+    def __init__(self, routers: Dict[str, Dict], history: Optional[SnapshotStore] = None,
+                 default_router: Optional[str] = None):
+        if not routers:
+            raise ValueError("등록된 공유기가 없습니다")
+        self._contexts: Dict[str, RouterContext] = {}
+        for router_id, config in routers.items():
+            config = dict(config)
+            if 'password_env' in config:
+                config['password'] = os.environ.get(config['password_env'], '')
+            self._contexts[router_id] = RouterContext(router_id, config, history)
+        self.default_router = default_router or next(iter(routers))
+        # 워밍업 상태: cold(시작 안 함), warming, timed_out(대기 시간이 지났지만 일부 공유기는 아직 진행 중), done
+        self.warm_state = 'cold'
+        if self.default_router not in self._contexts:
+            raise ValueError(f"기본 공유기가 등록되어 있지 않습니다: {self.default_router}")
+
+    @classmethod
+    def from_file(cls, path: str, history: Optional[SnapshotStore] = None,
+                  default_router: Optional[str] = None) -> 'RouterRegistry':
+        """설정 파일에서 레지스트리 생성"""
+        with open(path, encoding='utf-8') as fp:
+            config = json.load(fp)
+        defaults = config.get('defaults', {})
+        routers = {
+            router_id: dict(defaults, **router_config)
+            for router_id, router_config in config.get('routers', {}).items()
+        }
+        return cls(routers, history, default_router or config.get('default'))
+
+    def get(self, router_id: Optional[str] = None) -> RouterContext:
+        """
+        공유기 컨텍스트 조회
+
+        Args:
+            router_id: 공유기 식별자 (None이면 기본 공유기)
+
+        Raises:
+            KeyError: 등록되지 않은 공유기
+        """
+        return self._contexts[router_id or self.default_router]
+
+    def ids(self) -> List[str]:
+        return list(self._contexts)
+
+    def contexts(self) -> List[RouterContext]:
+        return list(self._contexts.values())
+
+    def warm_up(self, sessions: Optional[int] = None, timeout: Optional[float] = None) -> Dict[str, Dict]:
+        """
+        모든 공유기 동시에 워밍업
+
+        Args:
+            sessions: 공유기마다 미리 로그인할 세션 수 (기본값: 풀 크기)
+            timeout: 전체 대기 시간(초). 넘으면 끝난 공유기까지만 반환 (나머지는 백그라운드에서 마저 진행)
+
+        Returns:
+            {공유기 식별자: 점검 결과}
+        """
+        self.warm_state = 'warming'
+        contexts = self.contexts()
+        executor = ThreadPoolExecutor(max_workers=len(contexts), thread_name_prefix='warmup')
+        futures = {executor.submit(context.warm_up, sessions): context for context in contexts}
+        remaining = [len(futures)]
+        lock = threading.Lock()
+
+        def finished(_):
+            # 대기 시간이 지난 뒤 끝난 공유기도 반영되도록 마지막 공유기가 끝날 때 done으로
+            with lock:
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    self.warm_state = 'done'
+
+        for future in futures:
+            future.add_done_callback(finished)
+        done, _ = wait(futures, timeout=timeout)
+        executor.shutdown(wait=False)
+        with lock:
+            if remaining[0]:
+                self.warm_state = 'timed_out'
+        return {futures[future].router_id: future.result() for future in done}
+
+    def close(self):
+        for context in self._contexts.values():
+            context.pool.close()
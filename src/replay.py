@@ -0,0 +1,226 @@
+"""
+공유기 응답 기록/재생 모듈
+실제 공유기와 주고받은 CGI 요청/응답을 압축 아카이브에 기록하고, 공유기 없이 같은 응답을 재생합니다.
+
+아카이브 형식 (gzip으로 압축한 NDJSON):
+    {"type": "blob", "id": 해시, "text": 응답 본문}              - 같은 본문은 한 번만 저장
+    {"type": "exchange", "method", "path", "query", "body", "status", "content_type", "blob", "elapsed"}
+로그인 요청의 비밀번호는 기록하지 않습니다.
+"""
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from requests.adapters import BaseAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+from .http_pool import get_adapter
+
+# 기록하지 않는 요청 필드
+REDACTED_FIELDS = ('passwd', 'password')
+
+
+def _normalize_query(query: str) -> str:
+    return urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+
+
+def _redact_body(body) -> Optional[str]:
+    if body is None:
+        return None
+    if isinstance(body, bytes):
+        body = body.decode('utf-8', errors='replace')
+    fields = parse_qsl(body, keep_blank_values=True)
+    if not fields:
+        return body
+    return urlencode([(key, '***' if key in REDACTED_FIELDS else value) for key, value in fields])
+
+
+def _exchange_key(method: str, path: str, query: str) -> Tuple[str, str, str]:
+    return method.upper(), path, query
+
+
+class Recorder:
+    """
+    공유기 요청/응답 기록기
+
+    사용법:
+        recorder = Recorder('router.jsonl.gz')
+        IptimeAPI.transport = recorder.adapter
+        ...
+        recorder.close()
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fp = gzip.open(path, 'wt', encoding='utf-8')
+        self._blobs = set()
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def adapter(self, base_url: str) -> 'RecordingAdapter':
+        """base_url 공유기용 기록 어댑터 (실제 전송은 공유 연결 풀 사용)"""
+        return RecordingAdapter(self, get_adapter(base_url))
+
+    def _write(self, record: Dict):
+        self._fp.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+    def record(self, request, response: Response, elapsed: float):
+        url = urlsplit(request.url)
+        text = response.text
+        blob = hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+        with self._lock:
+            if blob not in self._blobs:
+                self._blobs.add(blob)
+                self._write({'type': 'blob', 'id': blob, 'text': text})
+            self._write({
+                'type': 'exchange',
+                'method': request.method,
+                'path': url.path,
+                'query': _normalize_query(url.query),
+                'body': _redact_body(request.body),
+                'status': response.status_code,
+                'content_type': response.headers.get('Content-Type'),
+                'blob': blob,
+                'elapsed': round(elapsed, 6),
+            })
+            self._fp.flush()
+            self.count += 1
+
+    def close(self):
+        with self._lock:
+            self._fp.close()
+
+
+class RecordingAdapter(BaseAdapter):
+    """실제 어댑터로 전송하고 요청/응답을 기록"""
+
+    def __init__(self, recorder: Recorder, inner: BaseAdapter):
+        super().__init__()
+        self.recorder = recorder
+        self.inner = inner
+
+    def send(self, request, **kwargs):
+        start = time.perf_counter()
+        response = self.inner.send(request, **kwargs)
+        # 본문을 읽는 시간까지 포함
+        response.content
+        self.recorder.record(request, response, time.perf_counter() - start)
+        return response
+
+    def close(self):
+        pass
+
+
+def parse_latency(value: Union[str, float, None]) -> Union[str, float]:
+    """재생 지연 설정 파싱 ('original' 또는 초)"""
+    if isinstance(value, str) and value.strip().lower() == 'original':
+        return 'original'
+    return float(value or 0)
+
+
+def load_archive(path: str) -> List[Dict]:
+    """아카이브의 요청/응답 목록 (본문 포함)"""
+    blobs = {}
+    exchanges = []
+    with gzip.open(path, 'rt', encoding='utf-8') as fp:
+        for line in fp:
+            record = json.loads(line)
+            if record['type'] == 'blob':
+                blobs[record['id']] = record['text']
+            else:
+                record['text'] = blobs[record['blob']]
+                exchanges.append(record)
+    return exchanges
+
+
+class Replayer:
+    """
+    기록된 응답 재생기
+
+    같은 요청(메서드, 경로, 쿼리)은 기록된 순서대로 응답하고, 기록된 응답을 다 쓰면 마지막 응답을 반복합니다.
+    POST 요청은 본문과 관계없이 경로 기준으로 순서대로 응답합니다.
+
+    Args:
+        path: 아카이브 파일
+        latency: 'original'이면 기록된 응답 시간, 숫자면 고정 지연(초), 0이면 지연 없음
+        speed: 기록된 응답 시간을 나눌 배속 (latency='original'일 때)
+    """
+
+    def __init__(self, path: str, latency: Union[str, float] = 0, speed: float = 1.0):
+        self.path = path
+        self.latency = latency
+        self.speed = speed
+        self._exchanges: Dict[Tuple[str, str, str], List[Dict]] = defaultdict(list)
+        for exchange in load_archive(path):
+            self._exchanges[_exchange_key(exchange['method'], exchange['path'], exchange['query'])].append(exchange)
+        self._served: Dict[Tuple[str, str, str], int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self.misses = 0
+
+    def adapter(self, base_url: str) -> 'ReplayAdapter':
+        return ReplayAdapter(self)
+
+    def _delay(self, exchange: Dict) -> float:
+        if self.latency == 'original':
+            return exchange['elapsed'] / self.speed
+        return float(self.latency or 0)
+
+    def lookup(self, method: str, url: str) -> Optional[Dict]:
+        parts = urlsplit(url)
+        key = _exchange_key(method, parts.path, _normalize_query(parts.query))
+        candidates = self._exchanges.get(key)
+        if not candidates:
+            return None
+        with self._lock:
+            index = self._served[key]
+            self._served[key] += 1
+        return candidates[min(index, len(candidates) - 1)]
+
+    def reset(self):
+        """재생 위치 처음으로"""
+        with self._lock:
+            self._served.clear()
+            self.misses = 0
+
+
+class ReplayAdapter(BaseAdapter):
+    """공유기 대신 기록된 응답을 돌려주는 어댑터"""
+
+    def __init__(self, replayer: Replayer):
+        super().__init__()
+        self.replayer = replayer
+
+    def send(self, request, **kwargs):
+        exchange = self.replayer.lookup(request.method, request.url)
+        response = Response()
+        # 기록 시 클라이언트가 디코딩한 본문(response.text)을 그대로 돌려줌
+        response.url = request.url
+        response.request = request
+        response.encoding = 'utf-8'
+        if exchange is None:
+            with self.replayer._lock:
+                self.replayer.misses += 1
+            response.status_code = 404
+            response._content = b''
+            return response
+
+        delay = self.replayer._delay(exchange)
+        if delay > 0:
+            time.sleep(delay)
+        response.status_code = exchange['status']
+        response.headers = CaseInsensitiveDict(
+            {'Content-Type': exchange['content_type']} if exchange.get('content_type') else {}
+        )
+        response._content = exchange['text'].encode('utf-8')
+        response.elapsed = timedelta(seconds=delay)
+        return response
+
+    def close(self):
+        pass
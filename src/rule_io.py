@@ -0,0 +1,92 @@
+"""
+포트포워드 규칙 내보내기/가져오기 직렬화 모듈
+NDJSON, CSV 형식을 한 줄(한 규칙) 단위로 읽고 씁니다.
+"""
+import csv
+import json
+from typing import Dict, IO, Iterable, Iterator
+
+# 내보내기/가져오기 대상 필드 (id는 목록 순서라 복원 시 의미가 없으므로 제외)
+RULE_FIELDS = ['description', 'internal_ip', 'protocol', 'external_port', 'internal_port', 'disabled']
+
+# CSV 등 문자열로 읽은 disabled 값 중 참으로 보는 값
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+SUPPORTED_FORMATS = ('ndjson', 'csv')
+
+
+def _check_format(fmt: str):
+    if fmt not in SUPPORTED_FORMATS:
+        raise ValueError(f"지원하지 않는 형식입니다: {fmt} (ndjson/csv)")
+
+
+def _parse_flag(value) -> bool:
+    """disabled 값 변환 (없거나 빈 값이면 False - disabled 열이 없던 이전 내보내기 파일 호환)"""
+    if isinstance(value, str):
+        return value.strip().lower() in TRUE_VALUES
+    return bool(value)
+
+
+def write_rules(rules: Iterable[Dict], fp: IO[str], fmt: str = "ndjson") -> int:
+    """
+    규칙을 스트림에 한 줄씩 기록
+
+    Args:
+        rules: 포트포워드 규칙들 (제너레이터 가능)
+        fp: 출력 텍스트 스트림
+        fmt: 출력 형식 (ndjson/csv)
+
+    Returns:
+        기록한 규칙 수
+    """
+    _check_format(fmt)
+
+    count = 0
+    if fmt == 'csv':
+        # 첫 규칙을 받은 뒤(제너레이터면 공유기 조회가 끝난 뒤) 헤더를 기록해
+        # 조회에 실패했을 때 헤더만 있는 빈 내보내기처럼 보이는 출력을 남기지 않음
+        rules = iter(rules)
+        first = next(rules, None)
+        writer = csv.DictWriter(fp, fieldnames=RULE_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        if first is not None:
+            writer.writerow(first)
+            count += 1
+        for rule in rules:
+            writer.writerow(rule)
+            count += 1
+    else:
+        for rule in rules:
+            record = {field: rule.get(field) for field in RULE_FIELDS}
+            fp.write(json.dumps(record, ensure_ascii=False))
+            fp.write('\n')
+            count += 1
+
+    fp.flush()
+    return count
+
+
+def read_rules(fp: IO[str], fmt: str = "ndjson") -> Iterator[Dict]:
+    """
+    스트림에서 규칙을 한 줄씩 읽기
+
+    Args:
+        fp: 입력 텍스트 스트림
+        fmt: 입력 형식 (ndjson/csv)
+
+    Yields:
+        포트포워드 규칙 (RULE_FIELDS 키)
+    """
+    _check_format(fmt)
+
+    if fmt == 'csv':
+        records = csv.DictReader(fp)
+    else:
+        records = (json.loads(line) for line in fp if line.strip())
+
+    for record in records:
+        rule = {field: record.get(field) for field in RULE_FIELDS}
+        if not rule['protocol']:
+            rule['protocol'] = 'tcp'
+        rule['disabled'] = _parse_flag(rule['disabled'])
+        yield rule
@@ -0,0 +1,354 @@
+"""
+규칙 예약 실행 모듈
+정해진 시각에 규칙 추가/삭제/활성화/비활성화를 실행합니다.
+같은 시각(coalesce초 이내)에 실행할 예약은 공유기별로 묶어 한 번의 쓰기 세션에서 적용하고,
+예약 목록은 SQLite에 저장해 서버를 다시 시작해도 유지합니다.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows - 잠금 없이 프로세스 하나에서만 실행한다고 가정
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+ACTIONS = ('add', 'remove', 'enable', 'disable')
+
+PENDING = 'pending'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELED = 'canceled'
+MISSED = 'missed'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS schedule (
+    id TEXT PRIMARY KEY,
+    router TEXT NOT NULL,
+    due REAL NOT NULL,
+    action TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_schedule_status_due ON schedule(status, due);
+"""
+
+
+def to_operation(action: str, params: Dict) -> Dict:
+    """예약 작업을 PortForwardManager.apply_plan 작업으로 변환"""
+    if action == 'add':
+        return dict(params, op='add')
+    operation = {'op': 'delete' if action == 'remove' else action, 'rule': params['rule']}
+    if params.get('if_match'):
+        operation['if_match'] = params['if_match']
+    return operation
+
+
+def check_action(action: str, params: Dict) -> List[str]:
+    """
+    예약 작업 형식 검사
+
+    Returns:
+        오류 메시지 목록 (비어 있으면 정상)
+    """
+    if action not in ACTIONS:
+        return [f"action: {'/'.join(ACTIONS)} 중 하나여야 합니다 ({action!r})"]
+    if action == 'add':
+        return [
+            f"{field}: 필수 항목입니다" for field in ('description', 'internal_ip', 'external_port')
+            if params.get(field) in (None, '')
+        ]
+    if params.get('rule') in (None, ''):
+        return ["rule: 규칙 ID 또는 이름이 필요합니다"]
+    return []
+
+
+class Scheduler:
+    """
+    규칙 예약 실행기
+
+    run_batch(공유기 식별자, apply_plan 작업 목록)는 작업별 결과를 순서대로 반환해야 하며,
+    API 서버에서는 요청 제한 슬롯과 쓰기 세션 하나로 apply_plan을 실행합니다.
+
+    같은 데이터베이스를 여러 프로세스(디버그 리로더, 멀티 워커 WSGI 서버)가 열 수 있으므로
+    실행 스레드는 <path>.lock 파일 잠금을 얻은 프로세스 하나에서만 돌고,
+    나머지 프로세스는 예약 추가/조회/취소만 합니다.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        run_batch: Callable[[str, List[Dict]], Iterable[Dict]],
+        coalesce: float = 1.0,
+        max_late: float = 3600
+    ):
+        """
+        초기화
+
+        Args:
+            path: 예약 목록 SQLite 데이터베이스 파일 경로
+            run_batch: 공유기 하나에 작업 목록을 적용하는 함수
+            coalesce: 가장 이른 예약과 이 시간(초) 안에 있는 예약을 함께 실행
+            max_late: 서버가 멈춰 있던 동안 놓친 예약을 이 시간(초)까지만 늦게 실행 (넘으면 missed)
+        """
+        self.path = path
+        self.run_batch = run_batch
+        self.coalesce = coalesce
+        self.max_late = max_late
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(SCHEMA)
+        # 공유기마다 워커 하나 - 같은 공유기의 묶음은 예약 순서대로, 다른 공유기의 묶음은 동시에 실행
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._lock_file = None
+        self._stopped = False
+        # 실행 지연(예약 시각 -> 시작), 묶음 실행 시간 통계
+        self._stats = {'batches': 0, 'actions': 0, 'lag_total': 0.0, 'lag_max': 0.0, 'duration_total': 0.0}
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict:
+        data = dict(row)
+        data['params'] = json.loads(data['params'])
+        data['result'] = json.loads(data['result']) if data['result'] else None
+        data['lag'] = round(data['started_at'] - data['due'], 6) if data['started_at'] else None
+        return data
+
+    def _acquire_lock(self) -> bool:
+        """실행 잠금 획득 (다른 프로세스가 이미 실행 중이면 False)"""
+        if fcntl is None:
+            return True
+        lock_file = open(f"{self.path}.lock", 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    @property
+    def active(self) -> bool:
+        """이 프로세스에서 예약을 실행 중인지"""
+        return self._thread is not None
+
+    def start(self) -> bool:
+        """
+        예약 실행 스레드 시작
+
+        Returns:
+            이 프로세스에서 실행을 맡았으면 True, 다른 프로세스가 실행 중이면 False
+        """
+        if self._thread is not None:
+            return True
+        if not self._acquire_lock():
+            logger.info(f"다른 프로세스가 예약을 실행 중입니다 ({self.path}, pid {os.getpid()})")
+            return False
+        with self._lock, self._conn:
+            # 잠금을 가진 프로세스가 없었으므로 running 예약은 실행 중에 서버가 멈춘 것
+            # - 결과를 알 수 없으므로 다시 실행 대상으로
+            self._conn.execute("UPDATE schedule SET status = ? WHERE status = ?", (PENDING, RUNNING))
+        self._thread = threading.Thread(target=self._loop, name='iptime-scheduler', daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        with self._wakeup:
+            self._stopped = True
+            self._wakeup.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        for executor in list(self._executors.values()):
+            executor.shutdown(wait=True)
+        with self._lock:
+            self._conn.close()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def schedule(self, router: str, due: float, action: str, params: Dict) -> Dict:
+        """
+        예약 추가
+
+        Args:
+            router: 공유기 식별자
+            due: 실행 시각 (epoch 초)
+            action: add/remove/enable/disable
+            params: add이면 규칙 필드, 나머지는 {'rule': ID 또는 이름, 'if_match': 버전 토큰(선택)}
+
+        Returns:
+            추가된 예약
+
+        Raises:
+            ValueError: 작업 형식 오류
+        """
+        errors = check_action(action, params)
+        if errors:
+            raise ValueError('; '.join(errors))
+        entry_id = uuid.uuid4().hex
+        with self._wakeup, self._conn:
+            self._conn.execute(
+                "INSERT INTO schedule (id, router, due, action, params, status, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (entry_id, router, float(due), action, json.dumps(params, ensure_ascii=False), PENDING, time.time())
+            )
+            self._wakeup.notify_all()
+        return self.get(entry_id)
+
+    def cancel(self, entry_id: str) -> bool:
+        """실행 전 예약 취소 (취소했으면 True)"""
+        with self._wakeup, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE schedule SET status = ?, finished_at = ? WHERE id = ? AND status = ?",
+                (CANCELED, time.time(), entry_id, PENDING)
+            )
+            self._wakeup.notify_all()
+            return cursor.rowcount > 0
+
+    def get(self, entry_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM schedule WHERE id = ?", (entry_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list(self, router: Optional[str] = None, status: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        """예약 목록 (실행 시각 순)"""
+        query = "SELECT * FROM schedule WHERE 1 = 1"
+        params: List = []
+        if router:
+            query += " AND router = ?"
+            params.append(router)
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+        query += " ORDER BY due, created_at LIMIT ?"
+        params.append(int(limit))
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def stats(self) -> Dict:
+        """대기 중인 예약 수와 실행 지연/묶음 실행 시간 통계(초)"""
+        with self._lock:
+            pending = self._conn.execute(
+                "SELECT COUNT(*) FROM schedule WHERE status = ?", (PENDING,)
+            ).fetchone()[0]
+            stats = dict(self._stats)
+        actions = stats.pop('actions')
+        batches = stats.pop('batches')
+        return {
+            'active': self.active,
+            'pending': pending,
+            'executed': actions,
+            'batches': batches,
+            'lag_avg': round(stats['lag_total'] / actions, 6) if actions else None,
+            'lag_max': round(stats['lag_max'], 6),
+            'batch_seconds_avg': round(stats['duration_total'] / batches, 6) if batches else None,
+        }
+
+    def _executor(self, router: str) -> ThreadPoolExecutor:
+        executor = self._executors.get(router)
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'scheduler-{router}')
+            self._executors[router] = executor
+        return executor
+
+    def _take_due(self) -> Optional[float]:
+        """
+        실행할 예약을 공유기별로 묶어 실행 시작
+
+        Returns:
+            다음 예약까지 남은 시간(초), 예약이 없으면 None
+        """
+        now = time.time()
+        row = self._conn.execute(
+            "SELECT MIN(due) FROM schedule WHERE status = ?", (PENDING,)
+        ).fetchone()
+        earliest = row[0]
+        if earliest is None:
+            return None
+        if earliest > now:
+            return earliest - now
+
+        with self._conn:
+            # 너무 오래 놓친 예약은 실행하지 않음 (예: 지난 유지보수 창을 뒤늦게 여는 일 방지)
+            self._conn.execute(
+                "UPDATE schedule SET status = ?, finished_at = ? WHERE status = ? AND due < ?",
+                (MISSED, now, PENDING, now - self.max_late)
+            )
+            candidates = self._conn.execute(
+                "SELECT * FROM schedule WHERE status = ? AND due <= ? ORDER BY due, created_at",
+                (PENDING, max(now, earliest + self.coalesce))
+            ).fetchall()
+            # pending인 예약만 running으로 바꿔 가져감 (그 사이 취소되었거나 다른 실행기가 가져간 예약은 제외)
+            rows = [
+                row for row in candidates
+                if self._conn.execute(
+                    "UPDATE schedule SET status = ?, started_at = ? WHERE id = ? AND status = ?",
+                    (RUNNING, now, row['id'], PENDING)
+                ).rowcount == 1
+            ]
+
+        batches = defaultdict(list)
+        for row in rows:
+            batches[row['router']].append(self._to_dict(row))
+        for router, entries in batches.items():
+            self._executor(router).submit(self._run, router, entries, now)
+        return 0
+
+    def _loop(self):
+        with self._wakeup:
+            while not self._stopped:
+                try:
+                    delay = self._take_due()
+                except Exception as e:
+                    logger.error(f"예약 확인 실패: {e}")
+                    delay = 1.0
+                if delay != 0:
+                    self._wakeup.wait(delay)
+
+    def _run(self, router: str, entries: List[Dict], started_at: float):
+        """공유기 하나의 묶음 실행 (작업 목록 하나로 적용)"""
+        operations = [to_operation(entry['action'], entry['params']) for entry in entries]
+        try:
+            results = list(self.run_batch(router, operations))
+        except Exception as e:
+            logger.error(f"예약 실행 실패 ({router}): {e}")
+            results = [{'success': False, 'errors': [str(e)]}] * len(entries)
+        # 결과가 모자라면(실행 중 오류) 나머지는 실패로 기록
+        results += [{'success': False, 'errors': ['실행 결과 없음']}] * (len(entries) - len(results))
+        finished_at = time.time()
+
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "UPDATE schedule SET status = ?, finished_at = ?, result = ? WHERE id = ?",
+                    [
+                        (SUCCEEDED if result.get('success') else FAILED, finished_at,
+                         json.dumps(result, ensure_ascii=False), entry['id'])
+                        for entry, result in zip(entries, results)
+                    ]
+                )
+            self._stats['batches'] += 1
+            self._stats['actions'] += len(entries)
+            self._stats['duration_total'] += finished_at - started_at
+            for entry in entries:
+                lag = started_at - entry['due']
+                self._stats['lag_total'] += lag
+                self._stats['lag_max'] = max(self._stats['lag_max'], lag)
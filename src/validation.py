@@ -0,0 +1,310 @@
+"""
+포트포워드 규칙 로컬 검증 모듈
+공유기에 요청을 보내기 전에 IP, 포트 범위 중복, 이름 중복을 검사합니다.
+"""
+import ipaddress
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+PROTOCOLS = ('tcp', 'udp', 'both')
+
+
+class ValidationError(ValueError):
+    """규칙 검증 실패"""
+
+    def __init__(self, errors: List[str]):
+        super().__init__('; '.join(errors))
+        self.errors = errors
+
+
+class PortIntervalIndex:
+    """
+    포트 구간 인덱스
+
+    구간을 시작 포트 순으로 정렬해 두고 '지금까지의 최대 끝 포트'를 함께 유지합니다.
+    겹침 조회는 이진 탐색 후 겹칠 수 있는 구간만 거슬러 올라가므로 O(log n + k)입니다.
+    """
+
+    def __init__(self):
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        self._keys: List = []
+        self._max_ends: Optional[List[int]] = None
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, start: int, end: int, key):
+        """구간 [start, end] 추가"""
+        i = bisect_right(self._starts, start)
+        self._starts.insert(i, start)
+        self._ends.insert(i, end)
+        self._keys.insert(i, key)
+        self._max_ends = None
+
+    def extend(self, intervals: Iterable[Tuple[int, int, object]]):
+        """
+        구간 (start, end, key) 여러 개를 한 번에 추가
+
+        하나씩 add하면 삽입마다 O(n)이라 테이블 전체 인덱싱이 O(n^2)이 되므로
+        한 번에 정렬합니다 (시작 포트가 같으면 추가한 순서 유지).
+        """
+        merged = sorted(
+            list(zip(self._starts, self._ends, self._keys)) + list(intervals),
+            key=lambda interval: interval[0]
+        )
+        self._starts = [interval[0] for interval in merged]
+        self._ends = [interval[1] for interval in merged]
+        self._keys = [interval[2] for interval in merged]
+        self._max_ends = None
+
+    def remove(self, key):
+        """key로 등록된 구간 제거"""
+        for i in reversed(range(len(self._keys))):
+            if self._keys[i] == key:
+                del self._starts[i], self._ends[i], self._keys[i]
+        self._max_ends = None
+
+    def _build(self) -> List[int]:
+        if self._max_ends is None:
+            max_ends = []
+            current = -1
+            for end in self._ends:
+                current = max(current, end)
+                max_ends.append(current)
+            self._max_ends = max_ends
+        return self._max_ends
+
+    def overlaps(self, start: int, end: int) -> List:
+        """
+        [start, end]와 겹치는 구간의 key 목록
+
+        Returns:
+            시작 포트 순으로 정렬된 key 목록
+        """
+        max_ends = self._build()
+        # 시작 포트가 end 이하인 구간만 후보
+        i = bisect_right(self._starts, end) - 1
+        found = []
+        while i >= 0 and max_ends[i] >= start:
+            if self._ends[i] >= start:
+                found.append(self._keys[i])
+            i -= 1
+        found.reverse()
+        return found
+
+    def next_free(self, port: int) -> int:
+        """
+        port 이상에서 어떤 구간에도 속하지 않는 가장 작은 포트
+
+        '지금까지의 최대 끝 포트'까지는 한 구간이 연속으로 덮으므로 그 다음 포트로 건너뜁니다.
+        건너뛸 때마다 시작 포트 위치가 앞으로 가므로 O(k log n)입니다 (k: 건너뛴 구간 묶음 수).
+        """
+        max_ends = self._build()
+        while True:
+            i = bisect_right(self._starts, port) - 1
+            if i < 0 or max_ends[i] < port:
+                return port
+            port = max_ends[i] + 1
+
+
+def _to_port(value, field: str, errors: List[str]) -> Optional[int]:
+    try:
+        port = int(value)
+    except (TypeError, ValueError):
+        errors.append(f"{field}: 포트 번호가 올바르지 않습니다 ({value!r})")
+        return None
+    if not 1 <= port <= 65535:
+        errors.append(f"{field}: 포트 범위(1-65535)를 벗어났습니다 ({port})")
+        return None
+    return port
+
+
+def check_internal_ip(internal_ip: str, lan_network: Optional[str] = None) -> List[str]:
+    """
+    내부 IP 검사 (IPv4, 사용할 수 있는 주소, LAN 대역)
+
+    Returns:
+        오류 메시지 목록 (비어 있으면 정상)
+    """
+    try:
+        address = ipaddress.IPv4Address(str(internal_ip))
+    except ValueError:
+        return [f"internal_ip: IPv4 주소가 아닙니다 ({internal_ip!r})"]
+    if address.is_unspecified or address.is_loopback or address.is_multicast:
+        return [f"internal_ip: 사용할 수 없는 주소입니다 ({address})"]
+    if lan_network:
+        network = ipaddress.IPv4Network(lan_network, strict=False)
+        if address not in network:
+            return [f"internal_ip: LAN 대역 {network} 밖의 주소입니다 ({address})"]
+        if address in (network.network_address, network.broadcast_address):
+            return [f"internal_ip: 네트워크/브로드캐스트 주소입니다 ({address})"]
+    return []
+
+
+def check_rule_fields(
+    description: str,
+    internal_ip: str,
+    external_port,
+    internal_port=None,
+    protocol: str = "tcp",
+    lan_network: Optional[str] = None
+) -> List[str]:
+    """
+    규칙 테이블 없이 할 수 있는 필드 검사 (이름 형식, IP, 포트, 프로토콜)
+
+    Args:
+        lan_network: 내부 IP가 속해야 하는 LAN 대역 (예: 192.168.0.0/24, 없으면 대역 검사 생략)
+
+    Returns:
+        오류 메시지 목록 (비어 있으면 정상)
+    """
+    errors = []
+
+    if not description:
+        errors.append("description: 규칙 이름이 비어 있습니다")
+    elif "'" in description or ',' in description:
+        # 이름은 onClickedPFRule('...') 인자와 delcheck 목록(쉼표 구분)에 그대로 들어감
+        errors.append(f"description: 작은따옴표나 쉼표는 사용할 수 없습니다 ({description})")
+
+    errors.extend(check_internal_ip(internal_ip, lan_network))
+    _to_port(external_port, 'external_port', errors)
+    if internal_port not in (None, ''):
+        _to_port(internal_port, 'internal_port', errors)
+
+    if protocol not in PROTOCOLS:
+        errors.append(f"protocol: tcp/udp/both 중 하나여야 합니다 ({protocol!r})")
+
+    return errors
+
+
+class RuleValidator:
+    """
+    규칙 테이블 기반 검증기
+
+    프로토콜별 외부 포트 구간 인덱스와 이름 인덱스를 만들어 두고
+    새 규칙/수정 규칙의 포트 중복과 이름 중복을 검사합니다.
+    """
+
+    def __init__(self, rules: Iterable[Dict] = (), lan_network: Optional[str] = None):
+        self.lan_network = lan_network
+        self._ports = {'tcp': PortIntervalIndex(), 'udp': PortIntervalIndex()}
+        self._names: Dict[str, Dict] = {}
+        self._rules: Dict[int, Dict] = {}
+        pending = {protocol: [] for protocol in self._ports}
+        for rule in rules:
+            self._index(rule, pending)
+        for protocol, intervals in pending.items():
+            self._ports[protocol].extend(intervals)
+
+    @staticmethod
+    def _protocols(protocol: str) -> Tuple[str, ...]:
+        return ('tcp', 'udp') if protocol == 'both' else (protocol,)
+
+    def _index(self, rule: Dict, pending: Optional[Dict[str, List]] = None):
+        try:
+            port = int(rule['external_port'])
+        except (TypeError, ValueError):
+            return
+        key = id(rule)
+        self._rules[key] = rule
+        for protocol in self._protocols(rule.get('protocol')):
+            if protocol not in self._ports:
+                continue
+            if pending is None:
+                self._ports[protocol].add(port, port, key)
+            else:
+                pending[protocol].append((port, port, key))
+        self._names.setdefault(rule['description'], rule)
+
+    def add(self, rule: Dict):
+        """인덱스에 규칙 추가 (기존 테이블의 잘못된 규칙은 인덱싱하지 않고 건너뜀)"""
+        self._index(rule)
+
+    def remove(self, rule: Dict):
+        """인덱스에서 규칙 제거"""
+        key = id(rule)
+        if self._rules.pop(key, None) is None:
+            return
+        for index in self._ports.values():
+            index.remove(key)
+        if self._names.get(rule['description']) is rule:
+            del self._names[rule['description']]
+
+    def conflicts(self, external_port, protocol: str, exclude: Optional[Dict] = None) -> List[Dict]:
+        """외부 포트가 겹치는 기존 규칙 목록"""
+        start = end = int(external_port)
+        found = {}
+        for proto in self._protocols(protocol):
+            index = self._ports.get(proto)
+            if index is None:
+                continue
+            for key in index.overlaps(start, end):
+                rule = self._rules[key]
+                if rule is not exclude:
+                    found[key] = rule
+        return list(found.values())
+
+    def first_free(self, protocol: str = 'tcp', low: int = 1, high: int = 65535) -> Optional[int]:
+        """
+        low~high에서 프로토콜의 외부 포트로 비어 있는 가장 작은 포트
+
+        both이면 tcp, udp 모두 비어 있어야 합니다.
+
+        Returns:
+            포트 번호, 비어 있는 포트가 없으면 None
+        """
+        indexes = [self._ports[proto] for proto in self._protocols(protocol) if proto in self._ports]
+        port = low
+        while port <= high:
+            moved = False
+            for index in indexes:
+                free = index.next_free(port)
+                if free != port:
+                    port = free
+                    moved = True
+            if not moved:
+                return port
+        return None
+
+    def check(
+        self,
+        description: str,
+        internal_ip: str,
+        external_port,
+        internal_port=None,
+        protocol: str = "tcp",
+        exclude: Optional[Dict] = None
+    ) -> List[str]:
+        """
+        규칙 전체 검사
+
+        Args:
+            exclude: 수정 대상 규칙 (자기 자신과의 중복은 무시)
+
+        Returns:
+            오류 메시지 목록 (비어 있으면 정상)
+        """
+        errors = check_rule_fields(
+            description, internal_ip, external_port, internal_port, protocol, self.lan_network
+        )
+        if errors:
+            return errors
+
+        existing = self._names.get(description)
+        if existing is not None and existing is not exclude:
+            errors.append(f"description: 같은 이름의 규칙이 이미 있습니다 ({description}, ID {existing.get('id')})")
+
+        for rule in self.conflicts(external_port, protocol, exclude):
+            errors.append(
+                f"external_port: {protocol} {external_port} 포트가 규칙 "
+                f"'{rule['description']}' ({rule['protocol']} {rule['external_port']})과 겹칩니다"
+            )
+
+        return errors
+
+    def validate(self, *args, **kwargs):
+        """check()와 같으며 오류가 있으면 ValidationError 발생"""
+        errors = self.check(*args, **kwargs)
+        if errors:
+            raise ValidationError(errors)
@@ -0,0 +1,8 @@
+"""
+pytest 공통 설정
+저장소 루트를 import 경로에 추가해 src 패키지를 설치 없이 불러옵니다.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
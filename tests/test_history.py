@@ -0,0 +1,41 @@
+"""규칙 테이블 비교 테스트"""
+from src.history import diff_rules
+from src.parser import rule_version
+
+
+def make_rule(name, port, internal_ip='192.168.0.10'):
+    rule = {
+        'description': name, 'internal_ip': internal_ip, 'protocol': 'tcp',
+        'external_port': str(port), 'internal_port': str(port), 'disabled': False,
+    }
+    rule['version'] = rule_version(rule)
+    return rule
+
+
+def test_diff_identical_tables():
+    rules = [make_rule('web', 80), make_rule('ssh', 22)]
+    assert diff_rules(rules, list(rules)) == {'added': [], 'removed': [], 'changed': []}
+
+
+def test_diff_added_removed_changed():
+    web, ssh = make_rule('web', 80), make_rule('ssh', 22)
+    moved = make_rule('web', 80, internal_ip='192.168.0.20')
+    nas = make_rule('nas', 5000)
+
+    diff = diff_rules([web, ssh], [moved, nas])
+    assert diff['added'] == [nas]
+    assert diff['removed'] == [ssh]
+    assert diff['changed'] == [{'before': web, 'after': moved}]
+
+
+def test_diff_ignores_order():
+    # 목록 순서(id)만 바뀐 것은 변경이 아님
+    web, ssh = make_rule('web', 80), make_rule('ssh', 22)
+    assert diff_rules([web, ssh], [ssh, web]) == {'added': [], 'removed': [], 'changed': []}
+
+
+def test_diff_detects_disable():
+    web = make_rule('web', 80)
+    disabled = dict(web, disabled=True)
+    disabled['version'] = rule_version(disabled)
+    assert diff_rules([web], [disabled])['changed'] == [{'before': web, 'after': disabled}]
@@ -0,0 +1,45 @@
+"""비동기 작업 관리 테스트"""
+import time
+
+from src.jobs import FAILED, RUNNING, SUCCEEDED, Job, JobManager
+
+
+def test_job_results_and_status():
+    manager = JobManager()
+    job = manager.submit('home', 'batch', 2, lambda: iter([{'success': True}, {'success': False}]))
+    results, finished = job.wait(2, timeout=5)
+    manager.shutdown()
+    assert finished and job.status == SUCCEEDED
+    assert job.to_dict()['failed'] == 1
+
+
+def test_failed_job():
+    def run():
+        yield {'success': True}
+        raise RuntimeError("연결 끊김")
+
+    manager = JobManager()
+    job = manager.submit('home', 'plan', 2, run)
+    manager.shutdown()
+    assert job.status == FAILED and job.error == "연결 끊김"
+
+
+def test_expired_ignores_half_updated_job():
+    # 상태는 끝났지만 finished_at이 아직 기록되지 않은 작업
+    job = Job('home', 'batch', 1)
+    job.status = SUCCEEDED
+    assert job._expired(time.time()) is False
+    job.finished_at = time.time() - 10
+    assert job._expired(time.time()) is True
+    job.status = RUNNING
+    assert job._expired(time.time()) is False
+
+
+def test_finished_jobs_purged_after_retention():
+    manager = JobManager(retention=0)
+    job = manager.submit('home', 'batch', 1, lambda: iter([{'success': True}]))
+    job.wait(1, timeout=5)
+    manager.shutdown()
+    time.sleep(0.01)
+    assert manager.get(job.id) is None
+    assert manager.list() == []
@@ -0,0 +1,54 @@
+"""규칙 순서 변경 계획 테스트"""
+import pytest
+
+from src.ordering import longest_increasing_subsequence, plan_moves
+
+
+def apply_moves(items, moves):
+    """plan_moves 결과를 앞에서부터 적용 (공유기의 modify 동작과 같음)"""
+    working = list(items)
+    for item, old, new in moves:
+        assert working[old - 1] == item
+        del working[old - 1]
+        working.insert(new - 1, item)
+    return working
+
+
+@pytest.mark.parametrize('current, target', [
+    ('abcde', 'abcde'),
+    ('abcde', 'edcba'),
+    ('abcde', 'eabcd'),
+    ('abcde', 'bcdea'),
+    ('abcdef', 'acbdfe'),
+    ('', ''),
+])
+def test_plan_moves_reaches_target(current, target):
+    moves = plan_moves(list(current), list(target))
+    assert apply_moves(current, moves) == list(target)
+
+
+def test_plan_moves_is_minimal():
+    # 이동 수 = n - LIS 길이
+    assert plan_moves(list('abcde'), list('abcde')) == []
+    assert len(plan_moves(list('abcde'), list('eabcd'))) == 1
+    assert len(plan_moves(list('abcde'), list('edcba'))) == 4
+
+
+def test_plan_moves_positions_are_one_based():
+    assert plan_moves(['a', 'b', 'c'], ['c', 'a', 'b']) == [('c', 3, 1)]
+
+
+def test_plan_moves_rejects_different_items():
+    with pytest.raises(ValueError):
+        plan_moves(['a', 'b'], ['a', 'c'])
+    with pytest.raises(ValueError):
+        plan_moves(['a', 'b'], ['a'])
+
+
+def test_longest_increasing_subsequence():
+    values = [3, 1, 4, 1, 5, 9, 2, 6]
+    keep = longest_increasing_subsequence(values)
+    picked = [values[i] for i in sorted(keep)]
+    assert len(picked) == 4
+    assert picked == sorted(set(picked))
+    assert longest_increasing_subsequence([]) == set()
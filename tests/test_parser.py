@@ -0,0 +1,95 @@
+"""ipTIME 응답 페이지 파서 테스트"""
+from src.parser import (
+    PF_RULE_RE, is_login_page, iter_port_forward_rules, parse_login_cookie, parse_session_info,
+    parse_system_info, rule_version,
+)
+
+
+def pf_row(name, ip, protocol, ext, internal, disabled='false', priority=1):
+    return (
+        f"<tr onclick=\"onClickedPFRule('user','{name}','0','{ip}','{protocol}','{ext}','{ext}',"
+        f"'{internal}','{internal}','','','','',{disabled},'{priority}','1', false)\"><td>{name}</td></tr>"
+    )
+
+
+PF_PAGE = (
+    "<html><script src='/js/login_session.js'></script><table>"
+    + pf_row('web', '192.168.0.10', 'tcp', '8080', '80')
+    + pf_row('game', '192.168.0.11', 'udp', '9000', '9000', disabled='true', priority=2)
+    # 빈 규칙 (내부 IP 없음)
+    + pf_row('', '', 'tcp', '', '', priority=3)
+    + "</table></html>"
+)
+
+EMPTY_PF_PAGE = "<html><script>var login_session = 1;</script><table></table></html>"
+SESSION_TIMEOUT_PAGE = (
+    "<html><script>top.location = '/sess-bin/login_session.cgi?session_timeout=1';</script></html>"
+)
+LOGIN_FORM_PAGE = (
+    '<form action="/sess-bin/login_handler.cgi" method="post">'
+    '<input type="text" name="username"><input type="password" name="passwd"></form>'
+)
+
+
+def test_pf_regex_groups():
+    match = PF_RULE_RE.search(pf_row('web', '192.168.0.10', 'tcp', '8080', '80', disabled='true'))
+    assert match.groups() == ('web', '192.168.0.10', 'tcp', '8080', '8080', '80', '80', 'true')
+
+
+def test_pf_regex_without_disabled_field():
+    # 인자가 짧은 이전 펌웨어 형식
+    match = PF_RULE_RE.search("onClickedPFRule('user','web','0','192.168.0.10','tcp','80','80','80','80')")
+    assert match.group(8) is None
+    assert match.group(2) == '192.168.0.10'
+
+
+def test_iter_port_forward_rules():
+    rules = list(iter_port_forward_rules(PF_PAGE))
+    assert [rule['description'] for rule in rules] == ['web', 'game']
+    web, game = rules
+    assert web['id'] == 1 and game['id'] == 2
+    assert web['external_port'] == '8080' and web['internal_port'] == '80'
+    assert web['disabled'] is False and game['disabled'] is True
+
+
+def test_rule_version_matches_parser():
+    for rule in iter_port_forward_rules(PF_PAGE):
+        assert rule['version'] == rule_version(rule)
+
+
+def test_rule_version_ignores_id_and_tracks_disabled():
+    web, = (rule for rule in iter_port_forward_rules(PF_PAGE) if rule['description'] == 'web')
+    assert rule_version(dict(web, id=99)) == web['version']
+    assert rule_version(dict(web, disabled=True)) != web['version']
+
+
+def test_is_login_page_positive():
+    assert is_login_page(SESSION_TIMEOUT_PAGE)
+    assert is_login_page(LOGIN_FORM_PAGE)
+
+
+def test_is_login_page_negative():
+    assert not is_login_page(PF_PAGE)
+    # 규칙이 없는 포트포워드 페이지의 스크립트에도 login_session이 들어 있음
+    assert not is_login_page(EMPTY_PF_PAGE)
+    assert not is_login_page('')
+    assert not is_login_page("<html><a href='/sess-bin/login_handler.cgi'>로그인</a></html>")
+
+
+def test_parse_session_info():
+    content = 'var captcha_on = "0";\nvar default_login = "1";\nvar session_id = "abc123";'
+    assert parse_session_info(content) == {'captcha_on': '0', 'default_login': '1', 'session_id': 'abc123'}
+    assert parse_session_info('<html></html>') == {}
+
+
+def test_parse_login_cookie():
+    assert parse_login_cookie("<script>setCookie('efgh5678');</script>") == 'efgh5678'
+    assert parse_login_cookie('<html></html>') is None
+
+
+def test_parse_system_info():
+    content = (
+        '<tr><td>모델명</td><td class="value">A2004NS-R</td></tr>'
+        '<tr><td>펌웨어 버전</td><td class="value"> 14.0.2 </td></tr>'
+    )
+    assert parse_system_info(content) == {'firmware_version': '14.0.2', 'model': 'A2004NS-R'}
@@ -0,0 +1,65 @@
+"""규칙 내보내기/가져오기 직렬화 테스트"""
+import io
+
+import pytest
+
+from src.rule_io import RULE_FIELDS, read_rules, write_rules
+
+RULES = [
+    {'id': 1, 'description': 'web', 'internal_ip': '192.168.0.10', 'protocol': 'tcp',
+     'external_port': '8080', 'internal_port': '80', 'disabled': False, 'version': 'x'},
+    {'id': 2, 'description': '게임', 'internal_ip': '192.168.0.11', 'protocol': 'udp',
+     'external_port': '9000', 'internal_port': '9000', 'disabled': True, 'version': 'y'},
+]
+
+
+@pytest.mark.parametrize('fmt', ['ndjson', 'csv'])
+def test_round_trip(fmt):
+    fp = io.StringIO()
+    assert write_rules(RULES, fp, fmt) == len(RULES)
+    fp.seek(0)
+    restored = list(read_rules(fp, fmt))
+    assert restored == [{field: rule[field] for field in RULE_FIELDS} for rule in RULES]
+
+
+@pytest.mark.parametrize('fmt', ['ndjson', 'csv'])
+def test_round_trip_generator(fmt):
+    fp = io.StringIO()
+    assert write_rules((rule for rule in RULES), fp, fmt) == len(RULES)
+    fp.seek(0)
+    assert [rule['description'] for rule in read_rules(fp, fmt)] == ['web', '게임']
+
+
+def test_read_csv_without_disabled_column():
+    # disabled 열이 없던 이전 내보내기 파일
+    fp = io.StringIO(
+        "description,internal_ip,protocol,external_port,internal_port\n"
+        "web,192.168.0.10,,8080,80\n"
+    )
+    rule, = read_rules(fp, 'csv')
+    assert rule['disabled'] is False
+    assert rule['protocol'] == 'tcp'
+
+
+def test_csv_header_not_written_when_fetch_fails():
+    def failing_rules():
+        raise ConnectionError("조회 실패")
+        yield  # pragma: no cover
+
+    fp = io.StringIO()
+    with pytest.raises(ConnectionError):
+        write_rules(failing_rules(), fp, 'csv')
+    assert fp.getvalue() == ''
+
+
+def test_csv_empty_table_writes_header():
+    fp = io.StringIO()
+    assert write_rules([], fp, 'csv') == 0
+    assert fp.getvalue().strip() == ','.join(RULE_FIELDS)
+
+
+def test_unsupported_format():
+    with pytest.raises(ValueError):
+        write_rules(RULES, io.StringIO(), 'xml')
+    with pytest.raises(ValueError):
+        list(read_rules(io.StringIO(), 'xml'))
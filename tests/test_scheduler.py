@@ -0,0 +1,119 @@
+"""규칙 예약 실행 테스트"""
+import time
+
+import pytest
+
+from src import scheduler as scheduler_module
+from src.scheduler import MISSED, SUCCEEDED, Scheduler
+
+
+class Recorder:
+    """run_batch 호출 기록"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, router, operations):
+        self.calls.append((router, operations))
+        return [{'success': True} for _ in operations]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'schedule.db')
+
+
+def drain(*schedulers):
+    """실행 중인 묶음이 끝날 때까지 대기하고 닫음"""
+    for scheduler in schedulers:
+        scheduler.stop()
+
+
+def test_claim_is_atomic_across_schedulers(db_path):
+    # 같은 데이터베이스를 연 두 실행기 중 하나만 예약을 가져감
+    first_run, second_run = Recorder(), Recorder()
+    first = Scheduler(db_path, first_run)
+    second = Scheduler(db_path, second_run)
+    entry = first.schedule('home', time.time() - 1, 'disable', {'rule': 'web'})
+
+    assert first._take_due() == 0
+    assert second._take_due() is None
+    drain(first, second)
+
+    assert len(first_run.calls) == 1
+    assert second_run.calls == []
+    check = Scheduler(db_path, Recorder())
+    assert check.get(entry['id'])['status'] == SUCCEEDED
+    check.stop()
+
+
+def test_canceled_entry_is_not_claimed(db_path):
+    run = Recorder()
+    scheduler = Scheduler(db_path, run)
+    entry = scheduler.schedule('home', time.time() - 1, 'remove', {'rule': 'web'})
+    assert scheduler.cancel(entry['id']) is True
+    assert scheduler.cancel(entry['id']) is False
+
+    assert scheduler._take_due() is None
+    drain(scheduler)
+    assert run.calls == []
+
+
+def test_entries_coalesced_per_router_in_order(db_path):
+    run = Recorder()
+    scheduler = Scheduler(db_path, run, coalesce=5)
+    now = time.time()
+    scheduler.schedule('home', now - 2, 'disable', {'rule': 'a'})
+    scheduler.schedule('office', now - 2, 'enable', {'rule': 'x'})
+    scheduler.schedule('home', now - 1, 'enable', {'rule': 'b'})
+
+    assert scheduler._take_due() == 0
+    drain(scheduler)
+
+    calls = dict(run.calls)
+    assert len(run.calls) == 2
+    assert calls['home'] == [{'op': 'disable', 'rule': 'a'}, {'op': 'enable', 'rule': 'b'}]
+    assert calls['office'] == [{'op': 'enable', 'rule': 'x'}]
+
+
+def test_future_entry_waits(db_path):
+    run = Recorder()
+    scheduler = Scheduler(db_path, run)
+    scheduler.schedule('home', time.time() + 60, 'disable', {'rule': 'web'})
+    assert 0 < scheduler._take_due() <= 60
+    drain(scheduler)
+    assert run.calls == []
+
+
+def test_too_late_entry_is_missed(db_path):
+    run = Recorder()
+    scheduler = Scheduler(db_path, run, max_late=10)
+    entry = scheduler.schedule('home', time.time() - 60, 'disable', {'rule': 'web'})
+    scheduler._take_due()
+    assert scheduler.get(entry['id'])['status'] == MISSED
+    drain(scheduler)
+    assert run.calls == []
+
+
+def test_invalid_action_rejected(db_path):
+    scheduler = Scheduler(db_path, Recorder())
+    with pytest.raises(ValueError):
+        scheduler.schedule('home', time.time(), 'rename', {'rule': 'web'})
+    with pytest.raises(ValueError):
+        scheduler.schedule('home', time.time(), 'add', {'description': 'web'})
+    drain(scheduler)
+
+
+@pytest.mark.skipif(scheduler_module.fcntl is None, reason="파일 잠금(fcntl)이 없는 플랫폼")
+def test_only_one_scheduler_runs(db_path):
+    first = Scheduler(db_path, Recorder())
+    second = Scheduler(db_path, Recorder())
+    assert first.start() is True
+    assert second.start() is False
+    assert first.active and not second.active
+    drain(first, second)
+
+    # 잠금을 놓으면 다른 실행기가 맡을 수 있음
+    third = Scheduler(db_path, Recorder())
+    assert third.start() is True
+    drain(third)
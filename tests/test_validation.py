@@ -0,0 +1,58 @@
+"""규칙 테이블 기반 검증 테스트"""
+from src.validation import RuleValidator
+
+
+def make_rule(name, port, protocol='tcp'):
+    return {
+        'description': name, 'internal_ip': '192.168.0.10', 'protocol': protocol,
+        'external_port': str(port), 'internal_port': str(port),
+    }
+
+
+def test_conflicts_same_protocol():
+    web = make_rule('web', 8080)
+    validator = RuleValidator([web, make_rule('ssh', 22)])
+    assert validator.conflicts(8080, 'tcp') == [web]
+    assert validator.conflicts(8081, 'tcp') == []
+
+
+def test_conflicts_other_protocol():
+    validator = RuleValidator([make_rule('dns', 53, 'udp')])
+    assert validator.conflicts(53, 'tcp') == []
+    assert len(validator.conflicts(53, 'udp')) == 1
+
+
+def test_conflicts_both_checks_tcp_and_udp():
+    tcp = make_rule('web', 8080, 'tcp')
+    udp = make_rule('game', 9000, 'udp')
+    validator = RuleValidator([tcp, udp])
+    assert validator.conflicts(8080, 'both') == [tcp]
+    assert validator.conflicts(9000, 'both') == [udp]
+
+
+def test_conflicts_both_rule_reported_once():
+    rule = make_rule('vpn', 1194, 'both')
+    validator = RuleValidator([rule])
+    assert validator.conflicts(1194, 'both') == [rule]
+    assert validator.conflicts(1194, 'udp') == [rule]
+
+
+def test_conflicts_exclude():
+    # 수정할 규칙 자신은 중복으로 보지 않음
+    rule = make_rule('web', 8080)
+    validator = RuleValidator([rule])
+    assert validator.conflicts(8080, 'tcp', exclude=rule) == []
+
+
+def test_add_and_remove_update_index():
+    validator = RuleValidator()
+    rule = make_rule('web', 8080)
+    validator.add(rule)
+    assert validator.conflicts('8080', 'tcp') == [rule]
+    validator.remove(rule)
+    assert validator.conflicts('8080', 'tcp') == []
+
+
+def test_invalid_existing_rule_is_skipped():
+    validator = RuleValidator([make_rule('broken', 'abc'), make_rule('web', 80)])
+    assert len(validator.conflicts(80, 'tcp')) == 1